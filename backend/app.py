@@ -4,37 +4,33 @@ eventlet.monkey_patch()
 import os
 import json
 from datetime import datetime, timezone
-from typing import Optional
 from collections import Counter
 
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request
+from werkzeug.security import safe_join
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_socketio import SocketIO
 
-from models import db, Pipeline, Build, BuildLog, User
+from models import (
+    db, Pipeline, PipelineStats, Build, BuildLog, User, Report,
+    rebuild_pipeline_stats, register_report, latest_report,
+)
 from utils.build_runner import run_build_thread
+from utils.migrations import apply_migrations, is_fresh_database
+from utils.storage import configure_storage, install_sqlite_pragmas
+from utils.log_retention import LogRetentionService, read_archived_logs
+from utils.dashboard_cache import DashboardCache
+from utils.report_catalog import bootstrap_catalog, prune_reports, report_dir_for
+from utils.report_files import VariantBuilder, serve_report
+from utils.state_sync import StateSync, pipeline_state, pipeline_op
+from utils.metrics import install_http_metrics, instrument_socketio
 
 # Initialize SocketIO
 socketio = SocketIO(cors_allowed_origins="*", async_mode="eventlet")
 
 
-def find_latest_json_report(reports_dir: str) -> Optional[str]:
-    """Return path to latest .json file in reports dir."""
-    if not os.path.isdir(reports_dir):
-        return None
-    json_files = [
-        os.path.join(reports_dir, f)
-        for f in os.listdir(reports_dir)
-        if f.lower().endswith(".json")
-    ]
-    if not json_files:
-        return None
-    json_files.sort(key=lambda p: os.path.getmtime(p), reverse=True)
-    return json_files[0]
-
-
-def create_app():
+def create_app(config=None):
     app = Flask(__name__, static_folder=None)
     CORS(app)
 
@@ -44,18 +40,60 @@ def create_app():
     instance_dir = os.path.join(os.path.dirname(__file__), "instance")
     os.makedirs(instance_dir, exist_ok=True)
 
-    db_path = os.path.join(instance_dir, "pipeline.db")
-    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}?check_same_thread=False"
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["JWT_SECRET_KEY"] = "super-secret"
+    app.config["STEP_CACHE_DIR"] = os.path.join(instance_dir, "step_cache")
+    app.config["LOG_ARCHIVE_DIR"] = os.path.join(instance_dir, "log_archive")
+    app.config["EMBEDDING_REPORT_FILE"] = r"D:\ai-cicd-security-tool\backend\reports\embedding_report.json"
+    app.config["DASHBOARD_CACHE_TTL"] = 5.0
+    app.config["REPORT_DIRS"] = {
+        "scan_reports": r"D:\ai-cicd-security-tool\backend\scan_reports",
+        "reports": r"D:\ai-cicd-security-tool\backend\reports",
+    }
+    # handed to pipeline steps so scanners can register the reports they write
+    app.config["REPORT_CATALOG_URL"] = "http://127.0.0.1:5000/api/reports"
+    # timestamped history reports kept per scanner and format (None keeps all)
+    app.config["REPORT_HISTORY_KEEP"] = 50
+    if config:
+        app.config.update(config)
+
+    # SQLite (WAL) by default, PIPELINE_DATABASE_URL for a server database
+    configure_storage(app, instance_dir)
 
     db.init_app(app)
     JWTManager(app)
     socketio.init_app(app, cors_allowed_origins="*")
     app.socketio = socketio
 
+    # Prometheus text format on /metrics; counters are in-process and cheap
+    install_http_metrics(app)
+    instrument_socketio(socketio)
+
     with app.app_context():
+        install_sqlite_pragmas(db.engine, app.config)
+        fresh = is_fresh_database(db.engine)
         db.create_all()
+        # create_all() never alters existing tables; versioned migrations do
+        apply_migrations(db.engine, stamp_only=fresh)
+        # backfill the summary table for databases created before it existed
+        if PipelineStats.query.first() is None and Build.query.first() is not None:
+            rebuild_pipeline_stats()
+        if Report.query.first() is None:
+            bootstrap_catalog(app.config["REPORT_DIRS"])
+
+    # started from __main__ so tests/benchmarks creating apps don't spawn it
+    app.log_retention = LogRetentionService(app, app.config["LOG_ARCHIVE_DIR"])
+
+    # invalidated by build transitions (utils/build_runner.py) and report
+    # registrations; also rebuilt when the report file it served changes
+    app.dashboard_cache = DashboardCache(ttl=app.config["DASHBOARD_CACHE_TTL"])
+
+    # pushes state_patch events so pages don't poll /api/pipelines and /api/builds
+    app.state_sync = StateSync(socketio)
+
+    # .br/.gz siblings of reports, built in the background when a report is
+    # registered or first viewed; requests never wait for compression
+    app.report_variants = VariantBuilder(socketio.start_background_task)
 
     # ============================
     # PIPELINE ROUTES
@@ -64,22 +102,19 @@ def create_app():
     def get_pipelines():
         """Return pipelines with latest build info (status, runtime)."""
         pipelines = []
-        for p in Pipeline.query.all():
-            last_build = (
-                Build.query.filter_by(pipeline_id=p.id)
-                .order_by(Build.id.desc())
-                .first()
-            )
-
+        rows = db.session.query(Pipeline, PipelineStats).outerjoin(
+            PipelineStats, PipelineStats.pipeline_id == Pipeline.id
+        )
+        for p, summary in rows:
             status = "unknown"
             runtime = "N/A"
 
-            if last_build:
-                status = last_build.status or "unknown"
-                if last_build.started_at:
+            if summary and summary.last_build_id:
+                status = summary.last_status or "unknown"
+                if summary.last_started_at:
                     try:
-                        end_time = last_build.finished_at or datetime.now(timezone.utc)
-                        start_time = last_build.started_at
+                        end_time = summary.last_finished_at or datetime.now(timezone.utc)
+                        start_time = summary.last_started_at
                         if start_time.tzinfo is None:
                             start_time = start_time.replace(tzinfo=timezone.utc)
                         if end_time.tzinfo is None:
@@ -136,8 +171,16 @@ def create_app():
         logs = []
         if builds:
             last_build = builds[0]
-            for log in BuildLog.query.filter_by(build_id=last_build.id).order_by(BuildLog.id.asc()).all():
-                logs.append(log.text)
+            # archived builds may still have rows awaiting deletion; the archive is complete
+            if last_build.logs_archived:
+                logs = [entry["text"] for entry in read_archived_logs(app.config["LOG_ARCHIVE_DIR"], last_build)]
+            else:
+                logs = [
+                    text for (text,) in
+                    db.session.query(BuildLog.text)
+                    .filter(BuildLog.build_id == last_build.id)
+                    .order_by(BuildLog.id.asc())
+                ]
 
         return jsonify({
             "id": pipeline.id,
@@ -160,8 +203,12 @@ def create_app():
             description=data.get("description", ""),
             config_json=json.dumps(data.get("config_json")),
         )
+        # created with the pipeline so the first builds only ever update it
+        pipeline.summary = PipelineStats()
         db.session.add(pipeline)
         db.session.commit()
+        app.dashboard_cache.invalidate()
+        app.state_sync.publish(lambda: [pipeline_op(pipeline.id)])
 
         return jsonify(pipeline.to_dict(include_stats=True)), 201
 
@@ -177,7 +224,13 @@ def create_app():
             started_at=datetime.now(timezone.utc),
         )
         db.session.add(build)
+        PipelineStats.apply_transition(build, None)
         db.session.commit()
+        app.dashboard_cache.invalidate()
+        app.state_sync.publish(lambda: [
+            {"op": "build", "build": build.to_dict()},
+            pipeline_op(pipeline.id),
+        ])
 
         socketio.emit("build_status_update", {
             "pipeline_id": pipeline.id,
@@ -201,6 +254,8 @@ def create_app():
             return jsonify({"error": "Pipeline not found"}), 404
         db.session.delete(pipeline)
         db.session.commit()
+        app.dashboard_cache.invalidate()
+        app.state_sync.publish(lambda: [{"op": "pipeline_removed", "id": pipeline_id}])
         return jsonify({"message": f"Pipeline {pipeline_id} deleted"}), 200
 
     # ============================
@@ -216,6 +271,8 @@ def create_app():
         build = db.session.get(Build, build_id)
         if not build:
             return jsonify({"error": "Build not found"}), 404
+        if build.logs_archived:
+            return jsonify(read_archived_logs(app.config["LOG_ARCHIVE_DIR"], build))
         logs = (
             BuildLog.query.filter_by(build_id=build_id)
             .order_by(BuildLog.id.asc())
@@ -232,6 +289,37 @@ def create_app():
             ]
         )
 
+    # ============================
+    # STATE SYNC ROUTES
+    # ============================
+    @app.route("/api/state/snapshot", methods=["GET"])
+    def state_snapshot():
+        """Initial state for pages that then follow ``state_patch`` events."""
+        def build_state():
+            rows = db.session.query(Pipeline, PipelineStats).outerjoin(
+                PipelineStats, PipelineStats.pipeline_id == Pipeline.id
+            )
+            builds = Build.query.order_by(Build.started_at.desc().nullslast()).limit(50).all()
+            return {
+                "pipelines": [pipeline_state(p, summary) for p, summary in rows],
+                "builds": [b.to_dict() for b in builds],
+            }
+
+        return jsonify(app.state_sync.snapshot(build_state))
+
+    @app.route("/api/state/patches", methods=["GET"])
+    def state_patches():
+        """Patches after ``since``; 410 means the client has to reload the snapshot."""
+        since = request.args.get("since", type=int, default=0)
+        patches = app.state_sync.patches_since(since, request.args.get("epoch"))
+        if patches is None:
+            return jsonify({"error": "Patch history unavailable, reload the snapshot"}), 410
+        return jsonify({
+            "epoch": app.state_sync.epoch,
+            "version": patches[-1]["version"] if patches else since,
+            "patches": patches,
+        })
+
     # ============================
     # ACTIVITY LOG ROUTE
     # ============================
@@ -252,18 +340,29 @@ def create_app():
     # ============================
     @app.route("/api/dashboard-data", methods=["GET"])
     def dashboard_data():
+        def build():
+            payload = build_dashboard_payload()
+            return json.dumps(payload).encode("utf-8"), [payload["report_file"]]
+
+        body, etag = app.dashboard_cache.get(build)
+        resp = Response(body, mimetype="application/json")
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = "no-cache"
+        # answers If-None-Match with 304
+        return resp.make_conditional(request)
+
+    def build_dashboard_payload():
         pipelines = []
-        for p in Pipeline.query.all():
-            last_build = (
-                Build.query.filter_by(pipeline_id=p.id)
-                .order_by(Build.id.desc())
-                .first()
-            )
-            status = last_build.status if last_build else "unknown"
+        rows = db.session.query(Pipeline, PipelineStats).outerjoin(
+            PipelineStats, PipelineStats.pipeline_id == Pipeline.id
+        )
+        for p, summary in rows:
+            has_build = summary is not None and summary.last_build_id is not None
+            status = summary.last_status if has_build else "unknown"
             runtime = "N/A"
-            if last_build and last_build.started_at:
+            if has_build and summary.last_started_at:
                 try:
-                    start_time = last_build.started_at
+                    start_time = summary.last_started_at
                     now = datetime.now(timezone.utc)
                     if start_time.tzinfo is None:
                         start_time = start_time.replace(tzinfo=timezone.utc)
@@ -290,7 +389,8 @@ def create_app():
                 "text": text_value,
             })
 
-        report_file = r"D:\ai-cicd-security-tool\backend\reports\embedding_report.json"
+        latest = latest_report(scanner="pyguard", fmt="JSON")
+        report_file = latest.path if latest else app.config["EMBEDDING_REPORT_FILE"]
         risk_score = {"CRITICAL": 0, "HIGH": 0, "MEDIUM": 0, "LOW": 0}
         threat_categories = Counter()
 
@@ -315,101 +415,100 @@ def create_app():
         else:
             print("⚠️ embedding_report.json not found.")
 
-        return jsonify({
+        return {
             "pipelines": pipelines,
             "logs": logs,
             "risk_score": risk_score,
             "threat_categories": dict(threat_categories),
             "report_file": report_file
-        })
+        }
 
     # ============================
-    # REPORTS ROUTE (explicit fixed files)
+    # REPORTS ROUTES (catalog)
     # ============================
     @app.route("/api/reports", methods=["GET"])
     def list_reports():
-        report_files = [
-            {
-                "path": r"D:\ai-cicd-security-tool\backend\scan_reports\report.json",
-                "type": "Security",
-                "format": "JSON",
-            },
-            {
-                "path": r"D:\ai-cicd-security-tool\backend\scan_reports\report.html",
-                "type": "Security",
-                "format": "HTML",
-            },
-            {
-                "path": r"D:\ai-cicd-security-tool\backend\reports\embedding_report.json",
-                "type": "Security",
-                "format": "JSON",
-            },
-            {
-                "path": r"D:\ai-cicd-security-tool\backend\reports\embedding_report.html",
-                "type": "Security",
-                "format": "HTML",
-            },
-        ]
+        q = Report.query
+        if request.args.get("scanner"):
+            q = q.filter(Report.scanner == request.args["scanner"])
+        if request.args.get("build_id", type=int):
+            q = q.filter(Report.build_id == request.args.get("build_id", type=int))
+        limit = min(request.args.get("limit", 100, type=int), 500)
 
         reports = []
         base_url = "http://127.0.0.1:5000"
+        report_dirs = app.config["REPORT_DIRS"]
 
-        for item in report_files:
-            file_path = item["path"]
-            if not os.path.exists(file_path):
-                continue
-
-            created_time = datetime.fromtimestamp(os.path.getmtime(file_path))
-            filename = os.path.basename(file_path)
-            dir_name = os.path.basename(os.path.dirname(file_path))
-
-            reports.append({
-                "name": filename,
-                "type": item["type"],
-                "format": item["format"],
-                "generated_at": created_time.strftime("%d/%m/%Y %H:%M"),
-                "view_url": f"{base_url}/api/reports/view/{filename}?dir={dir_name}",
-                "download_url": f"{base_url}/api/reports/download/{filename}?dir={dir_name}",
-            })
+        for report in q.order_by(Report.created_at.desc(), Report.id.desc()).limit(limit):
+            item = report.to_dict()
+            dir_name = report_dir_for(report.path, report_dirs)
+            filename = item["name"]
+            item["generated_at"] = report.created_at.strftime("%d/%m/%Y %H:%M")
+            item["view_url"] = f"{base_url}/api/reports/view/{filename}?dir={dir_name}"
+            item["download_url"] = f"{base_url}/api/reports/download/{filename}?dir={dir_name}"
+            reports.append(item)
 
-        reports.sort(key=lambda x: x["generated_at"], reverse=True)
         return jsonify({"reports": reports})
 
+    @app.route("/api/reports", methods=["POST"])
+    def register_report_route():
+        """Called by scanners after writing a report file."""
+        data = request.get_json() or {}
+        path = data.get("path")
+        scanner = data.get("scanner")
+        if not path or not scanner:
+            return jsonify({"error": "Missing path or scanner"}), 400
+
+        path = os.path.abspath(path)
+        if not report_dir_for(path, app.config["REPORT_DIRS"]):
+            return jsonify({"error": "Report must be inside a configured report directory"}), 400
+        if not os.path.isfile(path):
+            return jsonify({"error": "Report not found"}), 404
+
+        report = register_report(
+            scanner=scanner,
+            path=path,
+            fmt=data.get("format"),
+            build_id=data.get("build_id"),
+            summary=data.get("summary"),
+            report_type=data.get("type", "Security"),
+        )
+        db.session.commit()
+        prune_reports(scanner, app.config["REPORT_HISTORY_KEEP"])
+        app.dashboard_cache.invalidate()
+        app.state_sync.publish(lambda: [{"op": "report", "report": report.to_dict()}])
+        app.report_variants.submit(path)
+        return jsonify(report.to_dict()), 201
+
     @app.route("/api/reports/view/<filename>", methods=["GET"])
     def view_report(filename):
         dir_param = request.args.get("dir", "").lower()
-        base_dirs = {
-            "scan_reports": r"D:\ai-cicd-security-tool\backend\scan_reports",
-            "reports": r"D:\ai-cicd-security-tool\backend\reports",
-        }
+        base_dirs = app.config["REPORT_DIRS"]
 
         reports_dir = base_dirs.get(dir_param)
         if not reports_dir:
             return jsonify({"error": "Invalid directory"}), 400
 
-        full_path = os.path.join(reports_dir, filename)
-        if not os.path.exists(full_path):
+        full_path = safe_join(reports_dir, filename)
+        if not full_path or not os.path.isfile(full_path):
             return jsonify({"error": "Report not found"}), 404
 
-        return send_from_directory(reports_dir, filename)
+        return serve_report(full_path, variants=app.report_variants)
 
     @app.route("/api/reports/download/<filename>", methods=["GET"])
     def download_report(filename):
         dir_param = request.args.get("dir", "").lower()
-        base_dirs = {
-            "scan_reports": r"D:\ai-cicd-security-tool\backend\scan_reports",
-            "reports": r"D:\ai-cicd-security-tool\backend\reports",
-        }
+        base_dirs = app.config["REPORT_DIRS"]
 
         reports_dir = base_dirs.get(dir_param)
         if not reports_dir:
             return jsonify({"error": "Invalid directory"}), 400
 
-        full_path = os.path.join(reports_dir, filename)
-        if not os.path.exists(full_path):
+        full_path = safe_join(reports_dir, filename)
+        if not full_path or not os.path.isfile(full_path):
             return jsonify({"error": "Report not found"}), 404
 
-        return send_from_directory(reports_dir, filename, as_attachment=True)
+        return serve_report(full_path, as_attachment=True, variants=app.report_variants)
 
     return app
 
@@ -435,5 +534,7 @@ if __name__ == "__main__":
             db.session.commit()
             print("✅ Created default pipeline")
 
+    socketio.start_background_task(app.log_retention.run_forever)
+
     print("🚀 Backend starting on http://127.0.0.1:5000")
     socketio.run(app, host="0.0.0.0", port=5000, debug=True, use_reloader=False)
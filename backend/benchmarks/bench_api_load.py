@@ -0,0 +1,347 @@
+"""
+Load test for one backend process: concurrent builds plus live dashboard clients.
+
+Starts app.py's Socket.IO server (eventlet) on a free local port with a
+fresh SQLite database, seeds pipelines whose step prints timestamped log
+lines, then in parallel:
+  - fires POST /api/pipelines/<id>/run requests from --concurrency threads
+  - keeps --clients Socket.IO clients attached, counting build_log events
+  - polls /api/dashboard-data and /api/state/snapshot like open dashboards
+
+Reported: HTTP latency percentiles, Socket.IO events dropped (never
+received) and late (delivered more than --late-ms after the line was
+printed), log lines missing from the DB, BuildLog flush latency from
+/metrics and "database is locked" errors in the server output.
+
+Clients use the WebSocket transport like the browser does, which needs
+the websocket-client package (python-engineio's long-polling client drops
+batched packets and would be counted as lost events).
+
+Usage (from backend/):
+    pip install websocket-client
+    python benchmarks/bench_api_load.py [--pipelines 5] [--builds 40] [--concurrency 8]
+        [--clients 20] [--lines 500] [--line-delay-ms 1] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# the runner emits build_log for every 5th line (emit_cooldown in utils/build_runner.py)
+EMIT_EVERY = 5
+
+STEP_SCRIPT = """\
+import sys, time
+lines, delay = int(sys.argv[1]), float(sys.argv[2])
+for i in range(lines):
+    print("LOADTEST", i, repr(time.time()), flush=True)
+    if delay:
+        time.sleep(delay)
+"""
+
+
+def serve(db_path, port):
+    sys.path.insert(0, BACKEND_DIR)
+    from app import create_app, socketio
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "STEP_CACHE_DIR": os.path.join(os.path.dirname(db_path), "step_cache"),
+        "LOG_ARCHIVE_DIR": os.path.join(os.path.dirname(db_path), "log_archive"),
+        "REPORT_DIRS": {},
+    })
+    socketio.run(app, host="127.0.0.1", port=port, log_output=False)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _latency_summary(values):
+    return {
+        "count": len(values),
+        "p50_ms": round(_percentile(values, 50) * 1000, 2),
+        "p95_ms": round(_percentile(values, 95) * 1000, 2),
+        "p99_ms": round(_percentile(values, 99) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2) if values else 0.0,
+    }
+
+
+def _histogram_from_metrics(text, name):
+    """Cumulative buckets, sum and count of an unlabelled histogram in Prometheus text."""
+    buckets, total, count = [], 0.0, 0
+    for line in text.splitlines():
+        if line.startswith(f"{name}_bucket"):
+            bound = line.split('le="', 1)[1].split('"', 1)[0]
+            buckets.append((float("inf") if bound == "+Inf" else float(bound), int(line.rsplit(" ", 1)[1])))
+        elif line.startswith(f"{name}_sum"):
+            total = float(line.rsplit(" ", 1)[1])
+        elif line.startswith(f"{name}_count"):
+            count = int(line.rsplit(" ", 1)[1])
+    return buckets, total, count
+
+
+def _bucket_percentile(buckets, count, pct):
+    """Upper bound of the bucket holding the pct-th observation."""
+    for bound, cumulative in buckets:
+        if count and cumulative >= count * pct / 100:
+            return bound
+    return None
+
+
+class ServerOutput(threading.Thread):
+    """Drains the server's stdout (builds print every line) and counts lock errors."""
+
+    def __init__(self, proc):
+        super().__init__(daemon=True)
+        self.proc = proc
+        self.lock_errors = 0
+        self.tail = []
+
+    def run(self):
+        for raw in iter(self.proc.stdout.readline, b""):
+            line = raw.decode("utf-8", "replace")
+            if "database is locked" in line:
+                self.lock_errors += 1
+            if "LOADTEST" not in line:
+                self.tail = (self.tail + [line.rstrip()])[-20:]
+
+
+class LogClient:
+    """One simulated dashboard tab listening for build events."""
+
+    def __init__(self, url, late_s):
+        import socketio
+
+        self.late_s = late_s
+        self.received = defaultdict(set)
+        self.lateness = []
+        self.late = 0
+        self.finished = set()
+        self.sio = socketio.Client(reconnection=True)
+        self.sio.on("build_log", self._on_log)
+        self.sio.on("build_finished", self._on_finished)
+        self.sio.connect(url, transports=["websocket"], wait_timeout=10)
+
+    def _on_log(self, data):
+        parts = (data.get("text") or "").split()
+        if len(parts) != 3 or parts[0] != "LOADTEST":
+            return
+        delay = time.time() - float(parts[2])
+        self.lateness.append(delay)
+        if delay > self.late_s:
+            self.late += 1
+        self.received[data["build_id"]].add(int(parts[1]))
+
+    def _on_finished(self, data):
+        self.finished.add(data["build_id"])
+
+    def close(self):
+        self.sio.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pipelines", type=int, default=5)
+    parser.add_argument("--builds", type=int, default=40, help="total runs to trigger")
+    parser.add_argument("--concurrency", type=int, default=8, help="threads posting run requests")
+    parser.add_argument("--clients", type=int, default=20, help="Socket.IO clients")
+    parser.add_argument("--readers", type=int, default=4, help="threads polling dashboard endpoints")
+    parser.add_argument("--lines", type=int, default=500, help="log lines per build")
+    parser.add_argument("--line-delay-ms", type=float, default=1.0)
+    parser.add_argument("--late-ms", type=float, default=1000.0)
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds to wait for builds")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.db, args.port)
+        return
+
+    import requests
+    try:
+        import websocket  # noqa: F401  (websocket-client, used by python-socketio)
+    except ImportError:
+        raise SystemExit("websocket-client is required: pip install websocket-client")
+
+    tmp = tempfile.mkdtemp(prefix="bench_api_load_")
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    proc = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", "--db", os.path.join(tmp, "load.db"), "--port", str(port)],
+        cwd=BACKEND_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+    )
+    output = ServerOutput(proc)
+    output.start()
+    clients = []
+    try:
+        session = requests.Session()
+        deadline = time.time() + 60
+        while True:
+            try:
+                if session.get(f"{base_url}/api/pipelines", timeout=2).ok:
+                    break
+            except requests.RequestException:
+                pass
+            if time.time() > deadline or proc.poll() is not None:
+                raise SystemExit("server did not start:\n" + "\n".join(output.tail))
+            time.sleep(0.2)
+
+        script = os.path.join(tmp, "emit_lines.py")
+        with open(script, "w") as f:
+            f.write(STEP_SCRIPT)
+        cmd = f'"{sys.executable}" -u "{script}" {args.lines} {args.line_delay_ms / 1000}'
+        pipeline_ids = []
+        for i in range(args.pipelines):
+            r = session.post(f"{base_url}/api/pipelines", json={
+                "name": f"load-{i}", "config_json": {"steps": [{"cmd": cmd}]},
+            })
+            r.raise_for_status()
+            pipeline_ids.append(r.json()["id"])
+
+        print(f"[load] server on {base_url}, {len(pipeline_ids)} pipelines, attaching {args.clients} clients")
+        clients = [LogClient(base_url, args.late_ms / 1000) for _ in range(args.clients)]
+
+        # dashboard readers run until all builds are done
+        stop = threading.Event()
+        read_latency = defaultdict(list)
+
+        def reader():
+            s = requests.Session()
+            while not stop.is_set():
+                for path in ("/api/dashboard-data", "/api/state/snapshot"):
+                    t0 = time.perf_counter()
+                    try:
+                        s.get(base_url + path, timeout=30)
+                        read_latency[path].append(time.perf_counter() - t0)
+                    except requests.RequestException:
+                        read_latency[path + " errors"].append(0)
+                time.sleep(0.5)
+
+        readers = [threading.Thread(target=reader, daemon=True) for _ in range(args.readers)]
+        for t in readers:
+            t.start()
+
+        run_latency, build_ids, run_errors = [], [], 0
+        lock = threading.Lock()
+
+        def trigger(n):
+            nonlocal run_errors
+            s = requests.Session()
+            t0 = time.perf_counter()
+            try:
+                r = s.post(f"{base_url}/api/pipelines/{pipeline_ids[n % len(pipeline_ids)]}/run", timeout=30)
+                elapsed = time.perf_counter() - t0
+                with lock:
+                    run_latency.append(elapsed)
+                    if r.status_code == 202:
+                        build_ids.append(r.json()["build_id"])
+                    else:
+                        run_errors += 1
+            except requests.RequestException:
+                with lock:
+                    run_errors += 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(trigger, range(args.builds)))
+
+        deadline = time.time() + args.timeout
+        while time.time() < deadline and not set(build_ids) <= clients[0].finished:
+            time.sleep(0.5)
+        wall = time.perf_counter() - started
+        time.sleep(1)  # let trailing events arrive
+        stop.set()
+
+        unfinished = len(set(build_ids) - clients[0].finished)
+        expected = set(range(EMIT_EVERY - 1, args.lines, EMIT_EVERY))
+        dropped = sum(len(expected - c.received.get(b, set())) for c in clients for b in build_ids)
+        late = sum(c.late for c in clients)
+        lateness = [d for c in clients for d in c.lateness]
+
+        missing_db = 0
+        for build_id in build_ids:
+            logs = session.get(f"{base_url}/api/builds/{build_id}/logs").json()
+            missing_db += args.lines - sum(1 for entry in logs if entry["text"].startswith("LOADTEST"))
+
+        metrics_text = session.get(f"{base_url}/metrics").text
+        buckets, flush_total, flush_count = _histogram_from_metrics(metrics_text, "pipelinex_build_log_flush_seconds")
+
+        results = {
+            "config": {k: v for k, v in vars(args).items() if k not in ("serve", "db", "port", "output")},
+            "wall_seconds": round(wall, 2),
+            "builds": {"triggered": len(build_ids), "run_errors": run_errors, "unfinished": unfinished},
+            "run_request": _latency_summary(run_latency),
+            "dashboard_reads": {path: _latency_summary(v) for path, v in read_latency.items()},
+            "socketio": {
+                "expected_events": len(expected) * len(build_ids) * len(clients),
+                "dropped": dropped,
+                "late": late,
+                "delivery": _latency_summary(lateness),
+            },
+            "db": {
+                "log_lines_missing": missing_db,
+                "flushes": flush_count,
+                "flush_mean_ms": round(flush_total / flush_count * 1000, 2) if flush_count else None,
+                "flush_p95_le_s": _bucket_percentile(buckets, flush_count, 95),
+                "flush_p99_le_s": _bucket_percentile(buckets, flush_count, 99),
+                "lock_errors": output.lock_errors,
+            },
+        }
+    finally:
+        for c in clients:
+            try:
+                c.close()
+            except Exception:
+                pass
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    r = results
+    print(f"[load] {r['builds']['triggered']} builds in {r['wall_seconds']}s "
+          f"(run errors={r['builds']['run_errors']}, unfinished={r['builds']['unfinished']})")
+    print(f"  POST run            p50={r['run_request']['p50_ms']} ms  p95={r['run_request']['p95_ms']} ms  "
+          f"p99={r['run_request']['p99_ms']} ms")
+    for path, s in r["dashboard_reads"].items():
+        print(f"  GET {path:<22} n={s['count']}  p50={s['p50_ms']} ms  p95={s['p95_ms']} ms  p99={s['p99_ms']} ms")
+    sio = r["socketio"]
+    print(f"  Socket.IO  expected={sio['expected_events']}  dropped={sio['dropped']}  late={sio['late']}  "
+          f"delivery p50={sio['delivery']['p50_ms']} ms  p99={sio['delivery']['p99_ms']} ms")
+    dbr = r["db"]
+    print(f"  DB  missing lines={dbr['log_lines_missing']}  flushes={dbr['flushes']}  mean={dbr['flush_mean_ms']} ms  "
+          f"p95<={dbr['flush_p95_le_s']} s  p99<={dbr['flush_p99_le_s']} s  lock errors={dbr['lock_errors']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"[load] results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Query-count benchmark for /api/pipelines and /api/dashboard-data.
+
+Seeds a throwaway SQLite DB with thousands of pipelines and builds, then
+checks that the number of SQL statements per request does not depend on
+the number of pipelines.
+
+Usage (from backend/):
+    python benchmarks/bench_dashboard_queries.py [--pipelines 2000] [--builds-per-pipeline 5]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event, insert
+
+from app import create_app
+from models import db, Pipeline, Build, BuildLog, rebuild_pipeline_stats
+
+STATUSES = ["success", "failed", "running", "success", "queued"]
+
+
+def seed(app, n_pipelines, builds_per_pipeline):
+    now = datetime.now(timezone.utc)
+    with app.app_context():
+        db.session.execute(insert(Pipeline), [
+            {
+                "name": f"pipeline-{i}",
+                "description": "benchmark",
+                "config_json": json.dumps({"steps": [{"cmd": "echo hi"}]}),
+            }
+            for i in range(n_pipelines)
+        ])
+        pipeline_ids = [pid for (pid,) in db.session.query(Pipeline.id).all()]
+
+        builds = []
+        for pid in pipeline_ids:
+            for j in range(builds_per_pipeline):
+                started = now - timedelta(minutes=10 * (builds_per_pipeline - j))
+                builds.append({
+                    "pipeline_id": pid,
+                    "status": STATUSES[(pid + j) % len(STATUSES)],
+                    "started_at": started,
+                    "finished_at": started + timedelta(minutes=3),
+                })
+        db.session.execute(insert(Build), builds)
+        db.session.execute(insert(BuildLog), [
+            {"build_id": 1, "step_index": 0, "text": f"line {i}"} for i in range(20)
+        ])
+        db.session.commit()
+        # bulk inserts bypass the runner, so materialize pipeline_stats once
+        rebuild_pipeline_stats()
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+
+def measure(app, counter, url):
+    client = app.test_client()
+    counter.count = 0
+    start = time.perf_counter()
+    resp = client.get(url)
+    elapsed = time.perf_counter() - start
+    assert resp.status_code == 200, resp.status_code
+    return counter.count, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pipelines", type=int, default=2000)
+    parser.add_argument("--builds-per-pipeline", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # Two sizes: the query count must be identical for both
+        for n in (max(args.pipelines // 100, 1), args.pipelines):
+            db_path = os.path.join(tmp, f"bench_{n}.db")
+            app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}"})
+            seed(app, n, args.builds_per_pipeline)
+
+            with app.app_context():
+                counter = QueryCounter(db.engine)
+                for url in ("/api/pipelines", "/api/dashboard-data"):
+                    queries, elapsed = measure(app, counter, url)
+                    results.setdefault(url, []).append((n, queries, elapsed))
+                    print(f"{url:<22} pipelines={n:<6} queries={queries:<4} time={elapsed * 1000:.1f} ms")
+
+    for url, rows in results.items():
+        counts = {queries for _, queries, _ in rows}
+        assert len(counts) == 1, f"{url}: query count grows with pipelines: {rows}"
+    print("OK: query count is constant")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Whitelist filtering benchmark for the scanner PolicyEngine.
+
+Generates a seeded policy (file globs, regex patterns, rule and detector ids)
+and a noisy finding set where the same files repeat many times, then times
+PolicyEngine.filter_whitelisted against the previous per-finding
+fnmatch/list implementation and checks both keep the same findings.
+
+Usage (from backend/):
+    python benchmarks/bench_policy_whitelist.py [--globs 500] [--rules 300] [--findings 20000] [--files 2000]
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import fnmatch
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "cicd-integrity-monitor-main")))
+
+from scanner.scanner.policy import PolicyEngine
+
+DETECTORS = ("SignatureDetector", "RegexDetector", "ASTDetector", "EntropyDetector",
+             "YAMLDetector", "DependencyDetector", "CIConfigDetector")
+
+
+def make_policy(rng, n_globs, n_rules, n_patterns):
+    globs = []
+    for i in range(n_globs):
+        shape = i % 4
+        if shape == 0:
+            globs.append(f"src/pkg{i}/*.py")
+        elif shape == 1:
+            globs.append(f"**/vendor{i}/*")
+        elif shape == 2:
+            globs.append(f"tests/fixtures/case_{i}_?.json")
+        else:
+            globs.append(f"*/generated{i}/**")
+    return {
+        "whitelist_files": globs,
+        "whitelist_rules": [f"rule_{i}" for i in range(n_rules)],
+        "whitelist_detectors": ["entropy_detector", DETECTORS[rng.randrange(len(DETECTORS))]],
+        "whitelist_patterns": [f".*codegen_{i}.*" for i in range(n_patterns)],
+        "whitelist_enabled": True,
+    }
+
+
+def make_findings(rng, n_findings, n_files, n_globs, n_rules):
+    files = []
+    for i in range(n_files):
+        k = rng.randrange(n_globs * 2)  # about half the paths fall under a glob
+        shape = k % 4
+        if shape == 0:
+            files.append(f"src/pkg{k}/module_{i}.py")
+        elif shape == 1:
+            files.append(f"third_party/vendor{k}/lib_{i}.js")
+        elif shape == 2:
+            files.append(f"tests/fixtures/case_{k}_{i % 10}.json")
+        else:
+            files.append(f"app/generated{k}/deep/file_{i}.ts")
+    return [
+        {
+            "detector": DETECTORS[rng.randrange(len(DETECTORS))],
+            "file": files[rng.randrange(n_files)],
+            "id": f"rule_{rng.randrange(n_rules * 3)}",
+            "score": rng.randint(1, 10),
+        }
+        for _ in range(n_findings)
+    ]
+
+
+def legacy_filter(policy, findings):
+    """Previous PolicyEngine.filter_whitelisted: fnmatch per glob and list membership per finding."""
+    compiled = [re.compile(x) for x in policy["whitelist_patterns"] if x]
+
+    def file_whitelisted(file_path):
+        if not file_path:
+            return False
+        for pattern in policy["whitelist_files"]:
+            if fnmatch.fnmatch(file_path, pattern) or fnmatch.fnmatch(os.path.normpath(file_path), pattern):
+                return True
+        return any(cre.search(file_path) for cre in compiled)
+
+    output = []
+    for f in findings:
+        if f["detector"] in policy["whitelist_detectors"]:
+            continue
+        if f["id"] in policy["whitelist_rules"]:
+            continue
+        if file_whitelisted(f["file"]):
+            continue
+        output.append(f)
+    return output
+
+
+def timed(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--globs", type=int, default=500)
+    parser.add_argument("--rules", type=int, default=300)
+    parser.add_argument("--patterns", type=int, default=20)
+    parser.add_argument("--findings", type=int, default=20000)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1337)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    policy = make_policy(rng, args.globs, args.rules, args.patterns)
+    findings = make_findings(rng, args.findings, args.files, args.globs, args.rules)
+
+    # reload() re-reads the policy file, so it must outlive the timings
+    with tempfile.TemporaryDirectory(prefix="bench-policy-") as tmp:
+        policy_path = os.path.join(tmp, "policy.json")
+        with open(policy_path, "w", encoding="utf-8") as fh:
+            json.dump(policy, fh)
+
+        compile_start = time.perf_counter()
+        engine = PolicyEngine(policy_path)
+        compile_seconds = time.perf_counter() - compile_start
+
+        print(f"policy: {args.globs} globs, {args.rules} rules, {args.patterns} patterns; "
+              f"findings: {args.findings} over {args.files} files")
+        print(f"compile: {compile_seconds * 1000:.2f} ms")
+
+        legacy_seconds, expected = timed(lambda: legacy_filter(policy, findings), 1)
+
+        def compiled_cold():
+            engine.reload()  # drops the per-path memo
+            return engine.filter_whitelisted(findings)
+
+        cold_seconds, cold = timed(compiled_cold, args.repeat)
+        warm_seconds, warm = timed(lambda: engine.filter_whitelisted(findings), args.repeat)
+
+        if cold != expected or warm != expected:
+            print("MISMATCH: compiled whitelist kept different findings than the legacy implementation")
+            sys.exit(1)
+
+        print(f"kept {len(expected)} of {len(findings)} findings (identical)")
+        print(f"{'legacy fnmatch':<22} {legacy_seconds * 1000:10.2f} ms")
+        print(f"{'compiled (cold memo)':<22} {cold_seconds * 1000:10.2f} ms   {legacy_seconds / cold_seconds:8.1f}x")
+        print(f"{'compiled (warm memo)':<22} {warm_seconds * 1000:10.2f} ms   {legacy_seconds / warm_seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
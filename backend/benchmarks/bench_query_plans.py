@@ -0,0 +1,118 @@
+"""
+Query-plan benchmark for the build/log access paths.
+
+Builds a seeded SQLite DB shaped like an old instance/pipeline.db (no
+indexes, no schema_migrations), prints EXPLAIN QUERY PLAN and timings for
+the hot queries, applies the versioned migrations and measures again.
+
+Usage (from backend/):
+    python benchmarks/bench_query_plans.py [--pipelines 200] [--builds 50000] [--logs-per-build 20]
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine
+
+from app import create_app
+from utils.migrations import apply_migrations
+
+QUERIES = {
+    "latest build of pipeline": ("SELECT * FROM build WHERE pipeline_id = ? ORDER BY id DESC LIMIT 1", "pipeline"),
+    "pipeline history (10)": ("SELECT * FROM build WHERE pipeline_id = ? ORDER BY id DESC LIMIT 10", "pipeline"),
+    "latest build per pipeline": ("SELECT pipeline_id, max(id) FROM build GROUP BY pipeline_id", None),
+    "status counts": ("SELECT pipeline_id, status, count(id) FROM build GROUP BY pipeline_id, status", None),
+    "recent builds (50)": ("SELECT * FROM build ORDER BY started_at DESC LIMIT 50", None),
+    "logs for build": ("SELECT * FROM build_log WHERE build_id = ? ORDER BY id ASC", "build"),
+    "logs for step": ("SELECT * FROM build_log WHERE build_id = ? AND step_index = ? ORDER BY id ASC", "step"),
+}
+
+
+def make_legacy_db(db_path, n_pipelines, n_builds, logs_per_build):
+    create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}"})
+
+    conn = sqlite3.connect(db_path)
+    # strip everything the migrations add, like a DB created before they existed
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='index' AND name LIKE 'ix_%'").fetchall():
+        conn.execute(f"DROP INDEX {name}")
+    conn.execute("DROP TABLE IF EXISTS schema_migrations")
+
+    rnd = random.Random(42)
+    conn.executemany(
+        "INSERT INTO pipeline (name, description, config_json) VALUES (?, '', '{}')",
+        [(f"pipeline-{i}",) for i in range(n_pipelines)],
+    )
+    conn.executemany(
+        "INSERT INTO build (pipeline_id, status, started_at, finished_at) VALUES (?, ?, datetime('now', ?), datetime('now'))",
+        [
+            (rnd.randint(1, n_pipelines), rnd.choice(["success", "failed", "running"]), f"-{i} seconds")
+            for i in range(n_builds)
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO build_log (build_id, step_index, text) VALUES (?, ?, ?)",
+        (
+            (b, s % 3, f"log line {s}")
+            for b in range(1, n_builds + 1)
+            for s in range(logs_per_build)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def params_for(kind, rnd, n_pipelines, n_builds):
+    if kind == "pipeline":
+        return (rnd.randint(1, n_pipelines),)
+    if kind == "build":
+        return (rnd.randint(1, n_builds),)
+    if kind == "step":
+        return (rnd.randint(1, n_builds), rnd.randint(0, 2))
+    return ()
+
+
+def run_queries(db_path, label, n_pipelines, n_builds, repeats=50):
+    conn = sqlite3.connect(db_path)
+    rnd = random.Random(7)
+    print(f"\n=== {label} ===")
+    timings = {}
+    for name, (sql, kind) in QUERIES.items():
+        plan = conn.execute("EXPLAIN QUERY PLAN " + sql, params_for(kind, rnd, n_pipelines, n_builds)).fetchall()
+        start = time.perf_counter()
+        for _ in range(repeats):
+            conn.execute(sql, params_for(kind, rnd, n_pipelines, n_builds)).fetchall()
+        avg_ms = (time.perf_counter() - start) * 1000 / repeats
+        timings[name] = avg_ms
+        print(f"{name:<28} {avg_ms:9.3f} ms   plan: {' | '.join(row[-1] for row in plan)}")
+    conn.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pipelines", type=int, default=200)
+    parser.add_argument("--builds", type=int, default=50000)
+    parser.add_argument("--logs-per-build", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "legacy_pipeline.db")
+        make_legacy_db(db_path, args.pipelines, args.builds, args.logs_per_build)
+
+        before = run_queries(db_path, "before migrations", args.pipelines, args.builds)
+        apply_migrations(create_engine(f"sqlite:///{db_path}"))
+        after = run_queries(db_path, "after migrations", args.pipelines, args.builds)
+
+    print("\n=== speedup ===")
+    for name in QUERIES:
+        print(f"{name:<28} {before[name] / max(after[name], 1e-9):8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
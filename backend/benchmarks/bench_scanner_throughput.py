@@ -0,0 +1,361 @@
+"""
+Throughput benchmark for the integrity scanner (ScannerEngine) and PyGuard.
+
+Generates deterministic synthetic repositories (seeded with files from
+ci-integrity/malicious_samples) in a few shapes:
+
+    small_py      many small Python modules spread over a few packages
+    giant_json    a handful of multi-MB JSON documents
+    minified_js   long single-line JavaScript bundles
+    deep_tree     deeply nested directories with a few files per level
+    ci_yaml       CI workflow and .gitlab-ci.yml files
+
+Each (target, shape) pair runs in its own process so peak RSS is per run.
+Results (files/s, MB/s, peak RSS, per-detector cost) are written as JSON;
+pass a previous results file with --compare to print the change.
+
+Usage (from backend/):
+    python benchmarks/bench_scanner_throughput.py [--shapes small_py,ci_yaml] [--scale 1.0]
+        [--seed 1337] [--targets scanner,pyguard] [--output results.json] [--compare old.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+import subprocess
+import multiprocessing as mp
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCANNER_ROOT = os.path.join(BACKEND_DIR, "cicd-integrity-monitor-main")
+PYGUARD_DIR = os.path.join(BACKEND_DIR, "ci-integrity")
+SAMPLES_DIR = os.path.join(PYGUARD_DIR, "malicious_samples")
+
+SHAPES = ("small_py", "giant_json", "minified_js", "deep_tree", "ci_yaml")
+TARGETS = ("scanner", "pyguard")
+
+# one in N generated files gets a malicious sample appended
+MALICIOUS_EVERY = 25
+
+
+# ---------------------------------------------------------------------------
+# Synthetic repositories
+# ---------------------------------------------------------------------------
+def load_samples():
+    samples = []
+    for root, dirs, files in os.walk(SAMPLES_DIR):
+        dirs[:] = [d for d in dirs if d != "__pycache__"]
+        for name in sorted(files):
+            with open(os.path.join(root, name), "r", encoding="utf-8", errors="ignore") as f:
+                samples.append((os.path.basename(root), name, f.read()))
+    return sorted(samples)
+
+
+def _python_module(rng, index):
+    funcs = []
+    for i in range(rng.randint(3, 8)):
+        funcs.append(
+            f"def handler_{index}_{i}(payload, retries={rng.randint(1, 5)}):\n"
+            f"    total = 0\n"
+            f"    for item in payload.get('items', []):\n"
+            f"        total += item * {rng.randint(2, 99)}\n"
+            f"    return {{'id': {index}, 'total': total, 'tag': '{rng.getrandbits(32):08x}'}}\n"
+        )
+    return "import json\nimport logging\n\nlog = logging.getLogger(__name__)\n\n\n" + "\n\n".join(funcs)
+
+
+def _json_document(rng, size_bytes):
+    items, size = [], 0
+    while size < size_bytes:
+        item = {
+            "id": len(items),
+            "name": f"component-{rng.getrandbits(24):06x}",
+            "version": f"{rng.randint(0, 9)}.{rng.randint(0, 30)}.{rng.randint(0, 99)}",
+            "checksum": f"{rng.getrandbits(128):032x}",
+            "tags": [f"t{rng.randint(0, 50)}" for _ in range(4)],
+        }
+        items.append(item)
+        size += 160
+    return json.dumps({"components": items}, indent=1)
+
+
+def _minified_js(rng, size_bytes):
+    parts, size = [], 0
+    while size < size_bytes:
+        a, b = rng.getrandbits(16), rng.getrandbits(16)
+        part = f"function _{a:x}(e,t){{return e&&t?e[{b % 97}]^t.charCodeAt({a % 31}):\"{rng.getrandbits(64):016x}\"}}"
+        parts.append(part)
+        size += len(part)
+    return ";".join(parts)
+
+
+def _workflow_yaml(rng, index):
+    steps = "\n".join(
+        f"      - name: step-{i}\n        run: make target-{rng.randint(0, 40)} JOBS={rng.randint(1, 16)}"
+        for i in range(rng.randint(3, 10))
+    )
+    return (
+        f"name: build-{index}\n"
+        "on: [push, pull_request]\n"
+        "jobs:\n"
+        "  build:\n"
+        "    runs-on: ubuntu-latest\n"
+        "    steps:\n"
+        "      - uses: actions/checkout@v4\n"
+        f"{steps}\n"
+    )
+
+
+def generate_repo(root, shape, scale, seed, samples):
+    """Write the synthetic repository; returns the number of files written."""
+    rng = random.Random(f"{seed}:{shape}")
+    written = 0
+
+    def write(rel_path, content):
+        nonlocal written
+        if samples and written % MALICIOUS_EVERY == MALICIOUS_EVERY - 1:
+            category, _, sample = samples[rng.randrange(len(samples))]
+            content = f"{content}\n# seeded sample: {category}\n{sample}"
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        written += 1
+
+    if shape == "small_py":
+        for i in range(int(2000 * scale)):
+            write(os.path.join(f"pkg_{i % 20}", f"module_{i}.py"), _python_module(rng, i))
+    elif shape == "giant_json":
+        for i in range(max(1, int(3 * scale))):
+            write(os.path.join("data", f"dump_{i}.json"), _json_document(rng, 4 * 1024 * 1024))
+    elif shape == "minified_js":
+        for i in range(int(30 * scale)):
+            write(os.path.join("static", "js", f"bundle_{i}.min.js"), _minified_js(rng, 300 * 1024))
+    elif shape == "deep_tree":
+        depth = max(1, int(60 * scale))
+        path = ""
+        for level in range(depth):
+            path = os.path.join(path, f"level_{level}")
+            for i in range(5):
+                write(os.path.join(path, f"file_{i}.py"), _python_module(rng, level * 5 + i))
+    elif shape == "ci_yaml":
+        for i in range(int(300 * scale)):
+            write(os.path.join("ci", f"svc_{i % 30}", f"pipeline_{i}.yml"), _workflow_yaml(rng, i))
+            if i % 10 == 0:
+                write(os.path.join("ci", f"svc_{i % 30}", f"job_{i}", ".gitlab-ci.yml"), _workflow_yaml(rng, i))
+    else:
+        raise ValueError(f"unknown shape {shape}")
+    return written
+
+
+# ---------------------------------------------------------------------------
+# Measurements (run in a child process)
+# ---------------------------------------------------------------------------
+def peak_rss_mb():
+    # VmHWM starts over at exec; ru_maxrss would include the parent's peak on Linux
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        try:
+            import psutil
+            info = psutil.Process().memory_info()
+            return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+        except ImportError:
+            return None
+
+
+def bench_scanner(repo):
+    sys.path.insert(0, SCANNER_ROOT)
+    # detectors load rules/ relative to the working directory
+    os.chdir(SCANNER_ROOT)
+    from scanner.scanner.engine import ScannerEngine
+
+    engine = ScannerEngine(policy_path=os.path.join(SCANNER_ROOT, "policies", "default_policy.json"))
+    engine.alerts.send_alert = lambda report: None  # no network in benchmarks
+
+    start = time.perf_counter()
+    report = engine.scan_path(repo)
+    seconds = time.perf_counter() - start
+
+    profile = report["meta"]["profile"]
+    return {
+        "files": profile["files_scanned"],
+        "bytes": profile["bytes_read"],
+        "seconds": seconds,
+        "findings": len(report["findings"]),
+        "detectors": {name: d["seconds"] for name, d in profile["detectors"].items()},
+        "git_subprocess_seconds": profile["git_subprocess"]["seconds"],
+        "skipped_paths": profile["skipped"],
+    }
+
+
+def bench_pyguard(repo):
+    sys.path.insert(0, PYGUARD_DIR)
+    os.chdir(PYGUARD_DIR)
+    try:
+        import pyguard_embedding as pg
+    except ImportError as e:
+        return {"skipped": f"PyGuard dependencies missing: {e}"}
+
+    start = time.perf_counter()
+    model = pg.SentenceTransformer(pg.MODEL_NAME)
+    model_load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if os.path.exists(pg.EMBEDDINGS_FILE):
+        db = pg.load_embeddings()
+    else:
+        # no trained DB on this machine: embed the samples the same way train_embeddings.py does
+        from train_embeddings import gather_samples_by_category
+        samples, _ = gather_samples_by_category("malicious_samples")
+        vectors = model.encode([s["text"] for s in samples], convert_to_numpy=True)
+        db = [{"category": s["category"], "path": s["path"], "text_snippet": s["text"][:1200], "embedding": v}
+              for s, v in zip(samples, vectors)]
+    db_load = time.perf_counter() - start
+
+    files = total_bytes = 0
+    scan_seconds = 0.0
+    for root, dirs, names in os.walk(repo):
+        dirs[:] = [d for d in dirs if d.lower() not in pg.IGNORE_FOLDERS]
+        for name in names:
+            path = os.path.join(root, name)
+            if not path.endswith(pg.SCAN_FILE_TYPES):
+                continue
+            t0 = time.perf_counter()
+            pg.scan_file(model, path, db)
+            scan_seconds += time.perf_counter() - t0
+            files += 1
+            total_bytes += os.path.getsize(path)
+
+    return {
+        "files": files,
+        "bytes": total_bytes,
+        "seconds": scan_seconds,
+        "detectors": {"model_load": model_load, "embedding_db": db_load, "embed_and_match": scan_seconds},
+    }
+
+
+def run_one(target, repo, out):
+    try:
+        result = bench_scanner(repo) if target == "scanner" else bench_pyguard(repo)
+    except Exception as e:
+        result = {"error": repr(e)}
+    result["peak_rss_mb"] = peak_rss_mb()
+    out.put(result)
+
+
+def measure(target, repo):
+    out = mp.Queue()
+    proc = mp.Process(target=run_one, args=(target, repo, out))
+    proc.start()
+    result = out.get()
+    proc.join()
+    if "files" in result and result["seconds"]:
+        result["files_per_sec"] = round(result["files"] / result["seconds"], 2)
+        result["mb_per_sec"] = round(result["bytes"] / 1e6 / result["seconds"], 3)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "-C", BACKEND_DIR, "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def print_result(target, shape, r):
+    if "skipped" in r or "error" in r:
+        print(f"{target:<8} {shape:<12} {r.get('skipped') or r.get('error')}")
+        return
+    top = sorted(r["detectors"].items(), key=lambda kv: -kv[1])[:3]
+    print(
+        f"{target:<8} {shape:<12} files={r['files']:<6} {r['files_per_sec']:>9.1f} files/s "
+        f"{r['mb_per_sec']:>8.2f} MB/s  rss={r['peak_rss_mb']} MB  "
+        + "  ".join(f"{name}={seconds:.2f}s" for name, seconds in top)
+    )
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["target"], r["shape"]): r for r in json.load(f)["results"]}
+    print(f"\nChange vs {baseline_path} (files/s, peak RSS):")
+    for r in results:
+        old = baseline.get((r["target"], r["shape"]))
+        if not old or "files_per_sec" not in old or "files_per_sec" not in r:
+            continue
+        speed = (r["files_per_sec"] / old["files_per_sec"] - 1) * 100
+        rss = ""
+        if r.get("peak_rss_mb") and old.get("peak_rss_mb"):
+            rss = f"{(r['peak_rss_mb'] / old['peak_rss_mb'] - 1) * 100:+.1f}%"
+        print(f"  {r['target']:<8} {r['shape']:<12} {speed:+7.1f}%  {rss}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shapes", default=",".join(SHAPES))
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies file counts")
+    parser.add_argument("--seed", type=int, default=1337)
+    parser.add_argument("--output", help="results JSON (default: benchmarks/results/scanner-<commit>.json)")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    args = parser.parse_args()
+
+    shapes = [s for s in args.shapes.split(",") if s]
+    targets = [t for t in args.targets.split(",") if t]
+    samples = load_samples()
+    commit = git_commit()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_repo_") as tmp:
+        for shape in shapes:
+            repo = os.path.join(tmp, shape)
+            files = generate_repo(repo, shape, args.scale, args.seed, samples)
+            print(f"[bench] {shape}: generated {files} files")
+            for target in targets:
+                r = measure(target, repo)
+                print_result(target, shape, r)
+                results.append({"target": target, "shape": shape, "generated_files": files, **r})
+
+    output = args.output or os.path.join(os.path.dirname(__file__), "results", f"scanner-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                "commit": commit,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "seed": args.seed,
+                "scale": args.scale,
+            },
+            "results": results,
+        }, f, indent=2)
+    print(f"[bench] results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    mp.set_start_method("spawn")
+    main()
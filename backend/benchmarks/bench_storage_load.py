@@ -0,0 +1,144 @@
+"""
+Mixed read/write load benchmark for the SQLite storage settings.
+
+Writer processes append BuildLog rows in batches of 15 (like the build
+runner) while reader processes run the dashboard queries. The same load is
+run with the old rollback journal and with the WAL settings from
+utils/storage.py; throughput, latency percentiles and lock errors are
+printed for both.
+
+Usage (from backend/):
+    python benchmarks/bench_storage_load.py [--writers 4] [--readers 8] [--seconds 10]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing as mp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+MODES = {
+    "rollback journal": {"SQLITE_JOURNAL_MODE": "DELETE", "SQLITE_SYNCHRONOUS": "FULL", "SQLITE_BUSY_TIMEOUT_MS": 5000},
+    "WAL (defaults)": {},
+}
+
+READ_SQL = [
+    "SELECT pipeline.id, pipeline.name, pipeline_stats.last_status FROM pipeline "
+    "LEFT OUTER JOIN pipeline_stats ON pipeline_stats.pipeline_id = pipeline.id",
+    "SELECT id, timestamp, text FROM build_log ORDER BY id DESC LIMIT 5",
+]
+
+
+def _engine(url, config):
+    from sqlalchemy import create_engine
+    from utils.storage import engine_options, install_sqlite_pragmas
+
+    engine = create_engine(url, **engine_options(url, config))
+    install_sqlite_pragmas(engine, config)
+    return engine
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def writer(url, config, seconds, build_id, out):
+    from sqlalchemy import text
+
+    engine = _engine(url, config)
+    latencies, errors, rows = [], 0, 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                conn.execute(
+                    text("INSERT INTO build_log (build_id, step_index, timestamp, text) "
+                         "VALUES (:b, 0, CURRENT_TIMESTAMP, :t)"),
+                    [{"b": build_id, "t": f"line {rows + i}"} for i in range(15)],
+                )
+            rows += 15
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    out.put(("write", latencies, errors, rows))
+
+
+def reader(url, config, seconds, out):
+    from sqlalchemy import text
+
+    engine = _engine(url, config)
+    latencies, errors = [], 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                for sql in READ_SQL:
+                    conn.execute(text(sql)).fetchall()
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    out.put(("read", latencies, errors, 0))
+
+
+def run_mode(label, config, args, tmp):
+    from app import create_app
+
+    db_path = os.path.join(tmp, f"load_{len(os.listdir(tmp))}.db")
+    url = f"sqlite:///{db_path}"
+    app = create_app({"SQLALCHEMY_DATABASE_URI": url, **config})
+    with app.app_context():
+        from models import db, Pipeline, Build
+        for i in range(args.writers):
+            p = Pipeline(name=f"load-{i}", config_json="{}")
+            db.session.add(p)
+            db.session.flush()
+            db.session.add(Build(pipeline_id=p.id, status="running"))
+        db.session.commit()
+        db.engine.dispose()
+
+    out = mp.Queue()
+    procs = [mp.Process(target=writer, args=(url, config, args.seconds, i + 1, out)) for i in range(args.writers)]
+    procs += [mp.Process(target=reader, args=(url, config, args.seconds, out)) for _ in range(args.readers)]
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    summary = {}
+    for kind in ("write", "read"):
+        lat = [x for k, l, _, _ in results if k == kind for x in l]
+        errors = sum(e for k, _, e, _ in results if k == kind)
+        rows = sum(r for k, _, _, r in results if k == kind)
+        summary[kind] = (lat, errors, rows)
+        print(
+            f"{label:<18} {kind:<5} ops/s={len(lat) / args.seconds:8.1f}  "
+            f"p50={_percentile(lat, 50) * 1000:7.2f} ms  p95={_percentile(lat, 95) * 1000:7.2f} ms  "
+            f"p99={_percentile(lat, 99) * 1000:7.2f} ms  errors={errors}"
+            + (f"  rows={rows}" if kind == "write" else "")
+        )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, config in MODES.items():
+            run_mode(label, config, args, tmp)
+
+
+if __name__ == "__main__":
+    mp.set_start_method("spawn")
+    main()
@@ -1,6 +1,10 @@
 import os
+import gzip
+import html
 import json
+import base64
 import pickle
+import shutil
 import sys
 from datetime import datetime
 from sentence_transformers import SentenceTransformer
@@ -12,13 +16,20 @@ sys.stdout.reconfigure(encoding='utf-8')
 from utils.file_reader import read_file_text
 from utils.similarity import cosine_sim
 
+# SARIF output, the lazy report's list script and history pruning come from
+# the integrity scanner package next to this directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cicd-integrity-monitor-main"))
+from scanner.scanner.html_report import LAZY_LIST_JS
+from scanner.scanner.report_writer import prune_history
+from scanner.scanner.sarif import SarifWriter
+
 
 # =========================
 # CONFIG
 # =========================
 
 EMBEDDINGS_FILE = r"D:\ai-cicd-security-tool\backend\ci-integrity\embeddings\malicious.pkl"
-REPORT_DIR = "reports"
+REPORT_DIR = os.environ.get("PYGUARD_REPORT_DIR", "reports")
 MODEL_NAME = "all-MiniLM-L6-v2"
 
 # Risk thresholds
@@ -32,6 +43,13 @@ IGNORE_FOLDERS = [
     ".idea", ".vscode", "dist", "build", "migrations"
 ]
 
+# Findings above which the HTML report embeds compressed data rendered in the browser
+LAZY_HTML_THRESHOLD = 500
+
+# Characters per embedded chunk and overlap between neighbouring chunks
+CHUNK_SIZE = 1500
+CHUNK_OVERLAP = 200
+
 # File extensions to scan
 SCAN_FILE_TYPES = (
     ".py", ".js", ".sh", ".yml", ".yaml",
@@ -71,7 +89,7 @@ def threat_score(score):
 # FILE CHUNKING
 # =========================
 
-def chunk_text(text, size=1500, overlap=200):
+def chunk_text(text, size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
     """Split large files into overlapping chunks for better accuracy."""
     chunks = []
     start = 0
@@ -102,22 +120,30 @@ def scan_chunk(model, chunk, db):
 
 
 def scan_file(model, filepath, db):
-    """Return highest score from ALL chunks of the file."""
+    """
+    Return the highest score from ALL chunks of the file, the matching DB
+    entry and the (first, last) line of the best chunk.
+    """
     text = read_file_text(filepath)
     if not text.strip():
-        return None, None
+        return None, None, None
 
     chunks = chunk_text(text)
     best_score = 0
     best_entry = None
+    best_index = 0
 
-    for ch in chunks:
+    for i, ch in enumerate(chunks):
         score, entry = scan_chunk(model, ch, db)
         if score > best_score:
             best_score = score
             best_entry = entry
+            best_index = i
 
-    return best_score, best_entry
+    start = best_index * (CHUNK_SIZE - CHUNK_OVERLAP)
+    first_line = text.count("\n", 0, start) + 1
+    last_line = first_line + chunks[best_index].rstrip("\n").count("\n")
+    return best_score, best_entry, (first_line, last_line)
 
 
 def scan_repo(repo_path, fail_on_high=False):
@@ -133,34 +159,44 @@ def scan_repo(repo_path, fail_on_high=False):
     findings = []
     total_files = 0
 
-    for root, dirs, files in os.walk(repo_path):
-        dirs[:] = [d for d in dirs if d.lower() not in IGNORE_FOLDERS]
-
-        for f in files:
-            fp = os.path.join(root, f)
-
-            if not fp.endswith(SCAN_FILE_TYPES):
-                continue
-
-            total_files += 1
-            score, entry = scan_file(model, fp, db)
-            if score is None or score < THRESHOLD_LOW:
-                continue
-
-            risk = classify_risk(score)
-            tscore = threat_score(score)
-
-            print(f"[alert] {fp} -> {risk} ({tscore}%)")
-
-            findings.append({
-                "file": fp,
-                "score": float(score),
-                "threat_percent": tscore,
-                "risk": risk,
-                "category": entry["category"],
-                "matched_sample": entry["path"],
-                "snippet": entry["text_snippet"][:300]
-            })
+    # the SARIF log is written as findings come in
+    sarif = EmbeddingSarifWriter(os.path.join(REPORT_DIR, "embedding_report.sarif"), repo_path).start()
+    try:
+        for root, dirs, files in os.walk(repo_path):
+            dirs[:] = [d for d in dirs if d.lower() not in IGNORE_FOLDERS]
+
+            for f in files:
+                fp = os.path.join(root, f)
+
+                if not fp.endswith(SCAN_FILE_TYPES):
+                    continue
+
+                total_files += 1
+                score, entry, lines = scan_file(model, fp, db)
+                if score is None or score < THRESHOLD_LOW:
+                    continue
+
+                risk = classify_risk(score)
+                tscore = threat_score(score)
+
+                print(f"[alert] {fp} -> {risk} ({tscore}%)")
+
+                finding = {
+                    "file": fp,
+                    "score": float(score),
+                    "threat_percent": tscore,
+                    "risk": risk,
+                    "category": entry["category"],
+                    "matched_sample": entry["path"],
+                    "snippet": entry["text_snippet"][:300],
+                    "line": lines[0],
+                    "end_line": lines[1],
+                }
+                findings.append(finding)
+                sarif.add(finding)
+    except BaseException:
+        sarif.abort()
+        raise
 
     # Build summary
     summary = {
@@ -172,7 +208,9 @@ def scan_repo(repo_path, fail_on_high=False):
         "details": findings
     }
 
-    # Save reports
+    # Save reports (timestamped history + embedding_report.* as the latest)
+    # microseconds keep two runs finishing in the same second from sharing history files
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
     json_report = os.path.join(REPORT_DIR, "embedding_report.json")
     with open(json_report, "w", encoding="utf-8") as jf:
         json.dump(summary, jf, indent=4)
@@ -181,8 +219,25 @@ def scan_repo(repo_path, fail_on_high=False):
     with open(html_report, "w", encoding="utf-8") as hf:
         hf.write(generate_html(summary))
 
+    sarif_report = sarif.close(summary)
+
+    hist_json = os.path.join(REPORT_DIR, f"embedding_report_{stamp}.json")
+    hist_html = os.path.join(REPORT_DIR, f"embedding_report_{stamp}.html")
+    hist_sarif = os.path.join(REPORT_DIR, f"embedding_report_{stamp}.sarif")
+    shutil.copyfile(json_report, hist_json)
+    shutil.copyfile(html_report, hist_html)
+    shutil.copyfile(sarif_report, hist_sarif)
+    catalog_summary = report_summary(summary)
+    register_report(hist_json, "JSON", catalog_summary)
+    register_report(hist_html, "HTML", catalog_summary)
+    register_report(hist_sarif, "SARIF", catalog_summary)
+    if not os.environ.get("REPORT_CATALOG_URL"):
+        # the catalog prunes its own entries; otherwise keep the directory bounded here
+        prune_history(REPORT_DIR, "embedding_report")
+
     print(f"\n[pyguard] JSON report: {json_report}")
     print(f"[pyguard] HTML report: {html_report}")
+    print(f"[pyguard] SARIF report: {sarif_report}")
 
     # Auto-fail if high risk
     if fail_on_high and summary["overall_risk"] == "HIGH":
@@ -192,22 +247,119 @@ def scan_repo(repo_path, fail_on_high=False):
     return summary
 
 
+# =========================
+# REPORT CATALOG
+# =========================
+
+def report_summary(summary):
+    risk_counts = {}
+    for f in summary.get("details", []):
+        risk_counts[f["risk"]] = risk_counts.get(f["risk"], 0) + 1
+    return {
+        "files_scanned": summary["files_scanned"],
+        "findings": summary["findings"],
+        "overall_risk": summary["overall_risk"],
+        "risk_counts": risk_counts,
+    }
+
+
+def register_report(path, fmt, summary):
+    """Record a written report in the PipelineX catalog (REPORT_CATALOG_URL, set by the build runner)."""
+    api = os.environ.get("REPORT_CATALOG_URL")
+    if not api:
+        return
+
+    build_id = os.environ.get("PIPELINEX_BUILD_ID")
+    payload = {
+        "scanner": "pyguard",
+        "path": os.path.abspath(path),
+        "format": fmt,
+        "build_id": int(build_id) if build_id and build_id.isdigit() else None,
+        "summary": summary,
+    }
+    try:
+        import requests
+        requests.post(api, json=payload, timeout=5)
+    except Exception as e:
+        print(f"[pyguard] Failed to register report in catalog: {e}")
+
+
+# =========================
+# SARIF REPORT
+# =========================
+
+SARIF_LEVELS = {"HIGH": "error", "MEDIUM": "warning", "LOW": "note"}
+
+
+class EmbeddingSarifWriter(SarifWriter):
+    """
+    The scanner's streaming SARIF writer for PyGuard findings: each threat
+    category is one rule, the risk gives the level and the region is the
+    file span of the best-matching chunk.
+    """
+
+    tool_name = "pyguard"
+
+    def rule_id(self, f):
+        return f"pyguard/{f['category']}"
+
+    def make_rule(self, rule_id, f):
+        category = f["category"]
+        return {
+            "id": rule_id,
+            "name": category,
+            "shortDescription": {"text": f"Code similar to known malicious samples ({category})"},
+            "messageStrings": {"default": {"text": f"File content matches a known malicious {category} sample"}},
+        }
+
+    def level(self, f):
+        return SARIF_LEVELS.get(f["risk"], "note")
+
+    def message(self, f, rule):
+        return {"id": "default"}
+
+    def region(self, f):
+        return {"startLine": f["line"], "endLine": f["end_line"]}
+
+    def result_properties(self, f, rule):
+        return {
+            "threat_percent": f["threat_percent"],
+            "risk": f["risk"],
+            "matched_sample": f["matched_sample"],
+        }
+
+    def run_properties(self, summary):
+        return {"files_scanned": summary["files_scanned"], "overall_risk": summary["overall_risk"]}
+
+
 # =========================
 # HTML REPORT (VigilantX Style)
 # =========================
 
-def generate_html(data):
-    """Generate a VigilantX-styled HTML report with charts and dark UI."""
+def generate_html(data, lazy=None):
+    """
+    Generate a VigilantX-styled HTML report with charts and dark UI.
+
+    Large reports (``lazy``, default: more than LAZY_HTML_THRESHOLD findings)
+    embed the findings as gzip+base64 JSON rendered client-side with virtual
+    scrolling, grouping and search instead of one card per finding.
+    """
+    details = data.get("details", [])
+    if lazy is None:
+        lazy = len(details) > LAZY_HTML_THRESHOLD
     risk_counts = {"CRITICAL": 0, "HIGH": 0, "MEDIUM": 0, "LOW": 0}
     categories = {}
 
-    for f in data.get("details", []):
+    for f in details:
         risk = f.get("risk", "LOW").upper()
         risk_counts[risk] = risk_counts.get(risk, 0) + 1
         cat = f.get("category", "Unknown")
         categories[cat] = categories.get(cat, 0) + 1
 
-    html = f"""
+    # category names come from scanned data; keep them from closing the <script>
+    category_labels = json.dumps(list(categories.keys())).replace("<", "\\u003c")
+
+    parts = [f"""
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -309,8 +461,8 @@ def generate_html(data):
             <div class="summary">
                 <div class="card">
                     <h2>🧾 Summary</h2>
-                    <p><b>Timestamp:</b> {data["timestamp"]}</p>
-                    <p><b>Repository:</b> {data["repository"]}</p>
+                    <p><b>Timestamp:</b> {html.escape(str(data["timestamp"]))}</p>
+                    <p><b>Repository:</b> {html.escape(str(data["repository"]))}</p>
                     <p><b>Files Scanned:</b> {data["files_scanned"]}</p>
                     <p><b>Findings:</b> {data["findings"]}</p>
                     <p><b>Overall Risk:</b> <span class="risk {data["overall_risk"]}">{data["overall_risk"]}</span></p>
@@ -329,21 +481,15 @@ def generate_html(data):
 
             <div class="details">
                 <h2 style="color:#64ffda;">🧠 Detailed Findings</h2>
-    """
+    """]
 
-    for f in data["details"]:
-        html += f"""
-        <div class="finding">
-            <h3><span class="risk {f["risk"]}">{f["risk"]}</span> — {f["file"].split(os.sep)[-1]}</h3>
-            <p><b>Category:</b> {f["category"]}</p>
-            <p><b>Threat %:</b> {f["threat_percent"]}%</p>
-            <p><b>Matched Sample:</b> {f["matched_sample"]}</p>
-            <p><b>File Path:</b> <small>{f["file"]}</small></p>
-            <code>{f["snippet"]}</code>
-        </div>
-        """
+    # one list joined at the end keeps generation linear in the number of findings
+    if lazy:
+        parts.append(lazy_findings_html(details))
+    else:
+        parts.extend(finding_card_html(f) for f in details)
 
-    html += f"""
+    parts.append(f"""
             </div>
         </div>
 
@@ -376,10 +522,10 @@ def generate_html(data):
         new Chart(ctx2, {{
             type: 'bar',
             data: {{
-                labels: {list(categories.keys())},
+                labels: {category_labels},
                 datasets: [{{
                     label: 'Threat Count',
-                    data: {list(categories.values())},
+                    data: {json.dumps(list(categories.values()))},
                     backgroundColor: '#64ffda'
                 }}]
             }},
@@ -396,8 +542,114 @@ def generate_html(data):
         </script>
     </body>
     </html>
-    """
-    return html
+    """)
+    return "".join(parts)
+
+
+def finding_card_html(f):
+    esc = lambda value: html.escape(str(value))
+    return f"""
+        <div class="finding">
+            <h3><span class="risk {esc(f["risk"])}">{esc(f["risk"])}</span> — {esc(f["file"].split(os.sep)[-1])}</h3>
+            <p><b>Category:</b> {esc(f["category"])}</p>
+            <p><b>Threat %:</b> {esc(f["threat_percent"])}%</p>
+            <p><b>Matched Sample:</b> {esc(f["matched_sample"])}</p>
+            <p><b>File Path:</b> <small>{esc(f["file"])}</small></p>
+            <code>{esc(f["snippet"])}</code>
+        </div>
+        """
+
+
+LAZY_FIELDS = ("risk", "file", "category", "threat_percent", "matched_sample", "snippet")
+
+
+def lazy_findings_html(details):
+    rows = [[f.get(k) for k in LAZY_FIELDS] for f in details]
+    payload = json.dumps({"fields": LAZY_FIELDS, "rows": rows}, separators=(",", ":"), default=str)
+    encoded = base64.b64encode(gzip.compress(payload.encode("utf-8"), compresslevel=9, mtime=0)).decode("ascii")
+    return (
+        LAZY_FINDINGS_HTML
+        + f'<script id="findings-data" type="application/json" data-encoding="gzip+base64">{encoded}</script>'
+        + LAZY_FINDINGS_SCRIPT
+    )
+
+
+LAZY_FINDINGS_HTML = """
+        <div class="toolbar">
+            <input id="search" placeholder="Search file, category, sample or snippet" autocomplete="off"/>
+            <select id="group">
+                <option value="">No grouping</option>
+                <option value="file">Group by file</option>
+                <option value="category">Group by category</option>
+                <option value="risk">Group by risk</option>
+            </select>
+            <span id="count"></span>
+        </div>
+        <div id="viewport"><div id="spacer"></div></div>
+        <div class="finding" id="detail" style="display:none"></div>
+        <style>
+            .toolbar { display: flex; gap: 10px; align-items: center; margin-bottom: 10px; }
+            .toolbar input, .toolbar select { background: #112240; color: #ccd6f6; border: 1px solid #233554;
+                border-radius: 8px; padding: 8px; }
+            .toolbar input { flex: 1; }
+            #count { color: #8892b0; font-size: 13px; }
+            #viewport { position: relative; height: 70vh; overflow-y: auto; background: #112240;
+                border: 1px solid #233554; border-radius: 10px; }
+            #spacer { position: relative; }
+            .row { position: absolute; left: 0; right: 0; height: 34px; line-height: 34px; padding: 0 12px;
+                box-sizing: border-box; white-space: nowrap; overflow: hidden; text-overflow: ellipsis;
+                border-bottom: 1px solid #233554; cursor: pointer; font-size: 14px; }
+            .row:hover { background: #0b1b30; }
+            .row.group { color: #64ffda; font-weight: bold; background: #0b1b30; }
+            .row small { color: #8892b0; }
+            #detail { margin-top: 15px; }
+        </style>
+"""
+
+
+LAZY_FINDINGS_SCRIPT = """
+        <script>
+""" + LAZY_LIST_JS + """
+        (async function () {
+            const el = (id) => document.getElementById(id);
+            const data = await readFindings(el("findings-data"));
+            const col = Object.fromEntries(data.fields.map((f, i) => [f, i]));
+            const rows = data.rows;
+
+            lazyList({
+                count: rows.length,
+                rowHeight: 34,
+                text: (i) => [rows[i][col.file], rows[i][col.category], rows[i][col.matched_sample], rows[i][col.snippet]].join(" "),
+                value: (i, key) => rows[i][col[key]],
+                renderRow(node, i) {
+                    const r = rows[i];
+                    const risk = document.createElement("span");
+                    risk.className = "risk " + r[col.risk];
+                    risk.textContent = r[col.risk];
+                    const path = document.createElement("small");
+                    path.textContent = "  " + r[col.file];
+                    node.append(risk, " " + r[col.category] + " — " + r[col.threat_percent] + "%", path);
+                },
+                showDetail(i) {
+                    const r = rows[i];
+                    const d = el("detail");
+                    d.textContent = "";
+                    for (const f of ["risk", "category", "threat_percent", "matched_sample", "file"]) {
+                        const p = document.createElement("p");
+                        const b = document.createElement("b");
+                        b.textContent = f + ": ";
+                        p.append(b, String(r[col[f]]));
+                        d.appendChild(p);
+                    }
+                    const code = document.createElement("code");
+                    code.textContent = r[col.snippet];
+                    d.appendChild(code);
+                    d.style.display = "block";
+                },
+            });
+        })();
+        </script>
+"""
 
 
 # =========================
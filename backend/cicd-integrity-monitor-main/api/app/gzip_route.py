@@ -0,0 +1,39 @@
+import os
+import zlib
+from typing import Callable
+
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+# Largest request body accepted after decompression (guards against gzip bombs)
+MAX_UPLOAD_BYTES = int(os.getenv("INTEGRITY_MAX_UPLOAD_BYTES", 256 * 1024 * 1024))
+
+
+class GzipRequest(Request):
+    """Request whose body is transparently gunzipped when sent with Content-Encoding: gzip."""
+
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            if "gzip" in self.headers.getlist("Content-Encoding"):
+                inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                try:
+                    body = inflater.decompress(body, MAX_UPLOAD_BYTES + 1)
+                except zlib.error:
+                    raise HTTPException(status_code=400, detail="Invalid gzip request body")
+                if len(body) > MAX_UPLOAD_BYTES or inflater.unconsumed_tail:
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            self._body = body
+        return self._body
+
+
+class GzipRoute(APIRoute):
+    """Route class for routers that accept gzip-compressed JSON bodies (scanner uploads)."""
+
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+
+        async def custom_route_handler(request: Request) -> Response:
+            return await original_route_handler(GzipRequest(request.scope, request.receive))
+
+        return custom_route_handler
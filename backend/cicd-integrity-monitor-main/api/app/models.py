@@ -21,3 +21,42 @@ class Incident(Base):
 
     # FIX: "metadata" is RESERVED — renamed to extra_metadata
     extra_metadata = Column(JSON, nullable=True)
+
+
+class UploadSession(Base):
+    """
+    One report upload. Keyed by the client's idempotency key so a retried or
+    duplicated upload maps to the same incident; chunked uploads keep their
+    findings in upload_chunks until complete.
+    """
+    __tablename__ = "upload_sessions"
+
+    id = Column(String, primary_key=True)
+    idempotency_key = Column(String, unique=True, index=True, nullable=False)
+    # unfinished sessions older than UPLOAD_SESSION_TTL are dropped with their chunks
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+
+    # incident fields sent when the session was opened (meta, score, action)
+    header = Column(JSON, nullable=False)
+    # announced on complete, when the client has read all of its findings
+    chunks_total = Column(Integer, nullable=False, default=0)
+
+    # set once the incident has been created
+    incident_id = Column(Integer, nullable=True)
+
+
+class UploadChunk(Base):
+    __tablename__ = "upload_chunks"
+
+    upload_id = Column(String, primary_key=True)
+    index = Column(Integer, primary_key=True)
+    findings = Column(JSON, nullable=False)
+
+
+class UploadHtmlChunk(Base):
+    """A slice of the HTML report, uploaded separately from the findings."""
+    __tablename__ = "upload_html_chunks"
+
+    upload_id = Column(String, primary_key=True)
+    index = Column(Integer, primary_key=True)
+    html = Column(Text, nullable=False)
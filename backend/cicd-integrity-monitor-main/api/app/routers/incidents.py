@@ -1,12 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+import datetime
+import os
+import uuid
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Header
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi.responses import HTMLResponse
 
-from api.app.schemas import IncidentCreate, IncidentOut
+from api.app.schemas import (
+    IncidentCreate, IncidentOut, UploadChunkIn, UploadComplete, UploadHtmlChunkIn, UploadOpen, UploadStatus,
+)
 from api.app.db import SessionLocal
+from api.app.gzip_route import GzipRoute
 from api.app import models
 
-router = APIRouter()
+# scanner uploads may send gzip-compressed bodies
+router = APIRouter(route_class=GzipRoute)
+
+# Most finding (or HTML) chunks a single upload session may have
+MAX_UPLOAD_CHUNKS = 10000
+
+# Unfinished upload sessions (and their chunks) are dropped after this long
+UPLOAD_SESSION_TTL = datetime.timedelta(seconds=int(os.getenv("INTEGRITY_UPLOAD_TTL", 24 * 3600)))
 
 
 # ------------------------
@@ -24,21 +39,90 @@ def get_db():
 # Create Incident (CI upload)
 # ------------------------
 @router.post("/", response_model=IncidentOut)
-def create_incident(payload: IncidentCreate, db: Session = Depends(get_db)):
-
-    inc = models.Incident(
-        scanned_path=payload.meta.get("path") if payload.meta else None,
+def create_incident(
+    payload: IncidentCreate,
+    db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(None),
+):
+    fields = dict(
+        meta=payload.meta,
         score=payload.score,
         action=payload.action,
         findings=[f.dict() if hasattr(f, "dict") else f for f in payload.findings],
         report_html=payload.report_html,
-        extra_metadata=payload.meta
     )
 
+    existing = _session_by_key(db, idempotency_key) if idempotency_key else None
+    if existing is None:
+        inc = _add_incident(db, **fields)
+        if not idempotency_key:
+            db.commit()
+            db.refresh(inc)
+            return _incident_out(inc)
+
+        db.flush()
+        db.add(models.UploadSession(
+            id=uuid.uuid4().hex,
+            idempotency_key=idempotency_key,
+            header={},
+            chunks_total=0,
+            incident_id=inc.id,
+        ))
+        try:
+            db.commit()
+            db.refresh(inc)
+            return _incident_out(inc)
+        except IntegrityError:
+            # lost a race with the same key
+            db.rollback()
+            existing = _session_by_key(db, idempotency_key)
+
+    # a retried or duplicated upload returns the first incident; an unfinished
+    # chunked session for the same report is completed by this upload
+    if existing.incident_id is None:
+        inc = _add_incident(db, **fields)
+        if _claim_session(db, existing.id, inc):
+            db.refresh(inc)
+            return _incident_out(inc)
+        db.refresh(existing)
+    return _incident_out(_get_incident_row(db, existing.incident_id))
+
+
+def _add_incident(db, meta, score, action, findings, report_html):
+    inc = models.Incident(
+        scanned_path=meta.get("path") if meta else None,
+        score=score,
+        action=action,
+        findings=findings,
+        report_html=report_html,
+        extra_metadata=meta
+    )
     db.add(inc)
+    return inc
+
+
+def _claim_session(db, upload_id, inc):
+    """
+    Attach the pending incident ``inc`` to an unfinished upload session and
+    commit, dropping its chunks. Returns False (and rolls ``inc`` back) when
+    another request completed the session first.
+    """
+    db.flush()
+    claimed = (
+        db.query(models.UploadSession)
+        .filter(models.UploadSession.id == upload_id, models.UploadSession.incident_id.is_(None))
+        .update({"incident_id": inc.id, "header": {}}, synchronize_session=False)
+    )
+    if not claimed:
+        db.rollback()
+        return False
+    for table in (models.UploadChunk, models.UploadHtmlChunk):
+        db.query(table).filter(table.upload_id == upload_id).delete(synchronize_session=False)
     db.commit()
-    db.refresh(inc)
+    return True
+
 
+def _incident_out(inc):
     return {
         "id": inc.id,
         "created_at": inc.created_at.isoformat(),
@@ -50,6 +134,212 @@ def create_incident(payload: IncidentCreate, db: Session = Depends(get_db)):
     }
 
 
+def _get_incident_row(db, incident_id):
+    r = db.query(models.Incident).filter(models.Incident.id == incident_id).first()
+    if not r:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    return r
+
+
+def _session_by_key(db, key):
+    return db.query(models.UploadSession).filter(models.UploadSession.idempotency_key == key).first()
+
+
+# ------------------------
+# Chunked uploads (large reports)
+# ------------------------
+# POST /uploads                       open (or resume) a session for an idempotency key
+# PUT  /uploads/{id}/chunks/{index}   send one chunk of findings (re-sending replaces it)
+# PUT  /uploads/{id}/html/{index}     send one slice of the HTML report
+# GET  /uploads/{id}                  which chunks arrived, to resume after a failure
+# POST /uploads/{id}/complete         announce the chunk counts and assemble the incident
+#
+# Session responses carry ids, not findings, so large reports never travel back.
+# Sessions left unfinished for UPLOAD_SESSION_TTL answer 410 and are deleted.
+
+def _received(db, table, upload_id):
+    return [
+        row.index for row in
+        db.query(table.index).filter(table.upload_id == upload_id).order_by(table.index)
+    ]
+
+
+def _upload_status(db, upload):
+    done = upload.incident_id is not None
+    return {
+        "upload_id": upload.id,
+        "chunks": upload.chunks_total,
+        "received": list(range(upload.chunks_total)) if done else _received(db, models.UploadChunk, upload.id),
+        "html_received": [] if done else _received(db, models.UploadHtmlChunk, upload.id),
+        "incident_id": upload.incident_id,
+    }
+
+
+def _expired(upload):
+    return (
+        upload.incident_id is None
+        and upload.created_at is not None
+        and upload.created_at < datetime.datetime.utcnow() - UPLOAD_SESSION_TTL
+    )
+
+
+def _drop_uploads(db, upload_ids):
+    """Delete unfinished sessions and their chunks, then commit."""
+    if not upload_ids:
+        return
+    for table in (models.UploadChunk, models.UploadHtmlChunk):
+        db.query(table).filter(table.upload_id.in_(upload_ids)).delete(synchronize_session=False)
+    db.query(models.UploadSession).filter(
+        models.UploadSession.id.in_(upload_ids), models.UploadSession.incident_id.is_(None),
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def _expire_uploads(db):
+    """Cleanup pass: drop sessions that were never completed within UPLOAD_SESSION_TTL."""
+    cutoff = datetime.datetime.utcnow() - UPLOAD_SESSION_TTL
+    expired = [
+        upload_id for (upload_id,) in
+        db.query(models.UploadSession.id)
+        .filter(models.UploadSession.incident_id.is_(None), models.UploadSession.created_at < cutoff)
+        .limit(500)
+    ]
+    _drop_uploads(db, expired)
+
+
+def _get_upload(db, upload_id):
+    upload = db.query(models.UploadSession).filter(models.UploadSession.id == upload_id).first()
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if _expired(upload):
+        _drop_uploads(db, [upload_id])
+        raise HTTPException(status_code=410, detail="Upload expired; open a new session")
+    return upload
+
+
+def _check_index(index):
+    if not 0 <= index < MAX_UPLOAD_CHUNKS:
+        raise HTTPException(status_code=422, detail=f"chunk index must be between 0 and {MAX_UPLOAD_CHUNKS - 1}")
+
+
+def _put_chunk(db, table, upload_id, index, **values):
+    chunk = db.get(table, (upload_id, index))
+    if chunk is None:
+        db.add(table(upload_id=upload_id, index=index, **values))
+    else:
+        for name, value in values.items():
+            setattr(chunk, name, value)
+    try:
+        db.commit()
+    except IntegrityError:
+        # the same chunk arrived twice concurrently; either copy is fine
+        db.rollback()
+
+
+@router.post("/uploads", response_model=UploadStatus)
+def open_upload(payload: UploadOpen, idempotency_key: str = Header(...), db: Session = Depends(get_db)):
+    # abandoned sessions are cleaned up as new ones open; this also frees the
+    # key of an expired session, so re-sending the report starts over
+    _expire_uploads(db)
+    existing = _session_by_key(db, idempotency_key)
+    if existing is not None:
+        # same report again: resume the session (or report the finished incident)
+        return _upload_status(db, existing)
+
+    upload = models.UploadSession(
+        id=uuid.uuid4().hex,
+        idempotency_key=idempotency_key,
+        header={
+            "meta": payload.meta,
+            "score": payload.score,
+            "action": payload.action,
+            "findings_total": payload.findings_total,
+        },
+        chunks_total=0,
+    )
+    db.add(upload)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        upload = _session_by_key(db, idempotency_key)
+    return _upload_status(db, upload)
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadStatus)
+def get_upload(upload_id: str, db: Session = Depends(get_db)):
+    return _upload_status(db, _get_upload(db, upload_id))
+
+
+@router.put("/uploads/{upload_id}/chunks/{index}", response_model=UploadStatus)
+def put_upload_chunk(upload_id: str, index: int, payload: UploadChunkIn, db: Session = Depends(get_db)):
+    _check_index(index)
+    upload = _get_upload(db, upload_id)
+    if upload.incident_id is None:
+        findings = [f.dict() if hasattr(f, "dict") else f for f in payload.findings]
+        _put_chunk(db, models.UploadChunk, upload_id, index, findings=findings)
+    return _upload_status(db, upload)
+
+
+@router.put("/uploads/{upload_id}/html/{index}", response_model=UploadStatus)
+def put_upload_html(upload_id: str, index: int, payload: UploadHtmlChunkIn, db: Session = Depends(get_db)):
+    _check_index(index)
+    upload = _get_upload(db, upload_id)
+    if upload.incident_id is None:
+        _put_chunk(db, models.UploadHtmlChunk, upload_id, index, html=payload.html)
+    return _upload_status(db, upload)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=UploadStatus)
+def complete_upload(upload_id: str, payload: UploadComplete, db: Session = Depends(get_db)):
+    upload = _get_upload(db, upload_id)
+    if upload.incident_id is not None:
+        return _upload_status(db, upload)
+    for count in (payload.chunks, payload.html_chunks):
+        if not 0 <= count <= MAX_UPLOAD_CHUNKS:
+            raise HTTPException(status_code=422, detail=f"chunk counts must be between 0 and {MAX_UPLOAD_CHUNKS}")
+
+    missing = sorted(set(range(payload.chunks)) - set(_received(db, models.UploadChunk, upload_id)))
+    missing_html = sorted(set(range(payload.html_chunks)) - set(_received(db, models.UploadHtmlChunk, upload_id)))
+    if missing or missing_html:
+        raise HTTPException(status_code=409, detail={
+            "message": "Upload incomplete",
+            "missing": missing[:100],
+            "missing_html": missing_html[:100],
+        })
+
+    findings = [
+        f for (chunk,) in
+        db.query(models.UploadChunk.findings)
+        .filter(models.UploadChunk.upload_id == upload_id, models.UploadChunk.index < payload.chunks)
+        .order_by(models.UploadChunk.index)
+        for f in chunk
+    ]
+    report_html = None
+    if payload.html_chunks:
+        report_html = "".join(
+            html for (html,) in
+            db.query(models.UploadHtmlChunk.html)
+            .filter(models.UploadHtmlChunk.upload_id == upload_id, models.UploadHtmlChunk.index < payload.html_chunks)
+            .order_by(models.UploadHtmlChunk.index)
+        )
+
+    header = upload.header or {}
+    upload.chunks_total = payload.chunks
+    inc = _add_incident(
+        db,
+        meta=header.get("meta"),
+        score=header.get("score"),
+        action=header.get("action"),
+        findings=findings,
+        report_html=report_html,
+    )
+    # a concurrent complete() that got here first wins
+    _claim_session(db, upload_id, inc)
+    db.refresh(upload)
+    return _upload_status(db, upload)
+
+
 # ------------------------
 # List Incidents (SORT + FILTER + PAGINATION)
 # ------------------------
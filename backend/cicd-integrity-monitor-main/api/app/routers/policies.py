@@ -1,48 +1,92 @@
 # api/app/routers/policies.py
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from functools import lru_cache
 from pydantic import BaseModel
-import os
+import asyncio
 import json
+import os
+
+from scanner.scanner.policy_store import DEFAULT_REPO, PolicyConflict, PolicyStore
 
 router = APIRouter(prefix="/policies", tags=["policies"])
 
+# Seeds the "default" policy the first time the store is opened, and is kept
+# in step with it for scans that read the file (CLI / GitHub action without --policy-db)
 POLICY_FILE = os.path.join(os.getcwd(), "policies", "default_policy.json")
 
-# Default policy structure
-DEFAULT_POLICY = {
-    "whitelist_files": [],
-    "whitelist_rules": [],
-    "whitelist_detectors": [],
-    "whitelist_patterns": [],
-    "whitelist_enabled": True,
-}
+# The database run_migrations.py migrates
+POLICY_DB = os.getenv("INTEGRITY_POLICY_DB", os.path.join("api", "app", "database.db"))
 
+# Longest a /watch request may block
+MAX_WATCH_SECONDS = 60
 
-# ---------------------------------------------------------
-# Ensure policy file exists
-# ---------------------------------------------------------
-def load_policy():
-    if not os.path.exists(POLICY_FILE):
-        os.makedirs(os.path.dirname(POLICY_FILE), exist_ok=True)
-        with open(POLICY_FILE, "w", encoding="utf-8") as f:
-            json.dump(DEFAULT_POLICY, f, indent=2)
 
-    try:
-        with open(POLICY_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        raise HTTPException(500, detail="Invalid policy JSON format")
+@lru_cache(maxsize=1)
+def get_store() -> PolicyStore:
+    return PolicyStore(POLICY_DB, seed_path=POLICY_FILE)
+
+
+class ChangeSignal:
+    """
+    Wakes /watch requests on the event loop when this process writes a
+    policy. The store calls notify() from the writing thread; each waiter
+    holds the event that was current when it read the version, so a write
+    between the read and the wait is not missed.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.event = asyncio.Event()
+
+    def notify(self, _repo=None):
+        try:
+            self.loop.call_soon_threadsafe(self._fire)
+        except RuntimeError:
+            pass  # loop closed (app shut down)
+
+    def _fire(self):
+        event, self.event = self.event, asyncio.Event()
+        event.set()
+
+
+_signal = None
+
+
+def get_signal() -> ChangeSignal:
+    global _signal
+    loop = asyncio.get_running_loop()
+    if _signal is None or _signal.loop is not loop:
+        _signal = ChangeSignal(loop)
+        get_store().add_listener(_signal.notify)
+    return _signal
 
 
-def save_policy(data):
+def export_policy_file(repo):
+    """Rewrite POLICY_FILE after the default policy changed."""
+    if repo != DEFAULT_REPO:
+        return
+    _, policy, _ = get_store().get(DEFAULT_REPO)
+    tmp = POLICY_FILE + ".tmp"
     try:
-        with open(POLICY_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        os.makedirs(os.path.dirname(POLICY_FILE), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(policy, f, indent=2)
+        os.replace(tmp, POLICY_FILE)
     except Exception as e:
         raise HTTPException(500, detail=f"Failed to save policy: {str(e)}")
 
 
+def save_policy(repo, data, expected_version=None):
+    try:
+        version = get_store().put(repo, data, expected_version=expected_version)
+    except PolicyConflict as e:
+        raise HTTPException(409, detail=str(e))
+    export_policy_file(repo)
+    return version
+
+
 # ---------------------------------------------------------
 # Request Models
 # ---------------------------------------------------------
@@ -52,12 +96,15 @@ class PolicyUpdate(BaseModel):
     whitelist_detectors: list = []
     whitelist_patterns: list = []
     whitelist_enabled: bool = True
+    # optional overrides of scanner.scanner.scoring.DEFAULT_SCORING
+    scoring: dict = {}
 
 
 class WhitelistRequest(BaseModel):
     file: str | None = None
     rule_id: str | None = None
     detector: str | None = None
+    repo: str = DEFAULT_REPO
 
 
 # ---------------------------------------------------------
@@ -66,7 +113,7 @@ class WhitelistRequest(BaseModel):
 @router.get("")
 @router.get("/")
 def get_policy():
-    policy = load_policy()
+    _, policy, _ = get_store().get(DEFAULT_REPO)
     return policy
 
 
@@ -76,8 +123,8 @@ def get_policy():
 @router.post("")
 @router.post("/", summary="Replace entire policy")
 def update_policy(p: PolicyUpdate):
-    save_policy(p.dict())
-    return {"status": "ok", "policy": p}
+    version = save_policy(DEFAULT_REPO, p.dict())
+    return {"status": "ok", "policy": p, "version": version}
 
 
 # ---------------------------------------------------------
@@ -85,27 +132,88 @@ def update_policy(p: PolicyUpdate):
 # ---------------------------------------------------------
 @router.post("/whitelist", summary="Add whitelist entry")
 def add_whitelist(entry: WhitelistRequest):
-    policy = load_policy()
 
-    updated = False
+    def add(policy):
+        updated = False
+        for key, value in (
+            ("whitelist_files", entry.file),
+            ("whitelist_rules", entry.rule_id),
+            ("whitelist_detectors", entry.detector),
+        ):
+            if value and value not in policy.setdefault(key, []):
+                policy[key].append(value)
+                updated = True
+        return updated
 
-    if entry.file:
-        if entry.file not in policy["whitelist_files"]:
-            policy["whitelist_files"].append(entry.file)
-            updated = True
+    try:
+        version, policy, updated = get_store().update(entry.repo, add)
+    except PolicyConflict as e:
+        raise HTTPException(409, detail=str(e))
+    if updated:
+        export_policy_file(entry.repo)
 
-    if entry.rule_id:
-        if entry.rule_id not in policy["whitelist_rules"]:
-            policy["whitelist_rules"].append(entry.rule_id)
-            updated = True
+    return {"status": "ok" if updated else "noop", "policy": policy, "version": version}
 
-    if entry.detector:
-        if entry.detector not in policy["whitelist_detectors"]:
-            policy["whitelist_detectors"].append(entry.detector)
-            updated = True
 
-    if updated:
-        save_policy(policy)
-        return {"status": "ok", "policy": policy}
+# ---------------------------------------------------------
+# VERSIONED PER-REPO POLICIES
+# ---------------------------------------------------------
+@router.get("/versions", summary="Current policy version per repo")
+def list_versions():
+    return get_store().versions()
+
+
+@router.get("/repos/{repo}", summary="Policy for a repo (falls back to default)")
+def get_repo_policy(repo: str):
+    version, policy, source = get_store().get(repo)
+    return {"repo": repo, "source": source, "version": version, "policy": policy}
+
 
-    return {"status": "noop", "policy": policy}
+@router.put("/repos/{repo}", summary="Replace a repo policy")
+def put_repo_policy(
+    repo: str,
+    p: PolicyUpdate,
+    expected_version: int | None = Query(None, description="Reject with 409 unless this is the current version"),
+):
+    version = save_policy(repo, p.dict(), expected_version=expected_version)
+    return {"status": "ok", "repo": repo, "version": version, "policy": p}
+
+
+@router.delete("/repos/{repo}", summary="Drop a repo policy (repo falls back to default)")
+def delete_repo_policy(repo: str):
+    try:
+        deleted = get_store().delete(repo)
+    except ValueError as e:
+        raise HTTPException(400, detail=str(e))
+    if not deleted:
+        raise HTTPException(404, detail="No policy stored for this repo")
+    return {"status": "ok", "repo": repo}
+
+
+@router.get("/repos/{repo}/watch", summary="Long-poll until the repo policy version changes")
+async def watch_repo_policy(
+    repo: str,
+    since: int = Query(..., description="Version the client already has"),
+    timeout: float = Query(30, ge=0, le=MAX_WATCH_SECONDS),
+):
+    # waits on the event loop, not in a threadpool thread, so idle watchers
+    # cannot starve the sync routes; only the version lookups use a thread
+    store = get_store()
+    signal = get_signal()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    source = None
+    while True:
+        changed = signal.event
+        current_source, version = await run_in_threadpool(store.current, repo)
+        source = source or current_source
+        remaining = deadline - loop.time()
+        # a deleted override falls back to the default row, which is a change too
+        if version != since or current_source != source or remaining <= 0:
+            break
+        try:
+            # other processes' writes are only seen by re-checking
+            await asyncio.wait_for(changed.wait(), min(remaining, store.check_interval))
+        except asyncio.TimeoutError:
+            pass
+    return {"repo": repo, "version": version, "changed": version != since}
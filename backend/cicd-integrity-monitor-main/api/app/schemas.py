@@ -1,6 +1,15 @@
 from pydantic import BaseModel
 from typing import Any, Dict, List, Optional
 
+class Location(BaseModel):
+    line: int
+    column: int = 1
+    end_line: Optional[int] = None
+    offset: Optional[int] = None        # characters from the start of the file
+    byte_offset: Optional[int] = None   # UTF-8 bytes from the start of the file
+    length: Optional[int] = None
+    snippet: Optional[str] = None
+
 class Finding(BaseModel):
     detector: str
     file: str
@@ -9,6 +18,7 @@ class Finding(BaseModel):
     score: int
     description: Optional[str] = None
     meta: Optional[Dict[str, Any]] = None
+    location: Optional[Location] = None
 
 class IncidentCreate(BaseModel):
     meta: Optional[Dict[str, Any]] = None
@@ -25,3 +35,26 @@ class IncidentOut(BaseModel):
     action: str
     findings: List[Dict[str, Any]]
     metadata: Optional[Dict[str, Any]]
+
+class UploadOpen(BaseModel):
+    meta: Optional[Dict[str, Any]] = None
+    score: int
+    action: str
+    findings_total: Optional[int] = None
+
+class UploadChunkIn(BaseModel):
+    findings: List[Finding]
+
+class UploadHtmlChunkIn(BaseModel):
+    html: str
+
+class UploadComplete(BaseModel):
+    chunks: int                       # finding chunks sent (0..chunks-1)
+    html_chunks: int = 0              # HTML report chunks sent, joined in order
+
+class UploadStatus(BaseModel):
+    upload_id: str
+    chunks: int
+    received: List[int]
+    html_received: List[int] = []
+    incident_id: Optional[int] = None
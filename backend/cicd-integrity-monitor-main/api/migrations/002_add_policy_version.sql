@@ -0,0 +1,2 @@
+-- Policy rows are versioned; readers cache compiled policies until it changes
+ALTER TABLE policies ADD COLUMN version INTEGER NOT NULL DEFAULT 1;
@@ -1,14 +1,25 @@
 import sqlite3
 import glob
+import os
 
-DB_PATH = "api/app/database.db"
+# the API's PolicyStore reads the same variable (api/app/routers/policies.py)
+DB_PATH = os.getenv("INTEGRITY_POLICY_DB", "api/app/database.db")
 
 conn = sqlite3.connect(DB_PATH)
 
-for mfile in glob.glob("api/migrations/*.sql"):
+# remember applied files so non-idempotent migrations (ALTER TABLE) run once
+conn.execute("CREATE TABLE IF NOT EXISTS schema_migrations (name TEXT PRIMARY KEY)")
+applied = {row[0] for row in conn.execute("SELECT name FROM schema_migrations")}
+
+for mfile in sorted(glob.glob("api/migrations/*.sql")):
+    name = os.path.basename(mfile)
+    if name in applied:
+        continue
     print("Applying:", mfile)
     with open(mfile, "r") as fh:
         conn.executescript(fh.read())
+    conn.execute("INSERT INTO schema_migrations (name) VALUES (?)", (name,))
+    conn.commit()
 
 conn.commit()
 conn.close()
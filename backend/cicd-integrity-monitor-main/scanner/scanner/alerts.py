@@ -1,32 +1,167 @@
 # scanner/scanner/alerts.py
+import atexit
 import os
-import requests
+import queue
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 
+import requests
+
+# Discord rejects messages longer than this
+DISCORD_MAX_CHARS = 2000
+
+
+def _setting(config, key, default=None):
+    value = config.get(key)
+    if value is None:
+        value = os.getenv(key)
+    return default if value is None or value == "" else value
+
+
+def alert_summary(incident: dict):
+    """
+    The few fields an alert needs, taken from a scan report. Returns None
+    for scans that should not alert (only action == "fail" does). The report
+    itself (with all its findings) is never kept around for delivery.
+    """
+    action = (incident.get("action") or "").lower()
+    if action != "fail":
+        # Only alert on fails (adjust if you want warn/high too)
+        return None
+
+    meta = incident.get("meta", {})
+    return {
+        "path": meta.get("path", "unknown"),
+        "repo": incident.get("repo", "unknown"),
+        "score": incident.get("risk_score", incident.get("score", "n/a")),
+        "level": incident.get("risk_level", "unknown"),
+        "action": action,
+        # streamed scans keep no findings in memory, only the count
+        "findings": incident.get("findings_count", len(incident.get("findings", []))),
+        "at": time.time(),
+    }
+
+
+def format_alert(alert: dict):
+    """(subject, text) for a single failed scan."""
+    level = str(alert["level"]).upper()
+    text = (
+        f"**CI/CD Security Alert**\n"
+        f"Repository / Path: `{alert['path']}`\n"
+        f"Repo: {alert['repo']}\n"
+        f"Risk Level: **{level}**\n"
+        f"Risk Score: **{alert['score']}**\n"
+        f"Action: **{alert['action'].upper()}**\n"
+        f"Findings: {alert['findings']}\n\n"
+        f"View details in dashboard (if available).\n"
+    )
+    return f"[ALERT] CI/CD Risk: {level} ({alert['score']})", text
+
+
+def format_digest(alerts):
+    """(subject, text) for several failed scans delivered as one message."""
+    if len(alerts) == 1:
+        return format_alert(alerts[0])
+
+    scores = [a["score"] for a in alerts if isinstance(a["score"], (int, float))]
+    top = max(scores) if scores else "n/a"
+    window = int(max(a["at"] for a in alerts) - min(a["at"] for a in alerts))
+    header = f"**CI/CD Security Alert Digest** — {len(alerts)} failed scans within {window}s (max score **{top}**)\n"
+    footer = "\nView details in dashboard (if available).\n"
+
+    lines = []
+    used = len(header) + len(footer)
+    for i, a in enumerate(alerts):
+        line = f"• `{a['path']}` ({a['repo']}) score **{a['score']}**, {a['findings']} findings\n"
+        more = f"… and {len(alerts) - i} more\n"
+        if used + len(line) + len(more) > DISCORD_MAX_CHARS:
+            lines.append(more)
+            break
+        lines.append(line)
+        used += len(line)
+
+    return f"[ALERT] {len(alerts)} CI/CD scans failed (max score {top})", header + "".join(lines) + footer
+
+
 class AlertManager:
+    """
+    Discord + email delivery. The webhook goes through a pooled
+    requests.Session and the SMTP connection (STARTTLS + login) is opened
+    once and reused while it answers NOOP, so a burst of alerts costs one
+    handshake. send_alert() still delivers synchronously; scans go through
+    AlertDispatcher instead.
+    """
+
     def __init__(self, config=None):
         config = config or {}
         # Only read Discord and SMTP/email config
-        self.discord_url = config.get("DISCORD_WEBHOOK") or os.getenv("DISCORD_WEBHOOK")
-        self.smtp_host = config.get("SMTP_HOST") or os.getenv("SMTP_HOST")
-        self.smtp_port = int(config.get("SMTP_PORT") or os.getenv("SMTP_PORT") or 587)
-        self.smtp_user = config.get("SMTP_USER") or os.getenv("SMTP_USER")
-        self.smtp_pass = config.get("SMTP_PASS") or os.getenv("SMTP_PASS")
-        self.email_from = config.get("EMAIL_FROM") or os.getenv("EMAIL_FROM")
-        self.email_to = config.get("EMAIL_TO") or os.getenv("EMAIL_TO")  # comma-separated allowed
+        self.discord_url = _setting(config, "DISCORD_WEBHOOK")
+        self.smtp_host = _setting(config, "SMTP_HOST")
+        self.smtp_port = int(_setting(config, "SMTP_PORT", 587))
+        self.smtp_user = _setting(config, "SMTP_USER")
+        self.smtp_pass = _setting(config, "SMTP_PASS")
+        # a local SMTP stand-in usually speaks plain SMTP
+        self.smtp_starttls = str(_setting(config, "SMTP_STARTTLS", "1")).lower() not in ("0", "false", "no")
+        self.email_from = _setting(config, "EMAIL_FROM")
+        self.email_to = _setting(config, "EMAIL_TO")  # comma-separated allowed
+
+        self._http = requests.Session()
+        self._smtp = None
+        self._smtp_lock = threading.Lock()
+
+    @property
+    def configured(self):
+        return bool(self.discord_url or (self.smtp_host and self.email_to and self.email_from))
 
     def _send_discord(self, text: str):
         if not self.discord_url:
             # no webhook configured
             return {"ok": False, "reason": "no_discord_url"}
-        payload = {"content": text}
+        payload = {"content": text[:DISCORD_MAX_CHARS]}
         try:
-            r = requests.post(self.discord_url, json=payload, timeout=8)
-            return {"ok": r.status_code in (200, 204), "status_code": r.status_code, "text": r.text}
+            r = self._http.post(self.discord_url, json=payload, timeout=8)
+            result = {"ok": r.status_code in (200, 204), "status_code": r.status_code, "text": r.text}
+            if r.status_code == 429:
+                try:
+                    result["retry_after"] = float(r.json().get("retry_after", 0))
+                except Exception:
+                    pass
+            return result
         except Exception as e:
             return {"ok": False, "error": str(e)}
 
+    def _smtp_connection(self):
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close_smtp()
+
+        server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=15)
+        try:
+            if self.smtp_starttls:
+                server.starttls()
+            if self.smtp_user:
+                server.login(self.smtp_user, self.smtp_pass)
+        except Exception:
+            server.close()
+            raise
+        self._smtp = server
+        return server
+
+    def _close_smtp(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
+
     def _send_email(self, subject: str, body: str):
         if not (self.smtp_host and self.email_to and self.email_from):
             return {"ok": False, "reason": "smtp_not_configured"}
@@ -36,51 +171,243 @@ class AlertManager:
         msg["From"] = self.email_from
         msg["To"] = self.email_to
 
-        try:
-            with smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=15) as server:
-                server.starttls()
-                if self.smtp_user:
-                    server.login(self.smtp_user, self.smtp_pass)
+        with self._smtp_lock:
+            try:
+                server = self._smtp_connection()
                 server.sendmail(self.email_from, [a.strip() for a in self.email_to.split(",")], msg.as_string())
-            return {"ok": True}
-        except Exception as e:
-            return {"ok": False, "error": str(e)}
+                return {"ok": True}
+            except Exception as e:
+                # drop the connection so a retry starts from a fresh handshake
+                self._close_smtp()
+                return {"ok": False, "error": str(e)}
+
+    def disconnect_smtp(self):
+        with self._smtp_lock:
+            self._close_smtp()
+
+    def close(self):
+        """Release the pooled HTTP and SMTP connections."""
+        self.disconnect_smtp()
+        self._http.close()
 
     def send_alert(self, incident: dict):
         """
         Sends alerts for an incident. This implementation only sends if incident.action == "fail".
         Returns a dict with results from channels for debugging.
         """
-        results = {"discord": None, "email": None}
+        alert = alert_summary(incident)
+        if alert is None:
+            return {"skipped": True, "reason": "action_not_fail"}
+
+        subject, text = format_alert(alert)
+        return {
+            "discord": self._send_discord(text),
+            "email": self._send_email(subject, text),
+        }
+
+
+def _retryable(result):
+    if result.get("ok") or result.get("reason"):
+        return False  # delivered, or the channel is not configured
+    if "error" in result:
+        return True  # connection / SMTP errors
+    status = result.get("status_code") or 0
+    return status == 429 or status >= 500
+
+
+class AlertDispatcher:
+    """
+    Background alert delivery. send_alert() only reduces the report to a
+    small summary and queues it, so a scan never waits on Discord or SMTP.
 
-        action = (incident.get("action") or "").lower()
-        if action != "fail":
-            # Only alert on fails (adjust if you want warn/high too)
+    A worker thread collects alerts for ``ALERT_DIGEST_WINDOW`` seconds after
+    the first one arrives (or until ``ALERT_MAX_BATCH`` are queued) and sends
+    them as one message: a single failed scan gets the usual alert, several
+    get a digest. Each channel is retried with exponential backoff
+    (``ALERT_RETRIES`` attempts, starting at ``ALERT_BACKOFF`` seconds,
+    honouring Discord's retry_after). The SMTP connection is closed after
+    ``ALERT_IDLE_SECONDS`` without alerts.
+
+    flush() delivers pending alerts without waiting out the window. At
+    process exit close() does the same with a short budget
+    (``ALERT_EXIT_TIMEOUT`` seconds, one attempt per channel), so a failed
+    scan never sits out the retry schedule before the process can end.
+    """
+
+    def __init__(self, manager=None, config=None, sleep=time.sleep):
+        config = config or {}
+        self.manager = manager or AlertManager(config)
+        self.window = float(_setting(config, "ALERT_DIGEST_WINDOW", 30))
+        self.max_batch = int(_setting(config, "ALERT_MAX_BATCH", 50))
+        self.retries = max(1, int(_setting(config, "ALERT_RETRIES", 4)))
+        self.backoff = float(_setting(config, "ALERT_BACKOFF", 1.0))
+        self.max_backoff = float(_setting(config, "ALERT_MAX_BACKOFF", 60))
+        self.idle_seconds = float(_setting(config, "ALERT_IDLE_SECONDS", 60))
+        self.exit_timeout = float(_setting(config, "ALERT_EXIT_TIMEOUT", 5))
+        self._sleep = sleep
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0          # queued + being delivered
+        self._flushing = threading.Event()
+        self._flush_attempts = None  # per-channel attempt cap while flushing
+        self._closed = False
+        self._thread = None
+        self.stats = {"queued": 0, "messages": 0, "delivered": 0, "failed": 0, "retries": 0}
+
+    # ------------------------------------------------------------------
+    # producer side (scan threads)
+    # ------------------------------------------------------------------
+    def send_alert(self, incident: dict):
+        """Queue an alert for a scan report and return immediately."""
+        alert = alert_summary(incident)
+        if alert is None:
             return {"skipped": True, "reason": "action_not_fail"}
+        if not self.manager.configured:
+            return {"skipped": True, "reason": "not_configured"}
+
+        with self._lock:
+            if self._closed:
+                return {"skipped": True, "reason": "dispatcher_closed"}
+            self._pending += 1
+            self.stats["queued"] += 1
+            self._ensure_worker()
+        self._queue.put(alert)
+        return {"queued": True}
 
-        # Build a compact alert message
-        meta = incident.get("meta", {})
-        path = meta.get("path", "unknown")
-        score = incident.get("risk_score", incident.get("score", "n/a"))
-        level = incident.get("risk_level", "unknown")
-        repo = incident.get("repo", "unknown")
-
-        text = (
-            f"**CI/CD Security Alert**\n"
-            f"Repository / Path: `{path}`\n"
-            f"Repo: {repo}\n"
-            f"Risk Level: **{str(level).upper()}**\n"
-            f"Risk Score: **{score}**\n"
-            f"Action: **{action.upper()}**\n"
-            f"Findings: {len(incident.get('findings', []))}\n\n"
-            f"View details in dashboard (if available).\n"
-        )
-
-        # Discord
-        results["discord"] = self._send_discord(text)
-
-        # Email
-        subject = f"[ALERT] CI/CD Risk: {str(level).upper()} ({score})"
-        results["email"] = self._send_email(subject, text)
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+            self._thread.start()
 
+    def flush(self, timeout=None, attempts=None):
+        """
+        Deliver everything queued now (skipping the digest window); True if
+        all was handled in time. ``attempts`` caps the tries per channel
+        (default ``ALERT_RETRIES``).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._flush_attempts = attempts
+        self._flushing.set()
+        try:
+            with self._idle:
+                while self._pending:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._idle.wait(remaining)
+            return True
+        finally:
+            self._flushing.clear()
+            self._flush_attempts = None
+
+    def close(self, timeout=None, attempts=1):
+        """Flush with the exit budget, then stop the worker and release connections."""
+        timeout = self.exit_timeout if timeout is None else timeout
+        done = self.flush(timeout, attempts)
+        with self._lock:
+            self._closed = True
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(max(0.0, min(timeout, 1.0)))
+        self.manager.close()
+        return done
+
+    # ------------------------------------------------------------------
+    # worker
+    # ------------------------------------------------------------------
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.idle_seconds)
+            except queue.Empty:
+                # nothing to send for a while; don't hold the SMTP session open
+                self.manager.disconnect_smtp()
+                continue
+            if first is None:
+                return
+
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            stop = False
+            while len(batch) < self.max_batch and not self._flushing.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    # short waits so a flush() is noticed mid-window
+                    item = self._queue.get(timeout=min(remaining, 0.2))
+                except queue.Empty:
+                    continue
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            # anything already queued joins the batch, up to max_batch
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                self._deliver(batch)
+            except Exception as e:
+                print("Alert error:", str(e))
+            finally:
+                with self._idle:
+                    self._pending -= len(batch)
+                    self._idle.notify_all()
+            if stop:
+                return
+
+    def _deliver(self, batch):
+        subject, text = format_digest(batch)
+        self.stats["messages"] += 1
+        results = {
+            "discord": self._with_retries(lambda: self.manager._send_discord(text)),
+            "email": self._with_retries(lambda: self.manager._send_email(subject, text)),
+        }
+        for result in results.values():
+            if result.get("ok"):
+                self.stats["delivered"] += 1
+            elif not result.get("reason"):
+                self.stats["failed"] += 1
+                print("Alert delivery failed:", result.get("error") or result.get("status_code"))
         return results
+
+    def _with_retries(self, send):
+        delay = self.backoff
+        attempt = 0
+        while True:
+            result = send()
+            attempt += 1
+            # re-read each time: a flush() may lower the cap mid-delivery
+            if not _retryable(result) or attempt >= (self._flush_attempts or self.retries):
+                return result
+            self.stats["retries"] += 1
+            self._sleep(min(max(delay, result.get("retry_after", 0)), self.max_backoff))
+            delay *= 2
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """
+    The process-wide dispatcher (configured from the environment), shared by
+    every ScannerEngine so alerts from many scans are digested together.
+    """
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = AlertDispatcher()
+            atexit.register(_dispatcher.close)
+        return _dispatcher
@@ -7,7 +7,8 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 import sys
 
 from scanner.scanner.engine import ScannerEngine
-from scanner.scanner.reporter import Reporter
+from scanner.scanner.policy_store import PolicySchemaError, PolicyStore
+from scanner.scanner.reporter import Reporter, report_findings
 from scanner.scanner.uploader import upload_report
 
 
@@ -29,6 +30,32 @@ def main():
         help="Output HTML report path"
     )
 
+    parser.add_argument(
+        "--format",
+        choices=["json", "compact", "ndjson"],
+        default="json",
+        help="JSON report layout: json (readable), compact (no whitespace) or ndjson (one record per line)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write findings to the report as they are found instead of keeping them in memory "
+             "(bounded memory for huge scans; tail the file with --format ndjson)"
+    )
+
+    parser.add_argument(
+        "--html-mode",
+        choices=["auto", "cards", "lazy"],
+        default="auto",
+        help="HTML report style: cards, lazy (client-side rendering for large scans) or auto"
+    )
+
+    parser.add_argument(
+        "--sarif",
+        action="store_true",
+        help="Also write a SARIF 2.1.0 log (report.sarif) for code-scanning tools"
+    )
+
     # Policy file
     parser.add_argument(
         "--policy",
@@ -36,6 +63,16 @@ def main():
         help="Policy rules file"
     )
 
+    parser.add_argument(
+        "--policy-db",
+        help="SQLite database holding versioned per-repo policies (overrides --policy)"
+    )
+    parser.add_argument(
+        "--repo",
+        default="default",
+        help="Repository name used to look up the policy in --policy-db"
+    )
+
     # Dashboard API integration
     parser.add_argument(
         "--api-url",
@@ -48,6 +85,32 @@ def main():
         required=False
     )
 
+    # Discovery
+    parser.add_argument(
+        "--no-gitignore",
+        action="store_true",
+        help="Scan files matched by .gitignore files (built-in ignore lists still apply)"
+    )
+
+    parser.add_argument(
+        "--audit",
+        action="store_true",
+        help="Run every detector on every file and include unfiltered raw_findings in the report"
+    )
+
+    # Profiling
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="Write a cProfile dump of the scan to FILE (view with snakeviz or pstats)"
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        help="Number of slowest files listed in the report profile"
+    )
+
     args = parser.parse_args()
 
     # Ensure scan_reports/ folder always exists
@@ -56,28 +119,88 @@ def main():
         os.makedirs(out_dir, exist_ok=True)
 
     # Run Engine
-    engine = ScannerEngine(policy_path=args.policy)
-    result = engine.scan_path(args.path)
+    policy_store = None
+    if args.policy_db:
+        try:
+            policy_store = PolicyStore(args.policy_db, seed_path=args.policy)
+        except PolicySchemaError as e:
+            parser.error(str(e))
+
+    engine = ScannerEngine(
+        policy_path=args.policy,
+        policy_store=policy_store,
+        repo=args.repo,
+        profile_top_n=args.profile_top,
+        respect_gitignore=not args.no_gitignore,
+        audit=args.audit,
+        keep_findings=not args.stream,
+    )
+
+    stream = None
+    html_stream = None
+    sarif_stream = None
+    writers = []
+    on_finding = None
+    if args.stream:
+        stream = Reporter.open_stream(args.format).start({"path": os.path.abspath(args.path)})
+        html_stream = Reporter.open_html_stream()
+        writers = [stream, html_stream]
+        if args.sarif:
+            sarif_stream = Reporter.open_sarif_stream(args.path)
+            writers.append(sarif_stream)
+
+        def on_finding(finding):
+            for writer in writers:
+                writer.add(finding)
+
+    try:
+        if args.profile:
+            import cProfile
+            import pstats
+
+            profiler = cProfile.Profile()
+            result = profiler.runcall(engine.scan_path, args.path, on_finding)
+            profiler.dump_stats(args.profile)
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+            print(f"cProfile data written to {args.profile}")
+        else:
+            result = engine.scan_path(args.path, on_finding)
+    except BaseException:
+        # drop the .part files of the streamed reports
+        for writer in writers:
+            writer.abort()
+        raise
 
     # Console output
     Reporter.print_console(result)
 
     # Write local JSON + HTML output
-    Reporter.write_reports(
+    out_json_path, _ = Reporter.write_reports(
         result,
         out_json=args.output,
-        out_html=args.html
+        out_html=args.html,
+        fmt=args.format,
+        stream=stream,
+        html_stream=html_stream,
+        html_mode=args.html_mode,
+        sarif=args.sarif,
+        sarif_stream=sarif_stream,
     )
 
     # Upload report to dashboard API (optional)
     if args.api_url:
         print(f"Uploading report to dashboard: {args.api_url}")
         try:
-            upload_report(args.api_url, args.api_key, result)
+            upload_report(args.api_url, args.api_key, result, findings=report_findings(result, out_json_path))
             print("✓ Upload successful")
         except Exception as e:
             print(f"✗ Dashboard upload failed: {e}")
 
+    # Deliver a queued failure alert now rather than waiting out the digest
+    # window; one attempt per channel so a dead webhook can't hold up the exit
+    if not engine.alerts.flush(engine.alerts.exit_timeout, attempts=1):
+        print("✗ Alert delivery did not finish before exit")
+
     # Handle exit codes AFTER upload
     action = result.get("action", "allow")
 
@@ -2,6 +2,8 @@
 import ast
 from typing import List
 
+from scanner.scanner.location import locate_line
+
 
 class ASTDetector:
     name = "ast_detector"
@@ -76,7 +78,11 @@ class ASTDetector:
         try:
             tree = ast.parse(content)
             for node in ast.walk(tree):
-                findings.extend(self._check_node(node, filepath))
+                node_findings = self._check_node(node, filepath)
+                for finding in node_findings:
+                    # col_offset is a UTF-8 byte column, converted by the line index
+                    finding["location"] = locate_line(content, node.lineno, node.col_offset)
+                findings.extend(node_findings)
         except Exception:
             # Parsing error -> skip
             pass
@@ -2,11 +2,15 @@
 
 import re
 from typing import List, Dict, Any
+from scanner.scanner.location import locate_match, snippet
 from scanner.scanner.utils import git_utils
 
 # suspicious patterns: curl/wget piped to shell
 SUSPICIOUS_CMD_RE = re.compile(r"(curl|wget).*\|.*(sh|bash)", re.IGNORECASE)
 
+# "@@ -a,b +c,d @@" — c is the first line of the hunk in the new file
+HUNK_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)")
+
 # third-party GitHub actions (heuristic)
 EXTERNAL_ACTION_RE = re.compile(
     r"uses:\s*[-\w./@]+/(?!actions/)[\w.@/-]+",
@@ -24,14 +28,16 @@ class CIConfigDetector:
         findings = []
 
         # 1. Detect curl|wget → shell (supply chain attacks)
-        if SUSPICIOUS_CMD_RE.search(content):
+        match = SUSPICIOUS_CMD_RE.search(content)
+        if match:
             findings.append({
                 "detector": self.name,
                 "file": filepath,
                 "id": "curl_pipe_sh",
                 "type": "ci",
                 "score": 10,
-                "description": "Found `curl | sh` or `wget | bash` in CI config"
+                "description": "Found `curl | sh` or `wget | bash` in CI config",
+                "location": locate_match(content, match)
             })
 
         # 2. Detect external GitHub actions
@@ -42,7 +48,8 @@ class CIConfigDetector:
                 "id": "external_action_used",
                 "type": "ci",
                 "score": 3,
-                "description": f"Third-party GitHub Action referenced: {match.group(0)}"
+                "description": f"Third-party GitHub Action referenced: {match.group(0)}",
+                "location": locate_match(content, match)
             })
 
         return findings
@@ -71,9 +78,22 @@ class CIConfigDetector:
             except Exception:
                 continue
 
+            # line numbers in the new file come from the hunk headers
+            new_line = None
             for line in diff.splitlines():
+                hunk = HUNK_RE.match(line)
+                if hunk:
+                    new_line = int(hunk.group(1))
+                    continue
+                if new_line is None:
+                    continue  # diff/index/---/+++ headers
+                if line.startswith(("-", "\\")):
+                    continue  # removed lines and "\ No newline at end of file"
+                lineno = new_line
+                new_line += 1
                 if not line.startswith("+"):
                     continue
+                location = {"line": lineno, "column": 1, "snippet": snippet(line[1:])}
 
                 # detect newly added suspicious CI steps
                 if SUSPICIOUS_CMD_RE.search(line):
@@ -84,7 +104,8 @@ class CIConfigDetector:
                         "type": "ci",
                         "score": 10,
                         "description": f"Suspicious new CI step added in {f}",
-                        "meta": {"line": line}
+                        "meta": {"line": line},
+                        "location": location
                     })
 
                 # detect newly added third-party GitHub Actions
@@ -96,7 +117,8 @@ class CIConfigDetector:
                         "type": "ci",
                         "score": 3,
                         "description": f"New external GitHub Action referenced in {f}",
-                        "meta": {"line": line}
+                        "meta": {"line": line},
+                        "location": dict(location)
                     })
 
         return findings
@@ -1,8 +1,11 @@
 # scanner/scanner/detectors/dependency_detector.py
 
 import json
+import re
 from typing import List, Dict, Any
 
+from scanner.scanner.location import file_location, locate, locate_line
+
 
 class DependencyDetector:
     name = "dependency_detector"
@@ -23,7 +26,15 @@ class DependencyDetector:
     # -----------------------------------------------------
     # NPM: package.json scanning (single file)
     # -----------------------------------------------------
-    def _scan_package_json(self, filepath: str) -> List[Dict[str, Any]]:
+    def _package_location(self, content: str, section: str, name: str) -> Dict[str, Any]:
+        """Position of the ``"name":`` key, looked up after its section key."""
+        start = max(content.find(f'"{section}"'), 0)
+        match = re.compile(re.escape(json.dumps(name)) + r"\s*:").search(content, start)
+        if match is None:
+            return file_location()
+        return locate(content, match.start(), match.end())
+
+    def _scan_package_json(self, filepath: str, content: str) -> List[Dict[str, Any]]:
         findings = []
         data = self._load_json(filepath)
 
@@ -33,9 +44,13 @@ class DependencyDetector:
         all_deps = {**deps, **dev_deps}
 
         for name, version in all_deps.items():
+            # devDependencies win in the merge above, so look there first
+            section = "devDependencies" if name in dev_deps else "dependencies"
+            location = None
 
             # 1. short or suspicious names → typosquatting
             if len(name) <= self.SHORT_NAME_THRESHOLD or any(c in name for c in ['$', '%', '#']):
+                location = location or self._package_location(content, section, name)
                 findings.append({
                     "detector": self.name,
                     "file": filepath,
@@ -43,7 +58,8 @@ class DependencyDetector:
                     "type": "dependency",
                     "score": 6,
                     "description": f"Suspicious or typosquatted dependency name: {name}",
-                    "meta": {"package": name, "version": version}
+                    "meta": {"package": name, "version": version},
+                    "location": location
                 })
 
             # 2. URL or git installs
@@ -52,6 +68,7 @@ class DependencyDetector:
                 version.startswith("https://") or
                 version.startswith("git+")
             ):
+                location = location or self._package_location(content, section, name)
                 findings.append({
                     "detector": self.name,
                     "file": filepath,
@@ -59,11 +76,13 @@ class DependencyDetector:
                     "type": "dependency",
                     "score": 7,
                     "description": f"Dependency installed from URL/VCS: {name} -> {version}",
-                    "meta": {"package": name, "version": version}
+                    "meta": {"package": name, "version": version},
+                    "location": location
                 })
 
             # 3. Loose semver range (^)
             if isinstance(version, str) and version.startswith("^"):
+                location = location or self._package_location(content, section, name)
                 findings.append({
                     "detector": self.name,
                     "file": filepath,
@@ -71,7 +90,8 @@ class DependencyDetector:
                     "type": "dependency",
                     "score": 2,
                     "description": f"Loose version range: {name} -> {version} (use pinned versions)",
-                    "meta": {"package": name, "version": version}
+                    "meta": {"package": name, "version": version},
+                    "location": location
                 })
 
         return findings
@@ -79,39 +99,43 @@ class DependencyDetector:
     # -----------------------------------------------------
     # Python: requirements.txt scanning (single file)
     # -----------------------------------------------------
-    def _scan_requirements(self, filepath: str) -> List[Dict[str, Any]]:
+    def _scan_requirements(self, filepath: str, content: str) -> List[Dict[str, Any]]:
         findings = []
 
         try:
-            with open(filepath, "r", encoding="utf-8", errors="ignore") as fh:
-                for line in fh:
-                    line = line.strip()
-                    if not line or line.startswith("#"):
-                        continue
-
-                    # 1. VCS or URL installs
-                    if line.startswith(("http://", "https://", "git+")):
-                        findings.append({
-                            "detector": self.name,
-                            "file": filepath,
-                            "id": "vcs_or_url_requirement",
-                            "type": "dependency",
-                            "score": 7,
-                            "description": f"Dependency installed from URL/VCS: {line}",
-                            "meta": {"line": line}
-                        })
-
-                    # 2. Local path installs
-                    if line.startswith(("./", "../", "/")):
-                        findings.append({
-                            "detector": self.name,
-                            "file": filepath,
-                            "id": "local_path_install",
-                            "type": "dependency",
-                            "score": 4,
-                            "description": f"Local path dependency install: {line}",
-                            "meta": {"line": line}
-                        })
+            # the engine already read the file; split on "\n" only so line
+            # numbers agree with the line index
+            for lineno, raw in enumerate(content.split("\n"), 1):
+                line = raw.strip()
+                if not line or line.startswith("#"):
+                    continue
+                column = len(raw) - len(raw.lstrip())
+
+                # 1. VCS or URL installs
+                if line.startswith(("http://", "https://", "git+")):
+                    findings.append({
+                        "detector": self.name,
+                        "file": filepath,
+                        "id": "vcs_or_url_requirement",
+                        "type": "dependency",
+                        "score": 7,
+                        "description": f"Dependency installed from URL/VCS: {line}",
+                        "meta": {"line": line},
+                        "location": locate_line(content, lineno, column)
+                    })
+
+                # 2. Local path installs
+                if line.startswith(("./", "../", "/")):
+                    findings.append({
+                        "detector": self.name,
+                        "file": filepath,
+                        "id": "local_path_install",
+                        "type": "dependency",
+                        "score": 4,
+                        "description": f"Local path dependency install: {line}",
+                        "meta": {"line": line},
+                        "location": locate_line(content, lineno, column)
+                    })
 
         except Exception:
             pass
@@ -129,11 +153,11 @@ class DependencyDetector:
 
         # scan NPM package.json
         if filepath.endswith("package.json"):
-            return self._scan_package_json(filepath)
+            return self._scan_package_json(filepath, content)
 
         # scan Python requirements files
         if filepath.endswith("requirements.txt") or filepath.endswith("requirements-dev.txt"):
-            return self._scan_requirements(filepath)
+            return self._scan_requirements(filepath, content)
 
         # not a dependency file → ignore
         return []
@@ -3,6 +3,8 @@
 import math
 from typing import List
 
+from scanner.scanner.location import file_location
+
 
 def _entropy_bytes(data: bytes) -> float:
     """Calculate Shannon entropy of byte sequence."""
@@ -57,7 +59,8 @@ class EntropyDetector:
                     "type": "entropy",
                     "score": 7,
                     "description": "High entropy file (possible encoded/obfuscated payload)",
-                    "meta": {"entropy": entropy}
+                    "meta": {"entropy": entropy},
+                    "location": file_location()
                 })
 
         except Exception:
@@ -5,12 +5,16 @@ import re
 import json
 from typing import List
 
+from scanner.scanner.location import locate_match
+
 class RegexDetector:
     name = "regex_detector"
 
-    def __init__(self, rules_path="rules/suspicious_patterns.json"):
+    def __init__(self, rules_path="rules/suspicious_patterns.json", exclude_ids=()):
         self.rules_path = rules_path
+        self.exclude_ids = frozenset(exclude_ids)
         self.rules = self._load_rules()
+        self.compiled = self._compile_rules()
 
     def _load_rules(self):
         try:
@@ -19,6 +23,19 @@ class RegexDetector:
         except Exception:
             return []
 
+    def _compile_rules(self):
+        # compiled once; whitelisted rule ids are dropped so they never run
+        compiled = []
+        for rule in self.rules:
+            if rule.get("id") in self.exclude_ids:
+                continue
+            try:
+                compiled.append((re.compile(rule.get("pattern"), re.IGNORECASE | re.MULTILINE), rule))
+            except (re.error, TypeError):
+                # invalid regex → skip safely
+                continue
+        return compiled
+
     # -----------------------------
     # NEW: detect() method (used by engine)
     # -----------------------------
@@ -33,21 +50,18 @@ class RegexDetector:
         )):
             return findings
 
-        for rule in self.rules:
-            pattern = rule.get("pattern")
-            try:
-                if re.search(pattern, content, flags=re.IGNORECASE | re.MULTILINE):
-                    findings.append({
-                        "detector": self.name,
-                        "file": filepath,
-                        "id": rule.get("id"),
-                        "type": rule.get("type", "regex"),
-                        "score": rule.get("score", 5),
-                        "description": rule.get("description", "")
-                    })
-            except re.error:
-                # invalid regex → skip safely
-                continue
+        for regex, rule in self.compiled:
+            match = regex.search(content)
+            if match:
+                findings.append({
+                    "detector": self.name,
+                    "file": filepath,
+                    "id": rule.get("id"),
+                    "type": rule.get("type", "regex"),
+                    "score": rule.get("score", 5),
+                    "description": rule.get("description", ""),
+                    "location": locate_match(content, match)
+                })
 
         return findings
 
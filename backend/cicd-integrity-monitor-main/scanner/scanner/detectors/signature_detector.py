@@ -3,6 +3,8 @@ import json
 import re
 from typing import List, Dict, Any
 
+from scanner.scanner.location import file_location, locate_match
+
 
 class SignatureDetector:
     name = "signature_detector"
@@ -24,6 +26,16 @@ class SignatureDetector:
             re.compile(p, re.IGNORECASE) for p in self.signatures.get("regex", [])
         ]
 
+        # literal strings / URLs are matched case-insensitively as escaped
+        # patterns, which also gives their offsets in the original content
+        self.string_rules = [
+            (s, re.compile(re.escape(s), re.IGNORECASE)) for s in self.signatures.get("strings", [])
+        ]
+        self.url_rules = [
+            (u, re.compile(re.escape(u), re.IGNORECASE)) for u in self.signatures.get("urls", [])
+        ]
+        self.hashes = {h.lower() for h in self.signatures.get("hashes", [])}
+
     # -----------------------------
     # Hash file contents
     # -----------------------------
@@ -46,57 +58,64 @@ class SignatureDetector:
         # ----------------------------------------
         # 1. Check file hash
         # ----------------------------------------
-        fh = self._file_hash(filepath)
-        if fh and fh.lower() in [h.lower() for h in self.signatures.get("hashes", [])]:
+        fh = self._file_hash(filepath) if self.hashes else None
+        if fh and fh.lower() in self.hashes:
             findings.append({
                 "detector": self.name,
                 "file": filepath,
                 "id": "malicious_file_hash",
                 "score": 10,
                 "type": "signature",
-                "description": f"File hash matches known malicious signature: {fh}"
+                "description": f"File hash matches known malicious signature: {fh}",
+                "location": file_location()
             })
 
         # ----------------------------------------
         # 2. Check for suspicious strings
         # ----------------------------------------
-        for sig in self.signatures.get("strings", []):
-            if sig.lower() in content.lower():
+        for sig, pattern in self.string_rules:
+            match = pattern.search(content)
+            if match:
                 findings.append({
                     "detector": self.name,
                     "file": filepath,
                     "id": "malicious_string_match",
                     "score": 8,
                     "type": "signature",
-                    "description": f"Matched signature string: {sig}"
+                    "description": f"Matched signature string: {sig}",
+                    "location": locate_match(content, match)
                 })
 
         # ----------------------------------------
         # 3. Regex signatures
         # ----------------------------------------
         for rule in self.regex_rules:
-            if rule.search(content):
+            match = rule.search(content)
+            if match:
                 findings.append({
                     "detector": self.name,
                     "file": filepath,
                     "id": "malicious_regex_match",
                     "score": 9,
                     "type": "signature",
-                    "description": f"Matched signature regex: {rule.pattern}"
+                    "description": f"Matched signature regex: {rule.pattern}",
+                    "location": locate_match(content, match)
                 })
 
         # ----------------------------------------
         # 4. Malicious URL scanning
         # ----------------------------------------
-        for url in self.signatures.get("urls", []):
-            if url.lower() in content.lower():
+        for url, pattern in self.url_rules:
+            match = pattern.search(content)
+            if match:
                 findings.append({
                     "detector": self.name,
                     "file": filepath,
                     "id": "malicious_url_match",
                     "score": 8,
                     "type": "signature",
-                    "description": f"Matched malicious URL: {url}"
+                    "description": f"Matched malicious URL: {url}",
+                    "location": locate_match(content, match)
                 })
 
         return findings
@@ -4,6 +4,8 @@ import re
 import yaml
 from typing import List, Dict, Any
 
+from scanner.scanner.location import locate, locate_match
+
 
 class YAMLDetector:
     name = "yaml_detector"
@@ -26,25 +28,29 @@ class YAMLDetector:
         # =====================================================
 
         # Detect curl|sh patterns in CI steps
-        if self.SUSPICIOUS_CMD_PATTERN.search(content):
+        match = self.SUSPICIOUS_CMD_PATTERN.search(content)
+        if match:
             findings.append({
                 "detector": self.name,
                 "file": filepath,
                 "id": "curl_pipe_sh",
                 "type": "yaml",
                 "score": 10,
-                "description": "Found `curl | sh` pattern in YAML"
+                "description": "Found `curl | sh` pattern in YAML",
+                "location": locate_match(content, match)
             })
 
         # Detect secret-like keywords
-        if self.SECRET_PATTERN.search(content):
+        match = self.SECRET_PATTERN.search(content)
+        if match:
             findings.append({
                 "detector": self.name,
                 "file": filepath,
                 "id": "possible_secret_in_yaml",
                 "type": "yaml",
                 "score": 5,
-                "description": "Possible secret-like words in YAML"
+                "description": "Possible secret-like words in YAML",
+                "location": locate_match(content, match)
             })
 
         # =====================================================
@@ -67,6 +73,10 @@ class YAMLDetector:
         )
 
         if isinstance(jobs, dict):
+            # parsed values carry no positions; the matched command (a single
+            # line, the pattern has no DOTALL) is looked up in the raw text,
+            # after the previous hit so repeated commands map to their own lines
+            search_from = 0
             for job_name, job_def in jobs.items():
                 if not isinstance(job_def, dict):
                     continue
@@ -79,15 +89,23 @@ class YAMLDetector:
 
                         run = step.get("run", "")
                         if run and isinstance(run, str):
-                            if self.SUSPICIOUS_CMD_PATTERN.search(run):
-                                findings.append({
+                            match = self.SUSPICIOUS_CMD_PATTERN.search(run)
+                            if match:
+                                start = content.find(match.group(0), search_from)
+                                if start == -1:
+                                    start = content.find(match.group(0))
+                                finding = {
                                     "detector": self.name,
                                     "file": filepath,
                                     "id": "ci_step_curl_pipe_sh",
                                     "type": "yaml",
                                     "score": 10,
                                     "description": f"CI job '{job_name}' runs curl|sh",
-                                })
+                                }
+                                if start != -1:
+                                    finding["location"] = locate(content, start, start + len(match.group(0)))
+                                    search_from = start + 1
+                                findings.append(finding)
 
         return findings
 
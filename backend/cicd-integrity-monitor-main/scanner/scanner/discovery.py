@@ -0,0 +1,215 @@
+# scanner/scanner/discovery.py
+
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+def _translate(pattern: str) -> str:
+    """Translate one gitignore glob (without !, leading / or trailing /) to a regex body."""
+    i, n, out = 0, len(pattern), []
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern[i:i + 3] == "**/":
+                out.append("(?:.*/)?")
+                i += 3
+                continue
+            if pattern[i:i + 2] == "**":
+                out.append(".*")
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2 if pattern[i + 1:i + 2] in ("!", "]") else i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class IgnoreMatcher:
+    """
+    Compiled gitignore-style rules for one directory (``base``, relative to the
+    scan root). Paths passed to match() are relative to ``base`` and use "/".
+
+    The last matching rule wins, "!" re-includes, a trailing "/" restricts a
+    rule to directories, and a rule without an inner "/" matches at any depth.
+    Rules are also joined into combined regexes (name-only and path rules,
+    per entry kind) so the common "nothing matches" case costs one or two
+    fullmatch calls.
+    """
+
+    def __init__(self, patterns, base="", ignore_case=False):
+        self.base = base
+        flags = re.IGNORECASE if ignore_case else 0
+        # (compiled, negate, dir_only, basename_only)
+        self.rules: List[Tuple["re.Pattern", bool, bool, bool]] = []
+
+        for raw in patterns:
+            line = raw.rstrip("\n").rstrip("\r")
+            if not line.strip() or line.startswith("#"):
+                continue
+            # trailing spaces are ignored unless escaped
+            if not line.endswith("\\ "):
+                line = line.rstrip(" ")
+            negate = line.startswith("!")
+            if negate or line.startswith("\\!") or line.startswith("\\#"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            line = line.lstrip("/")
+            # a rule without "/" or "**" can only ever match the last path component
+            basename_only = not anchored and "**" not in line
+            body = _translate(line)
+            if not anchored and not basename_only:
+                body = "(?:.*/)?" + body
+            self.rules.append((re.compile(body, flags), negate, dir_only, basename_only))
+
+        self._any = {
+            (is_dir, basename_only): self._combine(
+                [r for r in self.rules if r[3] == basename_only and (is_dir or not r[2])], flags
+            )
+            for is_dir in (False, True)
+            for basename_only in (False, True)
+        }
+
+    @staticmethod
+    def _combine(rules, flags):
+        if not rules:
+            return None
+        return re.compile("|".join(f"(?:{rule.pattern})" for rule, _, _, _ in rules), flags)
+
+    def match(self, rel_path: str, is_dir: bool, name: Optional[str] = None) -> Optional[bool]:
+        """True if ignored, False if re-included by a "!" rule, None if no rule applies."""
+        if name is None:
+            name = rel_path.rpartition("/")[2]
+        by_name = self._any[(is_dir, True)]
+        by_path = self._any[(is_dir, False)]
+        if not ((by_name is not None and by_name.fullmatch(name))
+                or (by_path is not None and by_path.fullmatch(rel_path))):
+            return None
+        for rule, negate, dir_only, basename_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if rule.fullmatch(name if basename_only else rel_path):
+                return not negate
+        return None
+
+    @classmethod
+    def from_file(cls, path, base=""):
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as fh:
+                return cls(fh.readlines(), base=base)
+        except OSError:
+            return None
+
+
+class DiscoveryStats:
+    def __init__(self):
+        self.dirs_scanned = 0
+        self.files_found = 0
+        self.skipped: Dict[str, int] = {}
+
+    def skip(self, reason):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+    def to_dict(self):
+        return {"dirs_scanned": self.dirs_scanned, "files_found": self.files_found, "skipped": dict(self.skipped)}
+
+
+def default_matcher(ignore_dirs, ignore_files, ignore_extensions) -> IgnoreMatcher:
+    """Built-in ignore lists as gitignore rules (directory names match whole path components)."""
+    patterns = [f"{d}/" for d in sorted(ignore_dirs)]
+    patterns += [re.sub(r"([*?\[\\])", r"\\\1", f) for f in sorted(ignore_files)]
+    patterns += [f"*{ext}" for ext in sorted(ignore_extensions)]
+    return IgnoreMatcher(patterns, ignore_case=True)
+
+
+def iter_files(root: str, matcher: IgnoreMatcher, use_gitignore=True,
+               stats: Optional[DiscoveryStats] = None) -> Iterator[os.DirEntry]:
+    """
+    Yield the DirEntry of every file under ``root`` that no rule ignores.
+
+    Directories are read lazily with os.scandir from an explicit stack, so
+    memory depends on tree depth rather than the number of files. Ignored
+    directories are pruned without being opened. Symlinked directories are
+    not followed (same as os.walk's default).
+    """
+    stats = stats if stats is not None else DiscoveryStats()
+    root = os.path.abspath(root)
+    base_matchers = [matcher]
+    if use_gitignore:
+        m = IgnoreMatcher.from_file(os.path.join(root, ".gitignore"))
+        if m is not None:
+            base_matchers.append(m)
+
+    stack = [(root, "", base_matchers)]
+    while stack:
+        dir_path, rel_dir, matchers = stack.pop()
+        if use_gitignore and rel_dir:
+            m = IgnoreMatcher.from_file(os.path.join(dir_path, ".gitignore"), base=rel_dir)
+            if m is not None:
+                matchers = matchers + [m]
+        try:
+            entries = os.scandir(dir_path)
+        except OSError:
+            stats.skip("unreadable_dirs")
+            continue
+
+        stats.dirs_scanned += 1
+        subdirs = []
+        with entries:
+            for entry in entries:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if not is_dir and entry.is_symlink() and entry.is_dir():
+                        stats.skip("symlinked_dirs")
+                        continue
+                except OSError:
+                    stats.skip("unreadable_entries")
+                    continue
+
+                reason = _ignored_by(matchers, rel, is_dir, entry.name)
+                if reason:
+                    stats.skip(f"{reason}_dirs" if is_dir else f"{reason}_files")
+                    continue
+
+                if is_dir:
+                    subdirs.append((entry.path, rel, matchers))
+                else:
+                    stats.files_found += 1
+                    yield entry
+
+        # reversed so directories are visited in listing order
+        stack.extend(reversed(subdirs))
+
+
+def _ignored_by(matchers, rel, is_dir, name):
+    """'ignored' / 'gitignored' for the deepest matcher with a matching rule, else None."""
+    for index in range(len(matchers) - 1, -1, -1):
+        m = matchers[index]
+        path = rel[len(m.base) + 1:] if m.base else rel
+        result = m.match(path, is_dir, name)
+        if result is not None:
+            if not result:
+                return None
+            return "ignored" if index == 0 else "gitignored"
+    return None
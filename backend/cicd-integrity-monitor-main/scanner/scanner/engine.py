@@ -1,10 +1,16 @@
 # scanner/scanner/engine.py
 
 import os
+import time
 import traceback
+import uuid
 
 from scanner.scanner.policy import PolicyEngine
-from scanner.scanner.alerts import AlertManager   # <-- ADDED
+from scanner.scanner.alerts import get_dispatcher
+from scanner.scanner.discovery import DiscoveryStats, default_matcher, iter_files
+from scanner.scanner.location import file_location
+from scanner.scanner.profiling import ScanProfile
+from scanner.scanner.utils import git_utils
 
 from scanner.scanner.detectors.regex_detector import RegexDetector
 from scanner.scanner.detectors.ast_detector import ASTDetector
@@ -36,99 +42,169 @@ class ScannerEngine:
         ".ico", ".svg"
     }
 
-    def __init__(self, policy_path=None):
-        self.policy = PolicyEngine(policy_path)
+    def __init__(self, policy_path=None, profile_top_n=10, respect_gitignore=True, audit=False,
+                 policy_store=None, repo=None, keep_findings=True):
+        # with a PolicyStore the policy is looked up per scan, so edits made
+        # through the API apply to long-running engines without a restart
+        self.policy_store = policy_store
+        self.repo = repo or "default"
+        self.policy = policy_store.engine(self.repo) if policy_store else PolicyEngine(policy_path)
+        # audit mode scans everything and keeps the unfiltered findings in raw_findings
+        self.audit = audit
+        # with keep_findings=False findings only go to scan_path's on_finding
+        # callback (e.g. a StreamingReportWriter), keeping memory bounded
+        self.keep_findings = keep_findings
+        self.profile_top_n = profile_top_n
+        self.respect_gitignore = respect_gitignore
+        self.ignore_matcher = default_matcher(self.IGNORE_DIRS, self.IGNORE_FILES, self.IGNORE_EXTENSIONS)
+
+        # Alerts (Discord + Email) are queued and delivered in the background;
+        # engines in one process share the dispatcher so alerts get digested
+        self.alerts = get_dispatcher()
+
+        self._build_detectors()
+
+    def _build_detectors(self):
         cwd = os.getcwd()
-
-        # Alert manager (Discord + Email)
-        self.alerts = AlertManager({         # <-- ADDED
-            "DISCORD_WEBHOOK": os.getenv("DISCORD_WEBHOOK"),
-            "SMTP_HOST": os.getenv("SMTP_HOST"),
-            "SMTP_PORT": os.getenv("SMTP_PORT"),
-            "SMTP_USER": os.getenv("SMTP_USER"),
-            "SMTP_PASS": os.getenv("SMTP_PASS"),
-            "EMAIL_FROM": os.getenv("EMAIL_FROM"),
-            "EMAIL_TO": os.getenv("EMAIL_TO"),
-        })
-
-        # Correct detector list (NO ML here)
+        audit = self.audit
+        # Correct detector list (NO ML here). Detectors the policy whitelists
+        # are never instantiated, and whitelisted regex rules are not compiled.
+        excluded_rules = frozenset() if audit else self.policy.excluded_rules()
+        factories = [
+            (SignatureDetector, lambda: SignatureDetector(signature_path=os.path.join(cwd, "rules", "signatures.json"))),
+            (RegexDetector, lambda: RegexDetector(
+                rules_path=os.path.join(cwd, "rules", "suspicious_patterns.json"),
+                exclude_ids=excluded_rules,
+            )),
+            (ASTDetector, ASTDetector),
+            (EntropyDetector, EntropyDetector),
+            (YAMLDetector, YAMLDetector),
+            (DependencyDetector, DependencyDetector),
+            (CIConfigDetector, CIConfigDetector),
+        ]
+        self.skipped_detectors = [
+            cls.name for cls, _ in factories if not audit and self.policy.skips_detector(cls.name)
+        ]
         self.detectors = [
-            SignatureDetector(signature_path=os.path.join(cwd, "rules", "signatures.json")),
-            RegexDetector(rules_path=os.path.join(cwd, "rules", "suspicious_patterns.json")),
-            ASTDetector(),
-            EntropyDetector(),
-            YAMLDetector(),
-            DependencyDetector(),
-            CIConfigDetector(),
+            factory() for cls, factory in factories if cls.name not in self.skipped_detectors
         ]
 
-    def _should_ignore(self, filepath):
-        filename = os.path.basename(filepath)
-        ext = os.path.splitext(filepath)[1].lower()
-        return filename in self.IGNORE_FILES or ext in self.IGNORE_EXTENSIONS
-
-    def _should_ignore_dir(self, dirpath):
-        clean = dirpath.replace("\\", "/")
-        return any(clean.endswith(d) or f"/{d}/" in clean for d in self.IGNORE_DIRS)
-
-    def scan_path(self, path):
+    def _sync_policy(self):
+        if self.policy_store is None:
+            return
+        policy = self.policy_store.engine(self.repo)
+        if policy is not self.policy:
+            self.policy = policy
+            self._build_detectors()
+
+    def _collect(self, results, findings, raw_findings, scorer, on_finding):
+        """Whitelist and score detector results as they arrive."""
+        if raw_findings is not None:
+            raw_findings.extend(results)
+        for f in self.policy.filter_whitelisted(results):
+            if "location" not in f:
+                # every finding points somewhere; file-level if the detector had no position
+                f["location"] = file_location()
+            scorer.add(f)
+            if self.keep_findings:
+                findings.append(f)
+            if on_finding is not None:
+                on_finding(f)
+
+    def scan_path(self, path, on_finding=None):
+        self._sync_policy()
         findings = []
+        raw_findings = [] if self.audit else None
+        scorer = self.policy.scorer()
+        policy_seconds = 0.0
         abs_path = os.path.abspath(path)
-        scanned_files = []
-
-        # Walk the filesystem
-        for root, dirs, files in os.walk(abs_path):
-
-            dirs[:] = [d for d in dirs if not self._should_ignore_dir(os.path.join(root, d))]
-
-            for file in files:
-                filepath = os.path.join(root, file)
-
-                if self._should_ignore(filepath):
-                    continue
-
-                scanned_files.append(filepath)
-
+        profile = ScanProfile(top_n=self.profile_top_n)
+        discovery = DiscoveryStats()
+        git_calls, git_seconds = git_utils.GIT_STATS["calls"], git_utils.GIT_STATS["seconds"]
+
+        # Files are yielded as directories are read, so nothing is buffered
+        for entry in iter_files(abs_path, self.ignore_matcher, self.respect_gitignore, discovery):
+            filepath = entry.path
+
+            # whitelisted files would have all their findings dropped; don't open them
+            if not self.audit and self.policy.skips_file(filepath):
+                profile.skip("whitelisted_files")
+                continue
+
+            file_start = time.perf_counter()
+
+            try:
+                with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
+                    size = os.fstat(f.fileno()).st_size
+                    content = f.read()
+            except Exception:
+                profile.skip("read_errors")
+                continue
+
+            # Run traditional detectors
+            detector_times = {}
+            for detector in self.detectors:
+                name = detector.__class__.__name__
+                start = time.perf_counter()
                 try:
-                    with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
-                        content = f.read()
-                except Exception:
-                    continue
-
-                # Run traditional detectors
-                for detector in self.detectors:
-                    try:
-                        results = detector.detect(filepath, content)
-                        if results:
-                            findings.extend(results)
-                    except Exception as e:
-                        findings.append({
-                            "detector": detector.__class__.__name__,
-                            "file": filepath,
-                            "id": "detector_error",
-                            "type": "error",
-                            "score": 0,
-                            "description": f"Detector crashed: {str(e)}"
-                        })
+                    results = detector.detect(filepath, content)
+                except Exception as e:
+                    results = [{
+                        "detector": detector.__class__.__name__,
+                        "file": filepath,
+                        "id": "detector_error",
+                        "type": "error",
+                        "score": 0,
+                        "description": f"Detector crashed: {str(e)}"
+                    }]
+                finally:
+                    elapsed = time.perf_counter() - start
+                    detector_times[name] = elapsed
+                    profile.record_detector(name, filepath, elapsed)
+
+                if results:
+                    policy_start = time.perf_counter()
+                    self._collect(results, findings, raw_findings, scorer, on_finding)
+                    policy_seconds += time.perf_counter() - policy_start
+
+            profile.record_file(filepath, time.perf_counter() - file_start, size, detector_times)
+
+        for reason, count in discovery.skipped.items():
+            profile.skip(reason, count)
 
         # ---------------------------
-        # WHITELIST + SCORING
+        # SCORING (whitelisting and per-finding scoring already happened above)
         # ---------------------------
-
-        filtered = self.policy.filter_whitelisted(findings)   # <-- already built-in
-        score = self.policy.score_findings(filtered)
-        action = self.policy.get_action(score)
+        score = scorer.total()
+        action = scorer.action(score)
 
         report = {
-            "meta": {"path": abs_path},
-            "findings": filtered,
-            "raw_findings": findings,
+            "meta": {
+                "path": abs_path,
+                # identifies this scan's report, e.g. as the upload idempotency key
+                "scan_id": uuid.uuid4().hex,
+                "profile": profile.to_dict({
+                    "git_subprocess": {
+                        "calls": git_utils.GIT_STATS["calls"] - git_calls,
+                        "seconds": round(git_utils.GIT_STATS["seconds"] - git_seconds, 6),
+                    },
+                    "policy_seconds": round(policy_seconds, 6),
+                    "dirs_scanned": discovery.dirs_scanned,
+                    "skipped_detectors": self.skipped_detectors,
+                }),
+                "policy_version": self.policy.version,
+            },
+            "findings": findings,
+            "findings_count": scorer.findings,
             "score": score,
+            "score_breakdown": scorer.breakdown(),
             "action": action,
         }
+        if self.audit:
+            report["raw_findings"] = raw_findings
 
         # ---------------------------
-        # ALERTING (Discord + Email)
+        # ALERTING (Discord + Email) — queued, never blocks the scan
         # ---------------------------
         try:
             alert_result = self.alerts.send_alert(report)
@@ -0,0 +1,322 @@
+# scanner/scanner/html_report.py
+
+import base64
+import json
+import os
+import zlib
+
+# findings above which reporter picks the lazy page over the card template
+LAZY_HTML_THRESHOLD = 500
+# findings above which the embedded data is gzip+base64 encoded
+COMPRESS_THRESHOLD = 2000
+
+# column order of the embedded rows; other finding keys go in a per-row "extra" object
+COLUMNS = ("detector", "file", "id", "type", "score", "description")
+STRING_COLUMNS = {"detector", "file", "id", "type", "description"}
+
+LAZY_HTML_HEAD = """<!doctype html>
+<html>
+<head>
+<meta charset="utf-8"/>
+<title>Scan Report</title>
+<style>
+    body { margin: 0; font-family: 'Segoe UI', Roboto, sans-serif; background: #0f172a; color: #e2e8f0; }
+    header { padding: 16px 20px 8px; }
+    h1 { font-size: 26px; margin: 0 0 10px; color: #38bdf8; }
+    .meta-box { background: #1e293b; border-radius: 10px; padding: 10px 14px; font-size: 14px; }
+    .meta-box p { margin: 4px 0; }
+    .controls { display: flex; gap: 10px; padding: 10px 20px; align-items: center; }
+    .controls input, .controls select { background: #1e293b; color: #e2e8f0; border: 1px solid #334155;
+        border-radius: 6px; padding: 6px 8px; font-size: 14px; }
+    .controls input { flex: 1; }
+    #count { color: #94a3b8; font-size: 13px; white-space: nowrap; }
+    #viewport { position: relative; overflow-y: auto; height: calc(100vh - 230px); margin: 0 20px;
+        background: #111827; border-radius: 10px; }
+    #spacer { position: relative; }
+    .row { position: absolute; left: 0; right: 0; height: 32px; line-height: 32px; padding: 0 12px;
+        white-space: nowrap; overflow: hidden; text-overflow: ellipsis; font-size: 13px; cursor: pointer;
+        border-bottom: 1px solid #1f2937; box-sizing: border-box; }
+    .row:hover { background: #1e293b; }
+    .group { background: #172036; color: #38bdf8; font-weight: 600; }
+    .score-badge { display: inline-block; min-width: 26px; text-align: center; border-radius: 6px;
+        line-height: 20px; margin-right: 8px; font-weight: 600; }
+    .high { background: #dc2626; } .medium { background: #d97706; } .low { background: #16a34a; }
+    .dim { color: #94a3b8; }
+    #detail { position: fixed; right: 20px; bottom: 20px; width: 520px; max-height: 60vh; overflow: auto;
+        background: #1e293b; border: 1px solid #334155; border-radius: 10px; padding: 14px; display: none;
+        font-size: 13px; white-space: pre-wrap; word-break: break-word; }
+    #detail .close-btn { float: right; cursor: pointer; color: #f87171; }
+</style>
+</head>
+<body>
+<header>
+    <h1>CI/CD Integrity Scan Report</h1>
+    <div class="meta-box" id="summary">Loading…</div>
+</header>
+<div class="controls">
+    <input id="search" placeholder="Search file, rule, detector or description" autocomplete="off"/>
+    <select id="group">
+        <option value="">No grouping</option>
+        <option value="file">Group by file</option>
+        <option value="id">Group by rule</option>
+        <option value="detector">Group by detector</option>
+    </select>
+    <span id="count"></span>
+</div>
+<div id="viewport"><div id="spacer"></div></div>
+<div id="detail"><span class="close-btn" onclick="this.parentNode.style.display='none'">Close</span><div id="detail-body"></div></div>
+"""
+
+LAZY_LIST_JS = """
+// Virtual-scrolled findings list with search and collapsible groups.
+async function readFindings(node) {
+    if (node.dataset.encoding !== "gzip+base64") return JSON.parse(node.textContent);
+    const bin = atob(node.textContent.trim());
+    const bytes = new Uint8Array(bin.length);
+    for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+    const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+    return JSON.parse(await new Response(stream).text());
+}
+
+// opts: count, rowHeight, text(i), value(i, key), renderRow(node, i), showDetail(i)
+function lazyList(opts) {
+    const el = (id) => document.getElementById(id);
+    const ROW = opts.rowHeight;
+    const haystack = new Array(opts.count);
+    const search = (i) => haystack[i] || (haystack[i] = opts.text(i).toLowerCase());
+
+    let items = [];      // display rows: {g: label, n: count} or row index
+    const collapsed = new Set();
+
+    function rebuild() {
+        const q = el("search").value.trim().toLowerCase();
+        const key = el("group").value;
+        const matches = [];
+        for (let i = 0; i < opts.count; i++) if (!q || search(i).includes(q)) matches.push(i);
+
+        if (!key) {
+            items = matches;
+        } else {
+            const groups = new Map();
+            for (const i of matches) {
+                const k = opts.value(i, key);
+                if (!groups.has(k)) groups.set(k, []);
+                groups.get(k).push(i);
+            }
+            items = [];
+            // a loop, not push(...rows): spreading a large group overflows the call stack
+            for (const [k, rows] of [...groups].sort((a, b) => b[1].length - a[1].length)) {
+                items.push({ g: k, n: rows.length });
+                if (!collapsed.has(k)) for (const i of rows) items.push(i);
+            }
+        }
+        el("count").textContent = matches.length + " of " + opts.count + " findings";
+        el("spacer").style.height = items.length * ROW + "px";
+        render(true);
+    }
+
+    const pool = [];
+    function render(force) {
+        const vp = el("viewport");
+        const first = Math.max(0, Math.floor(vp.scrollTop / ROW) - 10);
+        const last = Math.min(items.length, first + Math.ceil(vp.clientHeight / ROW) + 20);
+        if (!force && render.first === first && render.last === last) return;
+        render.first = first; render.last = last;
+
+        let used = 0;
+        for (let pos = first; pos < last; pos++, used++) {
+            let node = pool[used];
+            if (!node) { node = document.createElement("div"); pool.push(node); el("spacer").appendChild(node); }
+            node.style.display = "";
+            node.style.top = pos * ROW + "px";
+            node.textContent = "";
+            const item = items[pos];
+            if (typeof item === "object") {
+                node.className = "row group";
+                node.textContent = (collapsed.has(item.g) ? "▸ " : "▾ ") + item.g + "  (" + item.n + ")";
+                node.onclick = () => { collapsed.has(item.g) ? collapsed.delete(item.g) : collapsed.add(item.g); rebuild(); };
+            } else {
+                node.className = "row";
+                opts.renderRow(node, item);
+                node.onclick = () => opts.showDetail(item);
+            }
+        }
+        for (; used < pool.length; used++) pool[used].style.display = "none";
+    }
+
+    let timer = null;
+    el("search").addEventListener("input", () => { clearTimeout(timer); timer = setTimeout(rebuild, 150); });
+    el("group").addEventListener("change", () => { collapsed.clear(); rebuild(); });
+    el("viewport").addEventListener("scroll", () => render(false));
+    window.addEventListener("resize", () => render(true));
+    rebuild();
+}
+"""
+
+LAZY_HTML_SCRIPT = """
+<script>
+""" + LAZY_LIST_JS + """
+(async function () {
+    const el = (id) => document.getElementById(id);
+    const data = await readFindings(el("findings-data"));
+    const summary = JSON.parse(el("summary-data").textContent);
+    const S = data.strings, cols = data.cols;
+    const ci = Object.fromEntries(cols.map((c, i) => [c, i]));
+    const str = new Set(data.string_cols);
+    const get = (r, c) => (str.has(c) ? S[r[ci[c]]] : r[ci[c]]);
+
+    // summary box (textContent only; report data is never parsed as HTML)
+    const box = el("summary");
+    box.textContent = "";
+    const line = (label, value) => {
+        const p = document.createElement("p");
+        const b = document.createElement("b");
+        b.textContent = label + ": ";
+        p.append(b, String(value));
+        box.appendChild(p);
+    };
+    line("Path", (summary.meta || {}).path || "");
+    line("Score", summary.score + " (" + String(summary.action || "").toUpperCase() + ")");
+    line("Findings", data.rows.length);
+    const bd = summary.score_breakdown;
+    if (bd) {
+        line("Breakdown", "raw " + bd.raw_total + ", weighted " + bd.weighted_total + ", severity floor " +
+            bd.severity_floor + ", " + bd.duplicates + " duplicate hits, " + bd.capped_files + " capped files");
+    }
+
+    lazyList({
+        count: data.rows.length,
+        rowHeight: 32,
+        text: (i) => ["file", "id", "detector", "description"].map((c) => get(data.rows[i], c) || "").join(" "),
+        value: (i, key) => get(data.rows[i], key),
+        renderRow(node, i) {
+            const r = data.rows[i];
+            const score = get(r, "score") || 0;
+            const badge = document.createElement("span");
+            badge.className = "score-badge " + (score >= 7 ? "high" : score >= 4 ? "medium" : "low");
+            badge.textContent = score;
+            const dim = document.createElement("span");
+            dim.className = "dim";
+            const loc = (r[cols.length] || {}).location;
+            dim.textContent = "  " + get(r, "file") + (loc ? ":" + loc.line : "") + "  " + (get(r, "description") || "");
+            node.append(badge, get(r, "detector") + " — " + get(r, "id"), dim);
+        },
+        showDetail(i) {
+            const r = data.rows[i];
+            const f = {};
+            for (const c of cols) f[c] = get(r, c);
+            Object.assign(f, r[cols.length] || {});
+            el("detail-body").textContent = JSON.stringify(f, null, 2);
+            el("detail").style.display = "block";
+        },
+    });
+})();
+</script>
+</body>
+</html>
+"""
+
+
+def _script_json(obj):
+    """JSON safe to embed in a <script> element ("<" only occurs inside strings)."""
+    return json.dumps(obj, separators=(",", ":"), default=str).replace("<", "\\u003c")
+
+
+class _Base64Gzip:
+    """Incremental gzip + base64 so the embedded data never has to be held in memory."""
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.comp = zlib.compressobj(9, zlib.DEFLATED, 31)
+        self.pending = b""
+
+    def write(self, text):
+        self._emit(self.comp.compress(text.encode("utf-8")))
+
+    def _emit(self, data, final=False):
+        data = self.pending + data
+        cut = len(data) if final else len(data) - len(data) % 3
+        if cut:
+            self.fh.write(base64.b64encode(data[:cut]).decode("ascii"))
+        self.pending = data[cut:]
+
+    def close(self):
+        self._emit(self.comp.flush(), final=True)
+
+
+class _Plain:
+    def __init__(self, fh):
+        self.fh = fh
+
+    def write(self, text):
+        self.fh.write(text)
+
+    def close(self):
+        pass
+
+
+class LazyHtmlWriter:
+    """
+    HTML report that embeds findings as compact JSON and renders them in the
+    browser (virtual scrolling, grouping by file / rule / detector, search).
+
+    Findings are written as rows of string-table indexes, so repeated paths,
+    rule ids and descriptions are stored once, and generation is a single
+    linear pass. Like StreamingReportWriter it can be fed while the scan
+    runs (add) and finished with the result summary (close).
+    """
+
+    def __init__(self, path, compress=True):
+        self.path = path
+        self.count = 0
+        self._strings = {}
+        self._target = path + ".part"
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._fh = open(self._target, "w", encoding="utf-8")
+        self._fh.write(LAZY_HTML_HEAD)
+        encoding = "gzip+base64" if compress else "json"
+        self._fh.write(f'<script id="findings-data" type="application/json" data-encoding="{encoding}">')
+        self._out = _Base64Gzip(self._fh) if compress else _Plain(self._fh)
+        self._out.write(_script_json({"cols": COLUMNS, "string_cols": sorted(STRING_COLUMNS)})[:-1] + ',"rows":[')
+
+    def _intern(self, value):
+        value = "" if value is None else str(value)
+        index = self._strings.get(value)
+        if index is None:
+            index = self._strings[value] = len(self._strings)
+        return index
+
+    def add(self, finding):
+        row = [self._intern(finding.get(c)) if c in STRING_COLUMNS else finding.get(c) for c in COLUMNS]
+        extra = {k: v for k, v in finding.items() if k not in COLUMNS}
+        if extra:
+            row.append(extra)
+        self._out.write(("," if self.count else "") + _script_json(row))
+        self.count += 1
+
+    def close(self, result):
+        self._out.write('],"strings":' + _script_json(list(self._strings)) + "}")
+        self._out.close()
+        self._fh.write("</script>\n")
+        summary = {k: v for k, v in result.items() if k not in ("findings", "raw_findings")}
+        self._fh.write('<script id="summary-data" type="application/json">' + _script_json(summary) + "</script>\n")
+        self._fh.write(LAZY_HTML_SCRIPT)
+        self._fh.close()
+        os.replace(self._target, self.path)
+        return self.path
+
+    def abort(self):
+        self._fh.close()
+        if os.path.exists(self._target):
+            os.remove(self._target)
+
+
+def write_lazy_html(result, path, compress=None):
+    findings = result.get("findings", [])
+    if compress is None:
+        compress = len(findings) > COMPRESS_THRESHOLD
+    writer = LazyHtmlWriter(path, compress=compress)
+    for finding in findings:
+        writer.add(finding)
+    return writer.close(result)
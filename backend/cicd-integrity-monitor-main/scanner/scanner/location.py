@@ -0,0 +1,127 @@
+# scanner/scanner/location.py
+
+from bisect import bisect_right
+from typing import Any, Dict, Optional
+
+# longest snippet stored with a finding; longer lines are cut around the match
+SNIPPET_CHARS = 160
+
+
+class LineIndex:
+    """
+    Newline offsets of one file's content. Built in a single pass the first
+    time a position is asked for, after which offset -> (line, column) is a
+    bisect and line -> offset a list lookup. Byte offsets (UTF-8) only need
+    extra work for non-ASCII files, and only once per file.
+    """
+
+    def __init__(self, content: str):
+        self.content = content
+        self._starts = None
+        self._byte_starts = None
+        self._ascii = None
+
+    @property
+    def starts(self):
+        if self._starts is None:
+            starts = [0]
+            find = self.content.find
+            pos = find("\n")
+            while pos != -1:
+                starts.append(pos + 1)
+                pos = find("\n", pos + 1)
+            self._starts = starts
+        return self._starts
+
+    def position(self, offset: int):
+        """1-based (line, column) of a character offset."""
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+    def line_start(self, line: int) -> int:
+        return self.starts[min(max(line, 1), len(self.starts)) - 1]
+
+    def line_text(self, line: int) -> str:
+        start = self.line_start(line)
+        end = self.content.find("\n", start)
+        return self.content[start:] if end == -1 else self.content[start:end]
+
+    def byte_offset(self, offset: int) -> int:
+        if self._ascii is None:
+            self._ascii = self.content.isascii()
+        if self._ascii:
+            return offset
+        if self._byte_starts is None:
+            byte_starts, total = [], 0
+            for i, start in enumerate(self.starts):
+                byte_starts.append(total)
+                end = self.starts[i + 1] if i + 1 < len(self.starts) else len(self.content)
+                total += len(self.content[start:end].encode("utf-8"))
+            self._byte_starts = byte_starts
+        line = self.position(offset)[0]
+        start = self.starts[line - 1]
+        return self._byte_starts[line - 1] + len(self.content[start:offset].encode("utf-8"))
+
+    def offset_at(self, line: int, byte_column: int = 0) -> int:
+        """Character offset of a 1-based line and 0-based UTF-8 column (as ast reports them)."""
+        text = self.line_text(line)
+        if not text.isascii():
+            byte_column = len(text.encode("utf-8")[:byte_column].decode("utf-8", "ignore"))
+        return self.line_start(line) + byte_column
+
+    def location(self, start: int, end: Optional[int] = None) -> Dict[str, Any]:
+        """The ``location`` of a finding spanning content[start:end]."""
+        end = start if end is None else max(end, start)
+        line, column = self.position(start)
+        location = {
+            "line": line,
+            "column": column,
+            "offset": start,
+            "byte_offset": self.byte_offset(start),
+            "length": end - start,
+        }
+        end_line = self.position(max(end - 1, start))[0]
+        if end_line != line:
+            location["end_line"] = end_line
+        location["snippet"] = snippet(self.line_text(line), column - 1)
+        return location
+
+
+def snippet(text: str, column: int = 0) -> str:
+    text = text.rstrip("\r")
+    if len(text) <= SNIPPET_CHARS:
+        return text.strip()
+    first = max(0, min(column - SNIPPET_CHARS // 4, len(text) - SNIPPET_CHARS))
+    return text[first:first + SNIPPET_CHARS].strip()
+
+
+# Detectors are handed the same content object for one file, so a single
+# slot is enough to share one index between all of them.
+_last = (None, None)
+
+
+def line_index(content: str) -> LineIndex:
+    global _last
+    cached_content, index = _last
+    if cached_content is not content:
+        index = LineIndex(content)
+        _last = (content, index)
+    return index
+
+
+def locate(content: str, start: int, end: Optional[int] = None) -> Dict[str, Any]:
+    return line_index(content).location(start, end)
+
+
+def locate_match(content: str, match) -> Dict[str, Any]:
+    return line_index(content).location(match.start(), match.end())
+
+
+def locate_line(content: str, line: int, byte_column: int = 0) -> Dict[str, Any]:
+    index = line_index(content)
+    return index.location(index.offset_at(line, byte_column))
+
+
+def file_location() -> Dict[str, Any]:
+    """Location of findings about a whole file (hashes, entropy): its first line."""
+    return {"line": 1, "column": 1, "offset": 0, "byte_offset": 0, "length": 0}
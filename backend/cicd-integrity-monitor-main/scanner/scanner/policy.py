@@ -6,28 +6,43 @@ import re
 
 from typing import List, Dict, Any
 
+from scanner.scanner.scoring import RiskScorer, scoring_config
+
+# per-path whitelist decisions kept before the memo is reset
+FILE_MEMO_LIMIT = 65536
+
+
+DEFAULT_POLICY = {
+    "whitelist_files": [],
+    "whitelist_rules": [],
+    "whitelist_detectors": [],
+    "whitelist_patterns": [],
+    "whitelist_enabled": True,
+}
+
 
 class PolicyEngine:
-    def __init__(self, policy_path=None):
+    def __init__(self, policy_path=None, policy=None, version=None):
         # default policy path
         self.policy_path = policy_path or os.path.join(
             os.getcwd(), "policies", "default_policy.json"
         )
+        # an in-memory policy (e.g. from PolicyStore) takes precedence over the file
+        self._source = policy
+        self.version = version
         self.policy = self._load_policy()
+        self._compile()
 
     def _load_policy(self) -> Dict[str, Any]:
-        try:
-            with open(self.policy_path, "r", encoding="utf-8") as fh:
-                p = json.load(fh)
-        except Exception:
-            # fallback policy
-            p = {
-                "whitelist_files": [],
-                "whitelist_rules": [],
-                "whitelist_detectors": [],
-                "whitelist_patterns": [],
-                "whitelist_enabled": True,
-            }
+        if self._source is not None:
+            p = dict(self._source)
+        else:
+            try:
+                with open(self.policy_path, "r", encoding="utf-8") as fh:
+                    p = json.load(fh)
+            except Exception:
+                # fallback policy
+                p = dict(DEFAULT_POLICY)
 
         # compile regex patterns
         patterns = p.get("whitelist_patterns", [])
@@ -35,28 +50,49 @@ class PolicyEngine:
 
         return p
 
+    def _compile(self):
+        """
+        Compile the whitelist once: every glob joined into one regex, rules and
+        detectors as frozensets, and a memo of file decisions (findings repeat
+        the same path many times).
+        """
+        globs = []
+        for pattern in self.policy.get("whitelist_files", []):
+            if not isinstance(pattern, str) or not pattern:
+                continue
+            try:
+                # fnmatch.fnmatch() normcases the pattern (and the name) before matching
+                regex = fnmatch.translate(os.path.normcase(pattern))
+                re.compile(regex)
+            except (re.error, TypeError):
+                continue
+            globs.append(f"(?:{regex})")
+        self._file_glob = re.compile("|".join(globs)) if globs else None
+        self._file_patterns = tuple(self.policy.get("_compiled_patterns", []))
+        # empty ids never match (same as is_rule_whitelisted / is_detector_whitelisted)
+        self._rules = frozenset(r for r in self.policy.get("whitelist_rules", []) or () if r)
+        self._detectors = frozenset(d for d in self.policy.get("whitelist_detectors", []) or () if d)
+        self._file_memo: Dict[str, bool] = {}
+        self.scoring = scoring_config(self.policy.get("scoring"))
+
     def reload(self):
         self.policy = self._load_policy()
+        self._compile()
 
     # ------------------------------------------------------------------
-    # NEW: More accurate static rule scoring (raw)
+    # Weighted risk scoring (see scoring.py; tuned by the policy "scoring" section)
     # ------------------------------------------------------------------
+    def scorer(self) -> RiskScorer:
+        return RiskScorer(self.scoring)
+
     def score_findings(self, findings: List[dict]) -> int:
-        total = 0
-        for f in findings:
-            total += int(f.get("score", 0) or 0)
-        return int(total)
+        return self.scorer().add_all(findings).total()
 
     # ------------------------------------------------------------------
-    # NEW: Risk action thresholds
-    # These now work with your weighted risk score (0–100)
+    # Risk action thresholds (0–100 weighted risk score)
     # ------------------------------------------------------------------
     def get_action(self, risk_score: float) -> str:
-        if risk_score >= 60:
-            return "fail"
-        if risk_score >= 30:
-            return "warn"
-        return "allow"
+        return self.scorer().action(risk_score)
 
     # ------------------------------------------------------------------
     # -------------------- WHITELIST SUPPORT ----------------------------
@@ -65,18 +101,28 @@ class PolicyEngine:
         if not file_path:
             return False
 
-        # filename glob patterns
-        for pattern in self.policy.get("whitelist_files", []):
-            try:
-                if fnmatch.fnmatch(file_path, pattern) or fnmatch.fnmatch(
-                    os.path.normpath(file_path), pattern
-                ):
-                    return True
-            except Exception:
-                continue
+        cached = self._file_memo.get(file_path)
+        if cached is not None:
+            return cached
+
+        result = self._match_file(file_path)
+        if len(self._file_memo) >= FILE_MEMO_LIMIT:
+            self._file_memo.clear()
+        self._file_memo[file_path] = result
+        return result
+
+    def _match_file(self, file_path: str) -> bool:
+        # filename glob patterns (same semantics as fnmatch on the raw and normalized path)
+        if self._file_glob is not None:
+            name = os.path.normcase(file_path)
+            if self._file_glob.match(name):
+                return True
+            normalized = os.path.normcase(os.path.normpath(file_path))
+            if normalized != name and self._file_glob.match(normalized):
+                return True
 
         # regex patterns
-        for cre in self.policy.get("_compiled_patterns", []):
+        for cre in self._file_patterns:
             if cre.search(file_path):
                 return True
 
@@ -85,33 +131,46 @@ class PolicyEngine:
     def is_rule_whitelisted(self, rule_id: str) -> bool:
         if not rule_id:
             return False
-        return rule_id in self.policy.get("whitelist_rules", [])
+        return rule_id in self._rules
 
     def is_detector_whitelisted(self, detector_name: str) -> bool:
         if not detector_name:
             return False
-        return detector_name in self.policy.get("whitelist_detectors", [])
+        return detector_name in self._detectors
+
+    # ------------------------------------------------------------------
+    # Early evaluation: lets the engine skip work the whitelist would discard
+    # ------------------------------------------------------------------
+    @property
+    def whitelist_enabled(self) -> bool:
+        return bool(self.policy.get("whitelist_enabled", True))
+
+    def skips_detector(self, detector_name: str) -> bool:
+        return self.whitelist_enabled and self.is_detector_whitelisted(detector_name)
+
+    def skips_file(self, file_path: str) -> bool:
+        return self.whitelist_enabled and self.is_file_whitelisted(file_path)
+
+    def excluded_rules(self) -> frozenset:
+        return self._rules if self.whitelist_enabled else frozenset()
 
     # ------------------------------------------------------------------
     # NEW: apply whitelist before scoring
     # ------------------------------------------------------------------
     def filter_whitelisted(self, findings: List[dict]) -> List[dict]:
-        if not self.policy.get("whitelist_enabled", True):
+        if not self.whitelist_enabled:
             return findings
 
         output = []
+        rules, detectors = self._rules, self._detectors
 
         for f in findings:
-            file_path = f.get("file") or f.get("filepath") or ""
-            rule_id = f.get("id") or ""
-            detector = f.get("detector") or ""
-
-            # skip if whitelisted
-            if self.is_detector_whitelisted(detector):
+            # skip if whitelisted (cheapest checks first)
+            if f.get("detector") in detectors:
                 continue
-            if self.is_rule_whitelisted(rule_id):
+            if f.get("id") in rules:
                 continue
-            if self.is_file_whitelisted(file_path):
+            if self.is_file_whitelisted(f.get("file") or f.get("filepath") or ""):
                 continue
 
             output.append(f)
@@ -0,0 +1,262 @@
+# scanner/scanner/policy_store.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+from scanner.scanner.policy import DEFAULT_POLICY, PolicyEngine
+
+DEFAULT_REPO = "default"
+
+# columns the store relies on; the table itself comes from api/migrations
+REQUIRED_COLUMNS = {"repo", "policy_json", "version"}
+
+
+class PolicySchemaError(RuntimeError):
+    """Raised when the policies table is missing or predates the version column."""
+
+
+class PolicyConflict(Exception):
+    """Raised when a write's expected version is no longer current."""
+
+    def __init__(self, repo, expected, current):
+        super().__init__(f"policy for {repo!r} is at version {current}, expected {expected}")
+        self.repo = repo
+        self.expected = expected
+        self.current = current
+
+
+class PolicyStore:
+    """
+    Versioned per-repo policies in the ``policies`` table.
+
+    Every write gives the row a new ``version`` (one increasing sequence
+    across all repos). Readers keep compiled
+    PolicyEngine objects in memory and only re-read ``policy_json`` when the
+    version moves, which is a single indexed lookup checked at most every
+    ``check_interval`` seconds. Writers in the same process wake up
+    wait_for_change() callers immediately, and other processes (scanner
+    daemons, other API workers) see the new version on their next check.
+
+    A repo without its own row uses the ``default`` row, which is seeded from
+    ``seed_path`` (policies/default_policy.json) the first time the store
+    opens an empty table. The schema is owned by api/migrations
+    (``python run_migrations.py``); the store only checks it is current.
+    """
+
+    def __init__(self, db_path, seed_path=None, check_interval=2.0):
+        self.db_path = db_path
+        self.seed_path = seed_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        # called with the repo after every write from this process (async waiters)
+        self._listeners = []
+        # repo -> ((source repo, version), PolicyEngine, checked_at)
+        self._cache: Dict[str, Tuple[Tuple[str, int], PolicyEngine, float]] = {}
+        self._ensure_schema()
+
+    # ------------------------------------------------------------------
+    # connection / schema
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:  # commit / rollback
+                yield conn
+        finally:
+            conn.close()
+
+    def _ensure_schema(self):
+        if not os.path.exists(self.db_path):
+            raise PolicySchemaError(f"{self.db_path} does not exist; run python run_migrations.py")
+        with self._connect() as conn:
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(policies)")}
+            missing = REQUIRED_COLUMNS - columns
+            if missing:
+                raise PolicySchemaError(
+                    f"policies table in {self.db_path} is missing {', '.join(sorted(missing))}; "
+                    "run python run_migrations.py"
+                )
+            if conn.execute("SELECT 1 FROM policies WHERE repo = ?", (DEFAULT_REPO,)).fetchone() is None:
+                conn.execute(
+                    "INSERT OR IGNORE INTO policies (repo, policy_json, version) VALUES (?, ?, 1)",
+                    (DEFAULT_REPO, json.dumps(self._seed_policy())),
+                )
+
+    def _seed_policy(self):
+        if self.seed_path:
+            try:
+                with open(self.seed_path, "r", encoding="utf-8") as fh:
+                    return json.load(fh)
+            except Exception:
+                pass
+        return dict(DEFAULT_POLICY)
+
+    # ------------------------------------------------------------------
+    # reads
+    # ------------------------------------------------------------------
+    def _row(self, conn, repo):
+        row = conn.execute("SELECT repo, policy_json, version FROM policies WHERE repo = ?", (repo,)).fetchone()
+        if row is None and repo != DEFAULT_REPO:
+            row = conn.execute(
+                "SELECT repo, policy_json, version FROM policies WHERE repo = ?", (DEFAULT_REPO,)
+            ).fetchone()
+        return row
+
+    def get(self, repo=DEFAULT_REPO) -> Tuple[int, dict, str]:
+        """(version, policy dict, repo the policy came from — ``default`` if inherited)."""
+        with self._connect() as conn:
+            row = self._row(conn, repo)
+        if row is None:
+            return 0, dict(DEFAULT_POLICY), DEFAULT_REPO
+        return row["version"], json.loads(row["policy_json"] or "{}"), row["repo"]
+
+    def current(self, repo) -> Tuple[str, int]:
+        """(source repo, version) without loading policy_json."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT repo, version FROM policies WHERE repo IN (?, ?) ORDER BY repo = ? DESC LIMIT 1",
+                (repo, DEFAULT_REPO, repo),
+            ).fetchone()
+        return (row["repo"], row["version"]) if row else (DEFAULT_REPO, 0)
+
+    def version(self, repo=DEFAULT_REPO) -> int:
+        return self.current(repo)[1]
+
+    def versions(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            return {row["repo"]: row["version"] for row in conn.execute("SELECT repo, version FROM policies")}
+
+    def engine(self, repo=DEFAULT_REPO) -> PolicyEngine:
+        """
+        Compiled policy for ``repo``. The same object is returned until the
+        stored version changes, so callers can detect edits with an ``is`` check.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(repo)
+        if cached is not None and now - cached[2] < self.check_interval:
+            return cached[1]
+
+        current = self.current(repo)
+        if cached is not None and cached[0] == current:
+            with self._lock:
+                self._cache[repo] = (current, cached[1], now)
+            return cached[1]
+
+        version, policy, source = self.get(repo)
+        engine = PolicyEngine(policy=policy, version=version)
+        with self._lock:
+            self._cache[repo] = ((source, version), engine, now)
+        return engine
+
+    # ------------------------------------------------------------------
+    # writes
+    # ------------------------------------------------------------------
+    def put(self, repo, policy: dict, expected_version: Optional[int] = None) -> int:
+        """
+        Replace the policy for ``repo`` and return its new version. With
+        ``expected_version`` the write only succeeds if nobody else wrote in
+        between (PolicyConflict otherwise).
+        """
+        payload = json.dumps(policy)
+        with self._connect() as conn:
+            # take the write lock up front so the version check and the write are atomic
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT version FROM policies WHERE repo = ?", (repo,)).fetchone()
+            current = row["version"] if row else 0
+            if expected_version is not None and expected_version != current:
+                raise PolicyConflict(repo, expected_version, current)
+
+            # versions come from one table-wide sequence, so a deleted and
+            # re-created repo never reuses a version a reader has cached
+            new_version = conn.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM policies").fetchone()[0]
+            if row is None:
+                conn.execute(
+                    "INSERT INTO policies (repo, policy_json, version) VALUES (?, ?, ?)",
+                    (repo, payload, new_version),
+                )
+            else:
+                conn.execute(
+                    "UPDATE policies SET policy_json = ?, version = ?, updated_at = datetime('now') WHERE repo = ?",
+                    (payload, new_version, repo),
+                )
+
+        self._notify(repo)
+        return new_version
+
+    def update(self, repo, mutate: Callable[[dict], bool], retries=5) -> Tuple[int, dict, bool]:
+        """
+        Read-modify-write with optimistic retries. ``mutate`` edits the policy
+        dict in place and returns whether anything changed.
+        """
+        for _ in range(retries):
+            version, policy, source = self.get(repo)
+            if not mutate(policy):
+                return version, policy, False
+            # a repo inheriting the default gets its own row on first write
+            expected = version if source == repo else 0
+            try:
+                return self.put(repo, policy, expected_version=expected), policy, True
+            except PolicyConflict:
+                continue
+        raise PolicyConflict(repo, None, self.version(repo))
+
+    def delete(self, repo) -> bool:
+        if repo == DEFAULT_REPO:
+            raise ValueError("the default policy cannot be deleted")
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            next_version = conn.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM policies").fetchone()[0]
+            deleted = conn.execute("DELETE FROM policies WHERE repo = ?", (repo,)).rowcount
+            if deleted:
+                # the repo now resolves to the default row; moving that row past
+                # the old maximum keeps the sequence from ever handing out the
+                # deleted version again (and reports the fallback as a change)
+                conn.execute("UPDATE policies SET version = ? WHERE repo = ?", (next_version, DEFAULT_REPO))
+        if deleted:
+            self._notify(DEFAULT_REPO)
+        return bool(deleted)
+
+    # ------------------------------------------------------------------
+    # change notification
+    # ------------------------------------------------------------------
+    def _notify(self, repo):
+        with self._changed:
+            self._cache.pop(repo, None)
+            if repo == DEFAULT_REPO:
+                # repos inheriting the default must re-check too
+                self._cache.clear()
+            self._changed.notify_all()
+        for listener in list(self._listeners):
+            listener(repo)
+
+    def add_listener(self, callback: Callable[[str], None]):
+        """Call ``callback(repo)`` after each write from this process, from the writing thread."""
+        self._listeners.append(callback)
+
+    def wait_for_change(self, repo, since: int, timeout=30.0) -> int:
+        """
+        Block until the version of ``repo`` differs from ``since`` or the
+        timeout expires, and return the current version. Writes from this
+        process wake waiters at once; other processes' writes are picked up
+        by re-checking every ``check_interval`` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        source = None
+        while True:
+            current_source, current = self.current(repo)
+            source = source or current_source
+            remaining = deadline - time.monotonic()
+            # a deleted override falls back to the default row, which is a change too
+            if current != since or current_source != source or remaining <= 0:
+                return current
+            with self._changed:
+                self._changed.wait(min(remaining, self.check_interval))
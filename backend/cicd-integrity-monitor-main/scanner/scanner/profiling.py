@@ -0,0 +1,73 @@
+# scanner/scanner/profiling.py
+
+import heapq
+import time
+
+
+class ScanProfile:
+    """
+    Timing collected by ScannerEngine.scan_path and stored in report["meta"]["profile"].
+
+    Cheap enough to stay on: one perf_counter() pair per detector call and a
+    bounded heap for the slowest files.
+    """
+
+    def __init__(self, top_n=10):
+        self.top_n = top_n
+        self.started = time.perf_counter()
+        self.detectors = {}
+        self.skipped = {}
+        self.files_scanned = 0
+        self.bytes_read = 0
+        self._slowest = []  # min-heap of (seconds, path, bytes, slowest detector)
+
+    def skip(self, reason, count=1):
+        self.skipped[reason] = self.skipped.get(reason, 0) + count
+
+    def record_detector(self, name, filepath, seconds):
+        stats = self.detectors.get(name)
+        if stats is None:
+            stats = self.detectors[name] = {"seconds": 0.0, "files": 0, "max_seconds": 0.0, "max_file": None}
+        stats["seconds"] += seconds
+        stats["files"] += 1
+        if seconds > stats["max_seconds"]:
+            stats["max_seconds"] = seconds
+            stats["max_file"] = filepath
+
+    def record_file(self, filepath, seconds, size, detector_times):
+        self.files_scanned += 1
+        self.bytes_read += size
+        slowest = max(detector_times, key=detector_times.get) if detector_times else None
+        entry = (seconds, filepath, size, slowest)
+        if len(self._slowest) < self.top_n:
+            heapq.heappush(self._slowest, entry)
+        elif entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def to_dict(self, extra=None):
+        wall = time.perf_counter() - self.started
+        detectors = {
+            name: {
+                "seconds": round(s["seconds"], 6),
+                "files": s["files"],
+                "avg_ms": round(s["seconds"] * 1000 / s["files"], 3) if s["files"] else 0.0,
+                "max_ms": round(s["max_seconds"] * 1000, 3),
+                "max_file": s["max_file"],
+            }
+            for name, s in sorted(self.detectors.items(), key=lambda item: -item[1]["seconds"])
+        }
+        data = {
+            "wall_seconds": round(wall, 6),
+            "files_scanned": self.files_scanned,
+            "bytes_read": self.bytes_read,
+            "files_per_second": round(self.files_scanned / wall, 2) if wall else None,
+            "skipped": dict(self.skipped),
+            "detectors": detectors,
+            "slowest_files": [
+                {"file": path, "ms": round(seconds * 1000, 3), "bytes": size, "slowest_detector": det}
+                for seconds, path, size, det in sorted(self._slowest, reverse=True)
+            ],
+        }
+        if extra:
+            data.update(extra)
+        return data
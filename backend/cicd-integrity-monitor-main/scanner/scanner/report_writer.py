@@ -0,0 +1,202 @@
+# scanner/scanner/report_writer.py
+
+import json
+import os
+import re
+
+# --format choices; the value is the file extension written
+REPORT_FORMATS = {"json": ".json", "compact": ".json", "ndjson": ".ndjson"}
+
+# opening of every JSON report StreamingReportWriter writes (findings come first)
+_FINDINGS_START = re.compile(r'\s*\{\s*"findings"\s*:\s*\[')
+
+# timestamped history copies kept per extension when no catalog owns them
+HISTORY_KEEP = 50
+
+# NDJSON lines carry a "record" key ("start", "finding", "summary"); findings
+# already use "type" for their own classification.
+RECORD_KEY = "record"
+
+
+class StreamingReportWriter:
+    """
+    Writes a scan report while the scan runs, one finding at a time, so the
+    engine does not have to keep findings in memory.
+
+    json     findings one per line inside a regular JSON document (indented trailer)
+    compact  same document without whitespace
+    ndjson   one JSON object per line: a start record, each finding as it is
+             found (flushed, so the file can be tailed) and a summary record
+
+    JSON documents are only valid once complete, so they are written to
+    ``<path>.part`` and renamed on close; NDJSON is written in place.
+    raw_findings are never duplicated into the stream; the summary includes
+    them only when the result carries them (audit mode).
+    """
+
+    def __init__(self, path, fmt="json"):
+        if fmt not in REPORT_FORMATS:
+            raise ValueError(f"unknown report format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.count = 0
+        self.by_detector = {}
+        self._separators = (",", ":") if fmt == "compact" else (", ", ": ")
+        self._target = path if fmt == "ndjson" else path + ".part"
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._fh = open(self._target, "w", encoding="utf-8")
+
+    def _dumps(self, obj, indent=None):
+        return json.dumps(obj, separators=self._separators if indent is None else None, indent=indent, default=str)
+
+    def start(self, meta):
+        if self.fmt == "ndjson":
+            self._fh.write(self._dumps({RECORD_KEY: "start", "meta": meta}) + "\n")
+            self._fh.flush()
+        else:
+            self._fh.write('{"findings": [' if self.fmt == "compact" else '{\n  "findings": [')
+        return self
+
+    def add(self, finding):
+        det = finding.get("detector", "unknown")
+        self.by_detector[det] = self.by_detector.get(det, 0) + 1
+
+        if self.fmt == "ndjson":
+            self._fh.write(self._dumps({RECORD_KEY: "finding", **finding}) + "\n")
+            self._fh.flush()
+        elif self.fmt == "compact":
+            self._fh.write(("," if self.count else "") + self._dumps(finding))
+        else:
+            self._fh.write(("," if self.count else "") + "\n    " + self._dumps(finding))
+        self.count += 1
+
+    def close(self, result):
+        """Write everything except the findings (already streamed) and finish the file."""
+        trailer = {k: v for k, v in result.items() if k != "findings"}
+        trailer["findings_count"] = self.count
+
+        if self.fmt == "ndjson":
+            self._fh.write(self._dumps({RECORD_KEY: "summary", **trailer}) + "\n")
+        elif self.fmt == "compact":
+            rest = self._dumps(trailer)[1:]  # drop the opening brace
+            self._fh.write("]" + ("," + rest if rest != "}" else "}"))
+        else:
+            rest = json.dumps(trailer, indent=2, default=str)[1:]
+            self._fh.write(("\n  ]" if self.count else "]") + ("," + rest if rest.strip() != "}" else "\n}"))
+            self._fh.write("\n")
+
+        self._fh.close()
+        if self._target != self.path:
+            os.replace(self._target, self.path)
+        return self.path
+
+    def abort(self):
+        self._fh.close()
+        if self._target != self.path and os.path.exists(self._target):
+            os.remove(self._target)
+
+
+def write_report(result, path, fmt="json"):
+    """Write an in-memory result with the same layout as a streamed one."""
+    # the full meta (with the profile) goes in the trailer, as when streaming
+    writer = StreamingReportWriter(path, fmt).start({"path": result.get("meta", {}).get("path")})
+    for finding in result.get("findings", []):
+        writer.add(finding)
+    return writer.close(result)
+
+
+def load_report(path):
+    """Read a JSON or NDJSON report back into a single result dict."""
+    if not path.endswith(".ndjson"):
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+
+    result = {"findings": []}
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            kind = record.pop(RECORD_KEY, None)
+            if kind == "finding":
+                result["findings"].append(record)
+            elif kind == "start":
+                result.setdefault("meta", record.get("meta", {}))
+            elif kind == "summary":
+                result.update(record)
+    return result
+
+
+def iter_findings(path, chunk_size=1 << 16):
+    """
+    Yield the findings of a report on disk one at a time, so a --stream scan
+    can be uploaded without loading it back into memory. JSON reports are
+    decoded incrementally; files not written by StreamingReportWriter fall
+    back to a full load.
+    """
+    if path.endswith(".ndjson"):
+        with open(path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.pop(RECORD_KEY, None) == "finding":
+                    yield record
+        return
+
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as fh:
+        buf = fh.read(chunk_size)
+        match = _FINDINGS_START.match(buf)
+        if not match:
+            fh.seek(0)
+            yield from json.load(fh).get("findings", [])
+            return
+
+        pos = match.end()
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            try:
+                if pos == len(buf):
+                    raise ValueError("need more data")
+                finding, pos = decoder.raw_decode(buf, pos)
+            except ValueError:
+                more = fh.read(chunk_size)
+                if not more:
+                    raise ValueError(f"truncated report: {path}")
+                buf, pos = buf[pos:] + more, 0
+                continue
+            yield finding
+
+
+def prune_history(reports_dir, prefix, keep=None):
+    """
+    Delete all but the newest ``keep`` timestamped ``<prefix>_<stamp>`` copies
+    per extension (and their .br/.gz siblings). For runs without a report
+    catalog; with one, the backend prunes files and catalog rows together.
+    ``keep`` defaults to REPORT_HISTORY_KEEP from the environment.
+    """
+    if keep is None:
+        keep = int(os.environ.get("REPORT_HISTORY_KEEP") or HISTORY_KEEP)
+    by_ext = {}
+    with os.scandir(reports_dir) as entries:
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            if stem.startswith(prefix + "_") and ext in (".json", ".ndjson", ".html", ".sarif") and entry.is_file():
+                by_ext.setdefault(ext, []).append(entry.name)
+
+    removed = 0
+    for names in by_ext.values():
+        # stamps start with %Y%m%d-%H%M%S, so names sort by age
+        for name in sorted(names, reverse=True)[keep:]:
+            for path in (name, name + ".br", name + ".gz"):
+                try:
+                    os.remove(os.path.join(reports_dir, path))
+                except FileNotFoundError:
+                    pass
+            removed += 1
+    return removed
@@ -1,10 +1,16 @@
-import json
 import os
+import shutil
 import requests
+from datetime import datetime
 from rich.console import Console
 from rich.table import Table
 from jinja2 import Template
 
+from scanner.scanner.html_report import LAZY_HTML_THRESHOLD, LazyHtmlWriter, write_lazy_html
+from scanner.scanner.report_writer import REPORT_FORMATS, StreamingReportWriter, iter_findings, prune_history, write_report
+from scanner.scanner.sarif import SarifWriter, write_sarif
+from scanner.scanner.uploader import get_client
+
 # ------------------------------------------------------------------------------------
 # HTML TEMPLATE (card-style UI + modal + attack_type support)
 # ------------------------------------------------------------------------------------
@@ -185,6 +191,14 @@ function closeModal(index) {
         <span class="score-badge low">ALLOW</span>
     {% endif %}
     </p>
+    {% if breakdown %}
+    <p><b>Breakdown:</b> raw {{ breakdown.raw_total }}, weighted {{ breakdown.weighted_total }},
+       severity floor {{ breakdown.severity_floor }}, {{ breakdown.duplicates }} duplicate hits,
+       {{ breakdown.capped_files }} capped files</p>
+    <p><b>Top rules:</b>
+    {% for r in breakdown.top_rules %}{{ r.id }} ({{ r.hits }}× → {{ r.points }}){% if not loop.last %}, {% endif %}{% endfor %}
+    </p>
+    {% endif %}
 </div>
 
 <div class="cards">
@@ -219,9 +233,13 @@ function closeModal(index) {
                 <div class="attack-badge">Attack Detected: {{ f.attack_type }}</div>
             {% endif %}
 
-            <p><b>File:</b> {{ f.file }}</p>
+            <p><b>File:</b> {{ f.file }}{% if f.location %}:{{ f.location.line }}:{{ f.location.column }}{% endif %}</p>
             <p>{{ f.description }}</p>
 
+            {% if f.location and f.location.snippet %}
+            <pre>{{ f.location.snippet | e }}</pre>
+            {% endif %}
+
             {% if f.meta %}
             <h3>Metadata</h3>
             <pre>{{ f.meta | safe }}</pre>
@@ -238,26 +256,68 @@ function closeModal(index) {
 # ------------------------------------------------------------------------------------
 # AUTO-UPLOAD TO API
 # ------------------------------------------------------------------------------------
-def _post_to_api(json_file, html_file):
+def report_findings(result, json_file):
+    """
+    Findings of a finished scan for upload: the in-memory list, or an
+    iterator over the report file when they were streamed (--stream).
+    """
+    findings = result.get("findings") or []
+    if len(findings) < result.get("findings_count", len(findings)):
+        return iter_findings(json_file)
+    return findings
+
+
+def _post_to_api(result, json_file, html_file):
     api = os.environ.get("REPORT_API_URL")
     if not api:
         return
 
     try:
-        with open(json_file, "r", encoding="utf-8") as jf:
-            payload = json.load(jf)
+        # same client (and idempotency key) as the CLI's --api-url upload;
+        # findings and HTML are read from disk as they are sent
+        get_client(api, os.environ.get("REPORT_API_KEY")).upload(
+            result, findings=report_findings(result, json_file), html_path=html_file,
+        )
+
+    except Exception as e:
+        print(f"[WARN] Failed to upload report to API: {e}")
+
 
-        try:
-            with open(html_file, "r", encoding="utf-8") as hf:
-                payload["report_html"] = hf.read()
-        except:
-            payload["report_html"] = None
+# ------------------------------------------------------------------------------------
+# REPORT CATALOG REGISTRATION (PipelineX backend)
+# ------------------------------------------------------------------------------------
+def _report_summary(result, by_detector=None):
+    if by_detector is None:
+        by_detector = {}
+        for f in result.get("findings", []):
+            det = f.get("detector", "unknown")
+            by_detector[det] = by_detector.get(det, 0) + 1
+    return {
+        "findings": result.get("findings_count", len(result.get("findings", []))),
+        "score": result.get("score"),
+        "action": result.get("action"),
+        "by_detector": by_detector,
+    }
 
-        url = api.rstrip("/") + "/incidents"
-        requests.post(url, json=payload, timeout=10)
 
+def _register_report(path, fmt, summary):
+    """Record a written report in the backend catalog (REPORT_CATALOG_URL, set by the build runner)."""
+    api = os.environ.get("REPORT_CATALOG_URL")
+    if not api:
+        return
+
+    build_id = os.environ.get("PIPELINEX_BUILD_ID")
+    payload = {
+        "scanner": "integrity_scanner",
+        "path": os.path.abspath(path),
+        "format": fmt,
+        "build_id": int(build_id) if build_id and build_id.isdigit() else None,
+        "summary": summary,
+    }
+    try:
+        requests.post(api, json=payload, timeout=5)
     except Exception as e:
-        print(f"[WARN] Failed to upload report to API: {e}")
+        print(f"[WARN] Failed to register report in catalog: {e}")
 
 
 # ------------------------------------------------------------------------------------
@@ -271,9 +331,21 @@ class Reporter:
         console.print("[bold cyan]CI/CD Integrity Scanner Report[/bold cyan]\n")
 
         console.print(f"[bold]Path:[/bold] {result['meta']['path']}")
-        console.print(f"[bold]Score:[/bold] {result['score']}   [bold]Action:[/bold] {result['action']}\n")
+        console.print(f"[bold]Score:[/bold] {result['score']}   [bold]Action:[/bold] {result['action']}")
+        breakdown = result.get("score_breakdown")
+        if breakdown:
+            console.print(
+                f"[dim]raw {breakdown['raw_total']} → weighted {breakdown['weighted_total']} "
+                f"(floor {breakdown['severity_floor']}, {breakdown['duplicates']} duplicates, "
+                f"{breakdown['capped_files']} capped files)  top rules: "
+                + ", ".join(f"{r['id']}×{r['hits']}={r['points']}" for r in breakdown["top_rules"][:5])
+                + "[/dim]"
+            )
+        console.print()
 
         findings = result.get("findings", [])
+        if not findings and result.get("findings_count"):
+            console.print(f"{result['findings_count']} findings were streamed to the report file\n")
 
         # STATIC FINDINGS
         normal = [f for f in findings if not f["detector"].startswith("ml_")]
@@ -316,35 +388,153 @@ class Reporter:
 
             console.print(table)
 
+        Reporter.print_profile(result, console)
+
     @staticmethod
-    def write_reports(result, out_json="report.json", out_html="report.html"):
+    def print_profile(result, console=None):
+        profile = result.get("meta", {}).get("profile")
+        if not profile:
+            return
+        console = console or Console()
+
+        git = profile.get("git_subprocess", {})
+        console.print(
+            f"\n[bold cyan]Scan Profile[/bold cyan]  "
+            f"{profile['files_scanned']} files, {profile['bytes_read'] / 1e6:.2f} MB in {profile['wall_seconds']:.2f}s "
+            f"({profile.get('files_per_second') or 0} files/s)  "
+            f"git: {git.get('calls', 0)} calls / {git.get('seconds', 0):.2f}s  "
+            f"policy: {profile.get('policy_seconds', 0):.3f}s"
+        )
+        if profile.get("skipped"):
+            console.print("[bold]Skipped:[/bold] " + ", ".join(f"{k}={v}" for k, v in profile["skipped"].items()))
+
+        table = Table(show_header=True, header_style="bold cyan")
+        table.add_column("Detector")
+        table.add_column("Total (s)", justify="right")
+        table.add_column("Avg (ms/file)", justify="right")
+        table.add_column("Max (ms)", justify="right")
+        table.add_column("Slowest file")
+        for name, d in profile.get("detectors", {}).items():
+            table.add_row(name, f"{d['seconds']:.3f}", f"{d['avg_ms']:.3f}", f"{d['max_ms']:.1f}", str(d["max_file"]))
+        console.print(table)
+
+        if profile.get("slowest_files"):
+            table = Table(show_header=True, header_style="bold cyan", title="Slowest files")
+            table.add_column("File")
+            table.add_column("ms", justify="right")
+            table.add_column("Bytes", justify="right")
+            table.add_column("Slowest detector")
+            for f in profile["slowest_files"]:
+                table.add_row(f["file"], f"{f['ms']:.1f}", str(f["bytes"]), str(f["slowest_detector"]))
+            console.print(table)
+
+    @staticmethod
+    def reports_dir():
         """
         Always write reports to:
         D:/ai-cicd-security-tool/backend/scan_reports/
         """
         reports_dir = r"D:\ai-cicd-security-tool\backend\scan_reports"
         os.makedirs(reports_dir, exist_ok=True)
+        return reports_dir
 
-        out_json_path = os.path.join(reports_dir, "report.json")
+    @staticmethod
+    def open_stream(fmt="json"):
+        """Writer for the latest report, to pass findings to while the scan runs (see write_reports)."""
+        path = os.path.join(Reporter.reports_dir(), "report" + REPORT_FORMATS[fmt])
+        return StreamingReportWriter(path, fmt)
+
+    @staticmethod
+    def open_html_stream():
+        """Lazy HTML report fed while the scan runs (pair with open_stream)."""
+        return LazyHtmlWriter(os.path.join(Reporter.reports_dir(), "report.html"))
+
+    @staticmethod
+    def open_sarif_stream(root):
+        """SARIF log fed while the scan runs (pair with open_stream)."""
+        return SarifWriter(os.path.join(Reporter.reports_dir(), "report.sarif"), root).start()
+
+    @staticmethod
+    def write_reports(result, out_json="report.json", out_html="report.html", fmt="json", stream=None,
+                      html_stream=None, html_mode="auto", sarif=False, sarif_stream=None):
+        """
+        Write the JSON (json / compact / ndjson) and HTML reports plus
+        timestamped history copies. With ``stream`` / ``html_stream`` /
+        ``sarif_stream`` (from the open_* helpers) the findings are already on
+        disk and only the summary is appended.
+
+        html_mode: "cards" (one card per finding), "lazy" (embedded data
+        rendered client-side) or "auto" (lazy above LAZY_HTML_THRESHOLD findings).
+        sarif: also write report.sarif (SARIF 2.1.0); implied by ``sarif_stream``.
+        """
+        reports_dir = Reporter.reports_dir()
+        ext = REPORT_FORMATS[stream.fmt if stream else fmt]
+        fmt_label = "NDJSON" if ext == ".ndjson" else "JSON"
+
+        out_json_path = os.path.join(reports_dir, "report" + ext)
         out_html_path = os.path.join(reports_dir, "report.html")
 
+        # Timestamped copies keep the history; report.json/html stay the latest.
+        # The scan id keeps two scans finishing in the same second apart.
+        scan_id = (result.get("meta") or {}).get("scan_id")
+        now = datetime.now()
+        stamp = now.strftime("%Y%m%d-%H%M%S-") + (scan_id[:12] if scan_id else now.strftime("%f"))
+        hist_json_path = os.path.join(reports_dir, f"report_{stamp}{ext}")
+        hist_html_path = os.path.join(reports_dir, f"report_{stamp}.html")
+
         # Write JSON
-        with open(out_json_path, "w", encoding="utf-8") as f:
-            json.dump(result, f, indent=2)
+        if stream is not None:
+            out_json_path = stream.close(result)
+            by_detector = stream.by_detector
+        else:
+            write_report(result, out_json_path, fmt)
+            by_detector = None
 
-        # Generate HTML
-        html = Template(HTML_TEMPLATE).render(
-            meta=result["meta"],
-            score=result["score"],
-            action=result["action"],
-            findings=result["findings"]
-        )
+        written = [out_json_path, hist_json_path]
+        shutil.copyfile(out_json_path, hist_json_path)
 
-        with open(out_html_path, "w", encoding="utf-8") as f:
-            f.write(html)
+        # Generate HTML
+        if html_stream is not None:
+            html_stream.close(result)
+        elif html_mode == "lazy" or (html_mode == "auto" and len(result["findings"]) > LAZY_HTML_THRESHOLD):
+            write_lazy_html(result, out_html_path)
+        else:
+            html = Template(HTML_TEMPLATE).render(
+                meta=result["meta"],
+                score=result["score"],
+                action=result["action"],
+                findings=result["findings"],
+                breakdown=result.get("score_breakdown"),
+            )
+
+            with open(out_html_path, "w", encoding="utf-8") as f:
+                f.write(html)
+        shutil.copyfile(out_html_path, hist_html_path)
+        written += [out_html_path, hist_html_path]
+
+        # Generate SARIF
+        hist_sarif_path = None
+        if sarif or sarif_stream is not None:
+            out_sarif_path = os.path.join(reports_dir, "report.sarif")
+            hist_sarif_path = os.path.join(reports_dir, f"report_{stamp}.sarif")
+            if sarif_stream is not None:
+                sarif_stream.close(result)
+            else:
+                write_sarif(result, out_sarif_path)
+            shutil.copyfile(out_sarif_path, hist_sarif_path)
+            written += [out_sarif_path, hist_sarif_path]
+
+        summary = _report_summary(result, by_detector)
+        _register_report(hist_json_path, fmt_label, summary)
+        _register_report(hist_html_path, "HTML", summary)
+        if hist_sarif_path:
+            _register_report(hist_sarif_path, "SARIF", summary)
+        if not os.environ.get("REPORT_CATALOG_URL"):
+            # the catalog prunes its own entries; otherwise keep the directory bounded here
+            prune_history(reports_dir, "report")
 
         # Optional upload
-        _post_to_api(out_json_path, out_html_path)
+        _post_to_api(result, out_json_path, out_html_path)
 
-        print(f"[INFO] Reports written to:\n{out_json_path}\n{out_html_path}")
+        print(f"[INFO] Reports written to:\n" + "\n".join(written[::2]))
         return out_json_path, out_html_path
@@ -0,0 +1,219 @@
+# scanner/scanner/sarif.py
+
+import json
+import os
+from pathlib import Path
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_VERSION = "2.1.0"
+TOOL_NAME = "cicd-integrity-scanner"
+SRCROOT = "SRCROOT"
+
+# finding keys mapped onto SARIF fields; everything else goes in result.properties
+MAPPED_KEYS = {"detector", "file", "id", "type", "score", "description", "location"}
+
+
+def sarif_level(score):
+    """Same cut-offs as the HTML report badges."""
+    score = score or 0
+    if score >= 7:
+        return "error"
+    if score >= 4:
+        return "warning"
+    return "note"
+
+
+def _region(finding):
+    """SARIF region from a finding's location (or a numeric meta.line), None if unknown."""
+    location = finding.get("location") or {}
+    line = location.get("line")
+    if line is None:
+        meta_line = (finding.get("meta") or {}).get("line")
+        # some detectors put the matched diff text in meta.line, not a number
+        line = meta_line if isinstance(meta_line, int) else None
+    if not line or line < 1:
+        return None
+
+    region = {"startLine": line}
+    if location.get("column"):
+        region["startColumn"] = location["column"]
+    if location.get("end_line"):
+        region["endLine"] = location["end_line"]
+    if location.get("snippet"):
+        region["snippet"] = {"text": location["snippet"]}
+    return region
+
+
+def rule_description(detector, name):
+    """
+    Generic text for a rule. One rule id covers many patterns (e.g.
+    signature_detector/malicious_regex_match), so the matched pattern belongs
+    in each result's message, not in the rule.
+    """
+    return f"{name.replace('_', ' ').capitalize()} ({detector})"
+
+
+class SarifWriter:
+    """
+    SARIF 2.1.0 log written one result at a time.
+
+    Rule metadata (description, detector, type, severity) is stored once in
+    ``tool.driver.rules``; results carry ``ruleIndex`` and their own message
+    (or a ``{"id": "default"}`` reference to the rule's messageStrings when
+    they have none). Since rules are only known once the scan has seen them,
+    the run object lists ``results`` before ``tool`` (key order is not
+    significant in SARIF). Only the rules are held in memory.
+
+    Like StreamingReportWriter the file is written to ``<path>.part`` and
+    renamed on close, so readers never see a truncated log.
+
+    Subclasses (PyGuard's embedding report) override the rule_id / make_rule /
+    level / message / region / result_properties / run_properties hooks for
+    their own finding shape.
+    """
+
+    tool_name = TOOL_NAME
+
+    def __init__(self, path, root=None):
+        self.path = path
+        self.root = os.path.abspath(root) if root else None
+        self.count = 0
+        self.rules = []
+        self._rule_index = {}
+        self._last_file = (None, None)
+        self._target = path + ".part"
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._fh = open(self._target, "w", encoding="utf-8")
+
+    def start(self):
+        self._fh.write('{\n  "$schema": ' + json.dumps(SARIF_SCHEMA) + ',\n  "version": "' + SARIF_VERSION + '",\n')
+        self._fh.write('  "runs": [{\n')
+        if self.root:
+            base = {SRCROOT: {"uri": Path(self.root).as_uri() + "/"}}
+            self._fh.write('    "originalUriBaseIds": ' + json.dumps(base) + ",\n")
+        self._fh.write('    "results": [')
+        return self
+
+    def _artifact(self, file_path):
+        # detectors report file by file, so the last lookup is almost always a hit
+        if self._last_file[0] == file_path:
+            return self._last_file[1]
+        full = os.path.abspath(file_path)
+        try:
+            under_root = bool(self.root) and os.path.commonpath([full, self.root]) == self.root
+        except ValueError:  # different drives on Windows
+            under_root = False
+        if under_root:
+            artifact = {"uri": Path(os.path.relpath(full, self.root)).as_posix(), "uriBaseId": SRCROOT}
+        else:
+            artifact = {"uri": Path(full).as_uri()}
+        self._last_file = (file_path, artifact)
+        return artifact
+
+    # ------------------------------------------------------------------
+    # hooks
+    # ------------------------------------------------------------------
+    def rule_id(self, finding):
+        return f"{finding.get('detector') or 'unknown'}/{finding.get('id') or 'unknown'}"
+
+    def make_rule(self, rule_id, finding):
+        detector = finding.get("detector") or "unknown"
+        name = finding.get("id") or "unknown"
+        description = rule_description(detector, name)
+        score = finding.get("score") or 0
+        return {
+            "id": rule_id,
+            "name": name,
+            "shortDescription": {"text": description},
+            "messageStrings": {"default": {"text": description}},
+            "defaultConfiguration": {"level": sarif_level(score)},
+            "properties": {
+                "detector": detector,
+                "type": finding.get("type"),
+                "score": score,
+                "security-severity": f"{float(score):.1f}",
+            },
+        }
+
+    def level(self, finding):
+        return sarif_level(finding.get("score"))
+
+    def message(self, finding, rule):
+        description = finding.get("description")
+        return {"text": description} if description else {"id": "default"}
+
+    def region(self, finding):
+        return _region(finding)
+
+    def result_properties(self, finding, rule):
+        properties = {k: v for k, v in finding.items() if k not in MAPPED_KEYS}
+        if finding.get("score") != rule["properties"]["score"]:
+            properties["score"] = finding.get("score")
+        return properties
+
+    def run_properties(self, result):
+        return {
+            "score": result.get("score"),
+            "action": result.get("action"),
+            "findings_count": self.count,
+            "policy_version": result.get("meta", {}).get("policy_version"),
+        }
+
+    # ------------------------------------------------------------------
+    # writing
+    # ------------------------------------------------------------------
+    def _rule(self, finding):
+        rule_id = self.rule_id(finding)
+        index = self._rule_index.get(rule_id)
+        if index is None:
+            index = self._rule_index[rule_id] = len(self.rules)
+            self.rules.append(self.make_rule(rule_id, finding))
+        return index
+
+    def add(self, finding):
+        index = self._rule(finding)
+        rule = self.rules[index]
+
+        location = {"artifactLocation": self._artifact(finding.get("file") or "")}
+        region = self.region(finding)
+        if region:
+            location["region"] = region
+
+        result = {
+            "ruleId": rule["id"],
+            "ruleIndex": index,
+            "level": self.level(finding),
+            "message": self.message(finding, rule),
+            "locations": [{"physicalLocation": location}],
+        }
+        properties = self.result_properties(finding, rule)
+        if properties:
+            result["properties"] = properties
+
+        self._fh.write(("," if self.count else "") + "\n      " + json.dumps(result, default=str))
+        self.count += 1
+
+    def close(self, result):
+        """Finish the results array and write the driver (with all rules seen) and run summary."""
+        self._fh.write("\n    ]," if self.count else "],")
+        driver = {"name": self.tool_name, "rules": self.rules}
+        self._fh.write('\n    "tool": {"driver": ' + json.dumps(driver, indent=2, default=str).replace("\n", "\n    ") + "},")
+        invocation = {"executionSuccessful": True, "properties": self.run_properties(result)}
+        self._fh.write('\n    "invocations": [' + json.dumps(invocation, default=str) + "]\n  }]\n}\n")
+        self._fh.close()
+        os.replace(self._target, self.path)
+        return self.path
+
+    def abort(self):
+        self._fh.close()
+        if os.path.exists(self._target):
+            os.remove(self._target)
+
+
+def write_sarif(result, path, root=None):
+    """SARIF log for an in-memory result, written the same way as a streamed one."""
+    writer = SarifWriter(path, root or result.get("meta", {}).get("path")).start()
+    for finding in result.get("findings", []):
+        writer.add(finding)
+    return writer.close(result)
@@ -0,0 +1,153 @@
+# scanner/scanner/scoring.py
+
+import copy
+from typing import Any, Dict, Optional
+
+# Policy "scoring" section; anything left out falls back to these values.
+DEFAULT_SCORING = {
+    # multiplier per rule id, then per detector name (default 1.0)
+    "rule_weights": {},
+    "detector_weights": {},
+    # the n-th hit of the same rule id anywhere in the repo counts decay**(n-1)
+    "repeat_decay": 0.5,
+    # points a single file can contribute
+    "file_cap": 25,
+    # final score is clamped to 0..max_score (get_action thresholds use this scale)
+    "max_score": 100,
+    # raw finding score -> severity (first band the score reaches)
+    "severity_bands": {"critical": 9, "high": 7, "medium": 4, "low": 0},
+    # one finding of this severity lifts the score to at least this value
+    "severity_floor": {"critical": 60, "high": 30},
+    "thresholds": {"fail": 60, "warn": 30},
+}
+
+# number of files / rules listed in the breakdown
+BREAKDOWN_TOP_N = 10
+
+
+def scoring_config(policy_section: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    config = copy.deepcopy(DEFAULT_SCORING)
+    for key, value in (policy_section or {}).items():
+        if isinstance(value, dict) and isinstance(config.get(key), dict):
+            config[key].update(value)
+        else:
+            config[key] = value
+    return config
+
+
+class RiskScorer:
+    """
+    Streaming risk score. Call add() for each (already whitelisted-filtered)
+    finding as detectors produce it; total() and breakdown() are O(files+rules).
+
+    A finding is worth ``score * weight``. Identical hits (same file, detector
+    and rule) count once, repeated hits of a rule decay geometrically across
+    the repo, each file contributes at most ``file_cap`` and the sum is
+    clamped to ``max_score``. Severity floors keep a single critical finding
+    from being averaged away by the caps.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config or scoring_config(None)
+        self.rule_weights = self.config["rule_weights"]
+        self.detector_weights = self.config["detector_weights"]
+        self.decay = float(self.config["repeat_decay"])
+        self.file_cap = float(self.config["file_cap"])
+        self.bands = sorted(self.config["severity_bands"].items(), key=lambda item: -item[1])
+
+        self._seen = set()
+        self._rule_hits: Dict[str, int] = {}
+        self._rule_points: Dict[str, float] = {}
+        self._file_points: Dict[str, float] = {}
+        self._capped_total = 0.0
+        self._floor_value = 0
+        self.raw_total = 0
+        self.findings = 0
+        self.duplicates = 0
+        self.severity_counts: Dict[str, int] = {}
+
+    def severity(self, raw_score) -> str:
+        for name, minimum in self.bands:
+            if raw_score >= minimum:
+                return name
+        return self.bands[-1][0] if self.bands else "low"
+
+    def weight(self, finding) -> float:
+        rule_id = finding.get("id")
+        if rule_id in self.rule_weights:
+            return float(self.rule_weights[rule_id])
+        return float(self.detector_weights.get(finding.get("detector"), 1.0))
+
+    def add(self, finding) -> float:
+        """Account for one finding and return the points it added."""
+        raw = int(finding.get("score", 0) or 0)
+        self.findings += 1
+        self.raw_total += raw
+        severity = self.severity(raw)
+        self.severity_counts[severity] = self.severity_counts.get(severity, 0) + 1
+
+        file_path = finding.get("file") or finding.get("filepath") or ""
+        rule_id = finding.get("id") or ""
+        key = (file_path, finding.get("detector"), rule_id)
+        if key in self._seen:
+            self.duplicates += 1
+            return 0.0
+        self._seen.add(key)
+
+        weight = self.weight(finding)
+        if weight > 0:
+            # a rule weighted to 0 is muted entirely, floor included
+            floor = self.config["severity_floor"].get(severity, 0)
+            self._floor_value = max(self._floor_value, floor)
+
+        hits = self._rule_hits.get(rule_id, 0)
+        self._rule_hits[rule_id] = hits + 1
+        points = raw * weight * (self.decay ** hits)
+        self._rule_points[rule_id] = self._rule_points.get(rule_id, 0.0) + points
+
+        before = self._file_points.get(file_path, 0.0)
+        after = before + points
+        self._file_points[file_path] = after
+        added = min(after, self.file_cap) - min(before, self.file_cap)
+        self._capped_total += added
+        return added
+
+    def add_all(self, findings):
+        for f in findings:
+            self.add(f)
+        return self
+
+    def total(self) -> int:
+        score = max(self._capped_total, self._floor_value)
+        return int(round(min(score, float(self.config["max_score"]))))
+
+    def action(self, score=None) -> str:
+        score = self.total() if score is None else score
+        thresholds = self.config["thresholds"]
+        if score >= thresholds["fail"]:
+            return "fail"
+        if score >= thresholds["warn"]:
+            return "warn"
+        return "allow"
+
+    def breakdown(self) -> Dict[str, Any]:
+        top_files = sorted(self._file_points.items(), key=lambda item: -item[1])[:BREAKDOWN_TOP_N]
+        top_rules = sorted(self._rule_points.items(), key=lambda item: -item[1])[:BREAKDOWN_TOP_N]
+        return {
+            "raw_total": self.raw_total,
+            "weighted_total": round(self._capped_total, 2),
+            "severity_floor": self._floor_value,
+            "findings": self.findings,
+            "duplicates": self.duplicates,
+            "capped_files": sum(1 for p in self._file_points.values() if p > self.file_cap),
+            "severity": dict(self.severity_counts),
+            "top_files": [
+                {"file": path, "points": round(min(p, self.file_cap), 2), "uncapped": round(p, 2)}
+                for path, p in top_files
+            ],
+            "top_rules": [
+                {"id": rule_id, "hits": self._rule_hits[rule_id], "points": round(p, 2)}
+                for rule_id, p in top_rules
+            ],
+            "model": {k: self.config[k] for k in ("repeat_decay", "file_cap", "max_score", "severity_floor", "thresholds")},
+        }
@@ -1,14 +1,194 @@
+# scanner/scanner/uploader.py
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from itertools import chain, islice
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# reports with more findings than this are sent in chunks of this size
+CHUNK_FINDINGS = 2000
+
+# HTML reports larger than this (characters) are sent in slices of this size
+CHUNK_HTML = 1024 * 1024
+
+# (connect, read) seconds per request; chunking keeps each request small
+TIMEOUT = (5, 60)
+
+
+class UploadError(Exception):
+    pass
+
+
+def _batches(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _html_slices(report_html, html_path, size):
+    if html_path is not None:
+        with open(html_path, "r", encoding="utf-8") as fh:
+            for part in iter(lambda: fh.read(size), ""):
+                yield part
+    elif report_html:
+        for start in range(0, len(report_html), size):
+            yield report_html[start:start + size]
+
+
+def idempotency_key(report):
+    """
+    The scan id the engine puts in meta, so every upload of one scan (CLI
+    --api-url, REPORT_API_URL, retries) maps to one incident; reports
+    without it fall back to a hash of their content.
+    """
+    scan_id = (report.get("meta") or {}).get("scan_id")
+    if scan_id:
+        return f"scan-{scan_id}"
+    body = json.dumps(report, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return "sha256-" + hashlib.sha256(body).hexdigest()
+
+
+class UploadClient:
+    """
+    Uploads scan reports to the integrity API (``{api_url}/incidents``).
+
+    Bodies are gzip-compressed JSON sent over one pooled requests.Session.
+    Reports with more than ``chunk_findings`` findings or a large HTML report
+    go through an upload session: the summary opens it, findings and HTML
+    follow in numbered chunks and the server assembles the incident on
+    complete. Findings may be any iterable (report_writer.iter_findings), so
+    a streamed report is read from disk one chunk at a time. A session is
+    resumed by its idempotency key, so an interrupted upload only re-sends
+    missing chunks.
+    Connection errors and 502/503/504 are retried with backoff, which is safe
+    because every request is idempotent.
+    """
+
+    def __init__(self, api_url, api_key=None, chunk_findings=CHUNK_FINDINGS, chunk_html=CHUNK_HTML,
+                 timeout=TIMEOUT, retries=3):
+        self.base = api_url.rstrip("/") + "/incidents"
+        self.chunk_findings = chunk_findings
+        self.chunk_html = chunk_html
+        self.timeout = timeout
+        self._uploaded = {}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=None,  # POSTs too: they carry an idempotency key
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Content-Type"] = "application/json"
+        if api_key:
+            self.session.headers["x-api-key"] = api_key
+
+    def _request(self, method, path, payload=None, key=None):
+        body = None
+        headers = {"Idempotency-Key": key} if key else {}
+        if payload is not None:
+            raw = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+            body = gzip.compress(raw, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        r = self.session.request(method, self.base + path, data=body, headers=headers, timeout=self.timeout)
+        if r.status_code >= 300:
+            raise UploadError(f"Server returned {r.status_code}: {r.text[:500]}")
+        return r.json()
+
+    def upload(self, report, report_html=None, findings=None, html_path=None):
+        """
+        Upload a report and return the incident id. ``findings`` replaces
+        report["findings"] (e.g. an iterator over a streamed report) and
+        ``html_path`` sends the HTML report from disk instead of ``report_html``.
+        """
+        key = idempotency_key(report)
+        with self._lock:
+            if key in self._uploaded:
+                # already sent by another code path in this process
+                return self._uploaded[key]
+
+        summary = {k: v for k, v in report.items() if k in ("meta", "score", "action")}
+        findings = iter(report.get("findings", []) if findings is None else findings)
+        if report_html is None and html_path is None:
+            report_html = report.get("report_html")
+        if html_path is not None and not os.path.isfile(html_path):
+            html_path = None
+
+        first = list(islice(findings, self.chunk_findings + 1))
+        html_size = os.path.getsize(html_path) if html_path is not None else len(report_html or "")
+        if len(first) <= self.chunk_findings and html_size <= self.chunk_html:
+            if html_path is not None:
+                with open(html_path, "r", encoding="utf-8") as fh:
+                    report_html = fh.read()
+            payload = {**summary, "findings": first, "report_html": report_html}
+            incident_id = self._request("POST", "/", payload, key)["id"]
+        else:
+            incident_id = self._upload_chunked(summary, chain(first, findings), report_html, html_path, key)
+
+        with self._lock:
+            self._uploaded[key] = incident_id
+        return incident_id
+
+    def _upload_chunked(self, summary, findings, report_html, html_path, key):
+        status = self._request("POST", "/uploads", summary, key)
+        if status.get("incident_id") is not None:
+            return status["incident_id"]
+
+        upload_id = status["upload_id"]
+        received = set(status.get("received", []))
+        html_received = set(status.get("html_received", []))
+
+        # chunk boundaries depend only on the report, so a resumed upload
+        # numbers them the same way and skips the ones already stored
+        chunks = 0
+        for index, batch in enumerate(_batches(findings, self.chunk_findings)):
+            chunks += 1
+            if index not in received:
+                self._request("PUT", f"/uploads/{upload_id}/chunks/{index}", {"findings": batch})
+
+        html_chunks = 0
+        for index, part in enumerate(_html_slices(report_html, html_path, self.chunk_html)):
+            html_chunks += 1
+            if index not in html_received:
+                self._request("PUT", f"/uploads/{upload_id}/html/{index}", {"html": part})
+
+        status = self._request(
+            "POST", f"/uploads/{upload_id}/complete", {"chunks": chunks, "html_chunks": html_chunks},
+        )
+        return status["incident_id"]
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
 
-def upload_report(api_url, api_key, report):
-    headers = {"Content-Type": "application/json"}
-    if api_key:
-        headers["x-api-key"] = api_key
 
-    url = f"{api_url}/incidents"
+def get_client(api_url, api_key=None):
+    """One client per API/key, so every upload path shares its pool and dedup."""
+    with _clients_lock:
+        client = _clients.get((api_url.rstrip("/"), api_key))
+        if client is None:
+            client = _clients[(api_url.rstrip("/"), api_key)] = UploadClient(api_url, api_key)
+        return client
 
-    r = requests.post(url, json=report, headers=headers, timeout=10)
-    if r.status_code >= 300:
-        raise Exception(f"Server returned {r.status_code}: {r.text}")
 
+def upload_report(api_url, api_key, report, report_html=None, findings=None, html_path=None):
+    incident_id = get_client(api_url, api_key).upload(report, report_html, findings=findings, html_path=html_path)
     print("✓ Report uploaded successfully")
+    return incident_id
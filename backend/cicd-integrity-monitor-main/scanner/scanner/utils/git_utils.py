@@ -1,25 +1,39 @@
 # scanner/scanner/utils/git_utils.py
 import subprocess
 import os
+import time
 from typing import List, Optional, Tuple
 
+# cumulative cost of git subprocesses, reported in the scan profile
+GIT_STATS = {"calls": 0, "seconds": 0.0}
+
+
+def _git_output(args: List[str]) -> bytes:
+    start = time.perf_counter()
+    try:
+        return subprocess.check_output(["git"] + args, stderr=subprocess.DEVNULL)
+    finally:
+        GIT_STATS["calls"] += 1
+        GIT_STATS["seconds"] += time.perf_counter() - start
+
+
 def repo_root(path: str = ".") -> Optional[str]:
     try:
-        root = subprocess.check_output(["git", "-C", path, "rev-parse", "--show-toplevel"], stderr=subprocess.DEVNULL)
+        root = _git_output(["-C", path, "rev-parse", "--show-toplevel"])
         return root.decode().strip()
     except Exception:
         return None
 
 def changed_files_between_commits(base: str = "HEAD~1", head: str = "HEAD", path: str = ".") -> List[str]:
     try:
-        out = subprocess.check_output(["git", "-C", path, "diff", "--name-only", base, head], stderr=subprocess.DEVNULL)
+        out = _git_output(["-C", path, "diff", "--name-only", base, head])
         return [p.strip() for p in out.decode().splitlines() if p.strip()]
     except Exception:
         return []
 
 def file_diff(base: str, head: str, file_path: str, repo_path: str = ".") -> str:
     try:
-        out = subprocess.check_output(["git", "-C", repo_path, "diff", f"{base}..{head}", "--", file_path], stderr=subprocess.DEVNULL)
+        out = _git_output(["-C", repo_path, "diff", f"{base}..{head}", "--", file_path])
         return out.decode(errors="ignore")
     except Exception:
         return ""
@@ -29,7 +43,7 @@ def last_commit_info(file_path: str, repo_path: str = ".") -> Tuple[str, str]:
     Returns (commit_hash, author_email) for last commit that touched file_path
     """
     try:
-        out = subprocess.check_output(["git", "-C", repo_path, "log", "-n", "1", "--pretty=format:%H%n%ae", "--", file_path], stderr=subprocess.DEVNULL)
+        out = _git_output(["-C", repo_path, "log", "-n", "1", "--pretty=format:%H%n%ae", "--", file_path])
         lines = out.decode().splitlines()
         if len(lines) >= 2:
             return lines[0].strip(), lines[1].strip()
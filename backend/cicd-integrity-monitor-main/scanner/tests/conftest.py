@@ -0,0 +1,12 @@
+import os
+import sys
+
+# the package is imported as scanner.scanner (as the CLI is run), so the
+# project root has to be importable when pytest runs from scanner/. The outer
+# scanner/ is a namespace package, which loses to the inner scanner/scanner
+# package whenever scanner/ itself (the cwd) is on the path, so drop that.
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+OUTER = os.path.join(ROOT, "scanner")
+sys.path[:] = [p for p in sys.path if os.path.abspath(p or os.curdir) != OUTER]
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
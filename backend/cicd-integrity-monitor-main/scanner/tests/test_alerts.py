@@ -0,0 +1,300 @@
+import json
+import socketserver
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scanner.scanner.alerts import AlertDispatcher, AlertManager
+
+
+class FakeManager:
+    """Stand-in for AlertManager: scripted Discord responses, no SMTP."""
+
+    configured = True
+
+    def __init__(self, responses=None):
+        self.responses = list(responses or [])
+        self.sent = []
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def _send_discord(self, text):
+        with self._lock:
+            self.sent.append(text)
+            return self.responses.pop(0) if self.responses else {"ok": True, "status_code": 204}
+
+    def _send_email(self, subject, body):
+        return {"ok": False, "reason": "smtp_not_configured"}
+
+    def disconnect_smtp(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def failed_scan(path, score=9):
+    return {"action": "fail", "score": score, "findings_count": 2, "meta": {"path": path}}
+
+
+def make_dispatcher(manager, sleeps, **config):
+    config = {"ALERT_DIGEST_WINDOW": 30, "ALERT_IDLE_SECONDS": 5, **config}
+    return AlertDispatcher(manager=manager, config=config, sleep=sleeps.append)
+
+
+def test_passing_scan_is_not_queued():
+    manager, sleeps = FakeManager(), []
+    dispatcher = make_dispatcher(manager, sleeps)
+
+    assert dispatcher.send_alert({"action": "allow"})["skipped"]
+    assert dispatcher.stats["queued"] == 0
+    assert dispatcher.close()
+    assert manager.sent == []
+
+
+def test_retries_with_backoff_and_retry_after():
+    manager = FakeManager([
+        {"ok": False, "status_code": 502},
+        {"ok": False, "status_code": 429, "retry_after": 3},
+    ])
+    sleeps = []
+    dispatcher = make_dispatcher(manager, sleeps, ALERT_BACKOFF=1, ALERT_RETRIES=4)
+
+    assert dispatcher.send_alert(failed_scan("repo-a")) == {"queued": True}
+    assert dispatcher.flush(timeout=5)
+
+    # 1s backoff, then Discord's retry_after beats the doubled 2s
+    assert sleeps == [1.0, 3.0]
+    assert len(manager.sent) == 3
+    assert dispatcher.stats["retries"] == 2
+    assert dispatcher.stats["delivered"] == 1
+    dispatcher.close()
+
+
+def test_flush_sends_queued_alerts_as_one_digest():
+    manager, sleeps = FakeManager(), []
+    dispatcher = make_dispatcher(manager, sleeps)
+
+    for i in range(3):
+        dispatcher.send_alert(failed_scan(f"repo-{i}", score=5 + i))
+    # the 30s window is skipped, not waited out
+    assert dispatcher.flush(timeout=5)
+
+    assert len(manager.sent) == 1
+    assert "3 failed scans" in manager.sent[0]
+    assert "max score **7**" in manager.sent[0]
+    assert dispatcher.stats["messages"] == 1
+    dispatcher.close()
+
+
+def test_close_makes_one_attempt_per_channel():
+    manager = FakeManager([{"ok": False, "status_code": 500}] * 4)
+    sleeps = []
+    dispatcher = make_dispatcher(manager, sleeps, ALERT_RETRIES=4)
+
+    dispatcher.send_alert(failed_scan("repo-a"))
+    assert dispatcher.close()
+
+    assert len(manager.sent) == 1
+    assert sleeps == []
+    assert dispatcher.stats["failed"] == 1
+    assert manager.closed
+    assert dispatcher.send_alert(failed_scan("repo-b"))["reason"] == "dispatcher_closed"
+
+
+# ----------------------------------------------------------------------
+# AlertManager against local stand-ins
+# ----------------------------------------------------------------------
+ALERT_ENV = ("DISCORD_WEBHOOK", "SMTP_HOST", "SMTP_PORT", "SMTP_USER", "SMTP_PASS",
+             "SMTP_STARTTLS", "EMAIL_FROM", "EMAIL_TO")
+
+
+@pytest.fixture(autouse=True)
+def no_alert_env(monkeypatch):
+    # settings fall back to the environment; keep the developer's out
+    for key in ALERT_ENV:
+        monkeypatch.delenv(key, raising=False)
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """Discord stand-in: answers with the scripted (status, body) pairs, then 204."""
+
+    daemon_threads = True
+
+    def __init__(self, responses=()):
+        super().__init__(("127.0.0.1", 0), WebhookHandler)
+        self.responses = list(responses)
+        self.posts = []
+        self.connections = set()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/hook"
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.posts.append(json.loads(body))
+        self.server.connections.add(self.client_address)
+        status, payload = self.server.responses.pop(0) if self.server.responses else (204, None)
+        data = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class SmtpServer(socketserver.ThreadingTCPServer):
+    """Plain-SMTP stand-in that records every command and message per connection."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, starttls=False, hang_up=False):
+        super().__init__(("127.0.0.1", 0), SmtpHandler)
+        self.starttls = starttls
+        self.hang_up = hang_up  # close the connection after every message
+        self.sessions = []
+        self.messages = []
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class SmtpHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        commands = []
+        self.server.sessions.append(commands)
+        self.reply("220 stand-in ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            verb = line.decode().strip().split(" ")[0].upper()
+            commands.append(verb)
+            if verb == "EHLO":
+                extensions = ["250-stand-in"] + (["250-STARTTLS"] if self.server.starttls else [])
+                for ext in extensions:
+                    self.reply(ext)
+                self.reply("250 OK")
+            elif verb == "STARTTLS":
+                self.reply("454 TLS not available")
+            elif verb == "DATA":
+                self.reply("354 go ahead")
+                message = []
+                for data in iter(self.rfile.readline, b""):
+                    if data == b".\r\n":
+                        break
+                    message.append(data.decode())
+                self.server.messages.append("".join(message))
+                self.reply("250 queued")
+                if self.server.hang_up:
+                    return
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:  # HELO, MAIL, RCPT, NOOP, RSET
+                self.reply("250 OK")
+
+
+@contextmanager
+def serving(server):
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def smtp_config(server, **extra):
+    return {"SMTP_HOST": "127.0.0.1", "SMTP_PORT": server.port, "SMTP_STARTTLS": "0",
+            "EMAIL_FROM": "scanner@example.test", "EMAIL_TO": "a@example.test, b@example.test", **extra}
+
+
+def test_discord_posts_reuse_one_connection():
+    with serving(WebhookServer()) as server:
+        manager = AlertManager({"DISCORD_WEBHOOK": server.url})
+        try:
+            for i in range(3):
+                assert manager._send_discord(f"alert {i}")["ok"]
+        finally:
+            manager.close()
+
+    assert [p["content"] for p in server.posts] == ["alert 0", "alert 1", "alert 2"]
+    assert len(server.connections) == 1
+
+
+def test_dispatcher_retries_a_real_webhook():
+    responses = [(500, {"message": "oops"}), (429, {"retry_after": 2.5})]
+    with serving(WebhookServer(responses)) as server:
+        sleeps = []
+        dispatcher = AlertDispatcher(
+            config={"DISCORD_WEBHOOK": server.url, "ALERT_DIGEST_WINDOW": 30, "ALERT_BACKOFF": 1},
+            sleep=sleeps.append,
+        )
+        dispatcher.send_alert(failed_scan("repo-a"))
+        assert dispatcher.flush(timeout=10)
+        dispatcher.close()
+
+    assert len(server.posts) == 3
+    assert "repo-a" in server.posts[-1]["content"]
+    assert sleeps == [1.0, 2.5]
+    assert dispatcher.stats["delivered"] == 1
+
+
+def test_smtp_connection_is_reused_while_it_answers_noop():
+    with serving(SmtpServer()) as server:
+        manager = AlertManager(smtp_config(server))
+        try:
+            assert manager._send_email("first", "body 1") == {"ok": True}
+            assert manager._send_email("second", "body 2") == {"ok": True}
+        finally:
+            manager.close()
+
+    assert len(server.sessions) == 1
+    commands = server.sessions[0]
+    assert "STARTTLS" not in commands
+    assert commands.count("NOOP") == 1  # liveness check before the second message
+    assert commands.count("RCPT") == 4  # both recipients, twice
+    assert commands[-1] == "QUIT"
+    assert "Subject: second" in server.messages[1]
+
+
+def test_smtp_reconnects_when_the_connection_dropped():
+    with serving(SmtpServer(hang_up=True)) as server:
+        manager = AlertManager(smtp_config(server))
+        try:
+            assert manager._send_email("first", "body")["ok"]
+            # the NOOP check fails on the closed session, so a new one is opened
+            assert manager._send_email("second", "body")["ok"]
+        finally:
+            manager.close()
+
+    assert len(server.sessions) == 2
+    assert len(server.messages) == 2
+
+
+def test_smtp_starttls_failure_drops_the_connection():
+    with serving(SmtpServer(starttls=True)) as server:
+        manager = AlertManager(smtp_config(server, SMTP_STARTTLS="1"))
+        result = manager._send_email("subject", "body")
+        manager.close()
+
+    assert not result["ok"] and "error" in result
+    assert manager._smtp is None
+    assert "STARTTLS" in server.sessions[0]
+    assert server.messages == []
@@ -0,0 +1,11 @@
+-- Access paths used by /api/pipelines, /api/builds and the logs endpoints.
+-- "latest build per pipeline" and pipeline build history
+CREATE INDEX IF NOT EXISTS ix_build_pipeline_id_id ON build (pipeline_id, id DESC);
+-- per-pipeline status counts
+CREATE INDEX IF NOT EXISTS ix_build_pipeline_id_status ON build (pipeline_id, status);
+-- /api/builds ordered by start time
+CREATE INDEX IF NOT EXISTS ix_build_started_at ON build (started_at);
+-- logs for a build in insertion order
+CREATE INDEX IF NOT EXISTS ix_build_log_build_id_id ON build_log (build_id, id);
+-- logs for a single step of a build
+CREATE INDEX IF NOT EXISTS ix_build_log_build_id_step_index ON build_log (build_id, step_index);
@@ -0,0 +1,2 @@
+-- Set by the log retention service once a build's logs live in the archive.
+ALTER TABLE build ADD COLUMN logs_archived BOOLEAN NOT NULL DEFAULT FALSE;
@@ -0,0 +1,4 @@
+-- When a build started running (started_at is when it was queued). Build
+-- durations, pipeline_stats.avg_duration and the BUILD_DURATION metric, are
+-- measured from here. Older builds keep NULL and are skipped by a stats rebuild.
+ALTER TABLE build ADD COLUMN running_at DATETIME;
@@ -1,6 +1,9 @@
 # models.py
-from datetime import datetime
+import os
+from datetime import datetime, timezone
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func, case, or_, update
+from sqlalchemy.exc import IntegrityError
 
 db = SQLAlchemy()
 
@@ -21,6 +24,7 @@ class Pipeline(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     builds = db.relationship("Build", backref="pipeline", lazy=True, cascade="all, delete-orphan")
+    summary = db.relationship("PipelineStats", uselist=False, lazy=True, cascade="all, delete-orphan")
 
     def to_dict(self, include_stats=False):
         import json
@@ -36,23 +40,41 @@ class Pipeline(db.Model):
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
         if include_stats:
+            stats = self.summary.counts() if self.summary else {}
             data["stats"] = {
-                "running": Build.query.filter_by(pipeline_id=self.id, status="running").count(),
-                "success": Build.query.filter_by(pipeline_id=self.id, status="success").count(),
-                "failed": Build.query.filter_by(pipeline_id=self.id, status="failed").count(),
+                "running": stats.get("running", 0),
+                "success": stats.get("success", 0),
+                "failed": stats.get("failed", 0),
             }
         return data
 
 
 class Build(db.Model):
+    # keep in sync with migrations/001_build_and_log_indexes.sql
+    __table_args__ = (
+        db.Index("ix_build_pipeline_id_id", "pipeline_id", db.text("id DESC")),
+        db.Index("ix_build_pipeline_id_status", "pipeline_id", "status"),
+        db.Index("ix_build_started_at", "started_at"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     pipeline_id = db.Column(db.Integer, db.ForeignKey("pipeline.id"), nullable=False)
     status = db.Column(db.String(32), default="queued")  # queued, running, success, failed
-    started_at = db.Column(db.DateTime, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)  # when the build was queued
+    # when it started running; build durations are measured from here
+    running_at = db.Column(db.DateTime, nullable=True)
     finished_at = db.Column(db.DateTime, nullable=True)
+    # logs moved to the compressed archive by utils/log_retention.py
+    logs_archived = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
 
     logs = db.relationship("BuildLog", backref="build", lazy=True, cascade="all, delete-orphan")
 
+    def run_duration(self):
+        """Seconds from running to finished, or None (still going, or never ran)."""
+        if self.running_at and self.finished_at:
+            return _duration_seconds(self.running_at, self.finished_at)
+        return None
+
     def to_dict(self):
         duration = None
         if self.started_at and self.finished_at:
@@ -67,9 +89,276 @@ class Build(db.Model):
         }
 
 
+class PipelineStats(db.Model):
+    """
+    Denormalized per-pipeline summary, updated in the same transaction as
+    every build status change so list/dashboard reads never touch Build.
+    """
+    __tablename__ = "pipeline_stats"
+
+    # avg_duration is an exponentially weighted moving average: a plain mean
+    # until this many builds have finished, then each new duration gets
+    # weight 1/DURATION_EWMA_SAMPLES
+    DURATION_EWMA_SAMPLES = 20
+    COUNTERS = {
+        "queued": "queued_count",
+        "running": "running_count",
+        "success": "success_count",
+        "failed": "failed_count",
+    }
+
+    pipeline_id = db.Column(db.Integer, db.ForeignKey("pipeline.id"), primary_key=True)
+    last_build_id = db.Column(db.Integer, nullable=True)
+    last_status = db.Column(db.String(32), nullable=True)
+    last_started_at = db.Column(db.DateTime, nullable=True)
+    last_finished_at = db.Column(db.DateTime, nullable=True)
+    queued_count = db.Column(db.Integer, nullable=False, default=0)
+    running_count = db.Column(db.Integer, nullable=False, default=0)
+    success_count = db.Column(db.Integer, nullable=False, default=0)
+    failed_count = db.Column(db.Integer, nullable=False, default=0)
+    avg_duration = db.Column(db.Float, nullable=True)  # seconds running, EWMA (see DURATION_EWMA_SAMPLES)
+    duration_samples = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def counts(self):
+        return {status: getattr(self, col) or 0 for status, col in self.COUNTERS.items()}
+
+    def to_dict(self):
+        return {
+            "pipeline_id": self.pipeline_id,
+            "last_build_id": self.last_build_id,
+            "last_status": self.last_status,
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_finished_at": self.last_finished_at.isoformat() if self.last_finished_at else None,
+            "counts": self.counts(),
+            "avg_duration": self.avg_duration,
+        }
+
+    @classmethod
+    def apply_transition(cls, build, old_status):
+        """
+        Record ``build`` moving from ``old_status`` to ``build.status``.
+        Must be called before the caller commits; counters are updated with
+        SQL expressions so concurrent builds of one pipeline cannot lose updates.
+        """
+        if build.id is None:
+            db.session.flush()
+
+        if db.session.get(cls, build.pipeline_id) is None:
+            cls._insert_missing(build.pipeline_id)
+
+        values = {}
+        if old_status != build.status:
+            if old_status in cls.COUNTERS:
+                col = getattr(cls, cls.COUNTERS[old_status])
+                values[col.key] = case((col > 0, col - 1), else_=0)
+            if build.status in cls.COUNTERS:
+                col = getattr(cls, cls.COUNTERS[build.status])
+                values[col.key] = col + 1
+
+        duration = build.run_duration() if build.status in ("success", "failed") else None
+        if duration is not None:
+            samples = case((cls.duration_samples < cls.DURATION_EWMA_SAMPLES, cls.duration_samples + 1),
+                           else_=cls.DURATION_EWMA_SAMPLES)
+            current = func.coalesce(cls.avg_duration, 0.0)
+            values["avg_duration"] = current + (duration - current) / samples
+            values["duration_samples"] = samples
+
+        if values:
+            values["updated_at"] = datetime.utcnow()
+            db.session.execute(
+                update(cls).where(cls.pipeline_id == build.pipeline_id).values(**values),
+                execution_options={"synchronize_session": False},
+            )
+
+        # only the newest build of the pipeline drives the "last build" columns
+        db.session.execute(
+            update(cls)
+            .where(cls.pipeline_id == build.pipeline_id)
+            .where(or_(cls.last_build_id.is_(None), cls.last_build_id <= build.id))
+            .values(
+                last_build_id=build.id,
+                last_status=build.status,
+                last_started_at=build.started_at,
+                last_finished_at=build.finished_at,
+            ),
+            execution_options={"synchronize_session": False},
+        )
+
+    @classmethod
+    def _insert_missing(cls, pipeline_id):
+        """
+        Create the summary row for pipelines that predate it. Two first builds
+        of one pipeline can get here together, so the insert tolerates the
+        row already existing instead of failing the second transaction.
+        """
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            db.session.execute(
+                insert(cls).values(pipeline_id=pipeline_id).on_conflict_do_nothing(index_elements=["pipeline_id"])
+            )
+            return
+
+        try:
+            with db.session.begin_nested():
+                db.session.add(cls(pipeline_id=pipeline_id))
+        except IntegrityError:
+            pass
+
+
 class BuildLog(db.Model):
+    __table_args__ = (
+        db.Index("ix_build_log_build_id_id", "build_id", "id"),
+        db.Index("ix_build_log_build_id_step_index", "build_id", "step_index"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     build_id = db.Column(db.Integer, db.ForeignKey("build.id"), nullable=False)
     step_index = db.Column(db.Integer, nullable=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     text = db.Column(db.Text, nullable=False)
+
+
+class Report(db.Model):
+    """Catalog entry for a generated report file (scanner JSON/HTML, PyGuard, ...)."""
+    __table_args__ = (
+        db.Index("ix_report_scanner_format_created_at", "scanner", "format", "created_at"),
+        db.Index("ix_report_created_at", "created_at"),
+        db.Index("ix_report_build_id", "build_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    scanner = db.Column(db.String(64), nullable=False)
+    build_id = db.Column(db.Integer, nullable=True)  # no FK: reports outlive builds
+    path = db.Column(db.String(1024), unique=True, nullable=False)
+    format = db.Column(db.String(16), nullable=False)  # JSON, HTML, ...
+    report_type = db.Column(db.String(32), default="Security")
+    size = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    summary_json = db.Column(db.Text, nullable=True)
+
+    def to_dict(self):
+        import json
+        try:
+            summary = json.loads(self.summary_json) if self.summary_json else {}
+        except Exception:
+            summary = {}
+        return {
+            "id": self.id,
+            "scanner": self.scanner,
+            "build_id": self.build_id,
+            "path": self.path,
+            "name": os.path.basename(self.path),
+            "format": self.format,
+            "type": self.report_type,
+            "size": self.size,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "summary": summary,
+        }
+
+
+def register_report(scanner, path, fmt, build_id=None, summary=None, report_type="Security", created_at=None):
+    """Insert or refresh the catalog entry for ``path``. The caller commits."""
+    import json
+    report = Report.query.filter_by(path=path).first() or Report(path=path)
+    report.scanner = scanner
+    report.format = (fmt or os.path.splitext(path)[1].lstrip(".")).upper()
+    report.build_id = build_id
+    report.report_type = report_type
+    report.size = os.path.getsize(path) if os.path.exists(path) else None
+    report.created_at = created_at or datetime.utcnow()
+    report.summary_json = json.dumps(summary) if summary is not None else None
+    db.session.add(report)
+    return report
+
+
+def latest_report(scanner=None, fmt="JSON"):
+    """Newest catalog entry matching the filters, or None (indexed lookup)."""
+    q = Report.query
+    if scanner:
+        q = q.filter(Report.scanner == scanner)
+    if fmt:
+        q = q.filter(Report.format == fmt.upper())
+    return q.order_by(Report.created_at.desc(), Report.id.desc()).first()
+
+
+# ============================
+# pipeline_stats backfill
+# ============================
+# Request paths read pipeline_stats; these full-history aggregates are only
+# used by rebuild_pipeline_stats.
+def _latest_builds_by_pipeline():
+    """Return {pipeline_id: latest Build} using a single grouped query."""
+    latest = db.session.query(
+        Build.pipeline_id,
+        func.max(Build.id).label("build_id"),
+    ).group_by(Build.pipeline_id).subquery()
+
+    builds = db.session.query(Build).join(latest, Build.id == latest.c.build_id).all()
+    return {b.pipeline_id: b for b in builds}
+
+
+def _build_status_counts():
+    """Return {pipeline_id: {status: count}} using a single GROUP BY query."""
+    q = db.session.query(
+        Build.pipeline_id,
+        Build.status,
+        func.count(Build.id),
+    ).group_by(Build.pipeline_id, Build.status)
+
+    counts = {}
+    for pipeline_id, status, count in q.all():
+        counts.setdefault(pipeline_id, {})[status] = count
+    return counts
+
+
+def _duration_seconds(start, end):
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    return max((end - start).total_seconds(), 0.0)
+
+
+def rebuild_pipeline_stats():
+    """Recompute pipeline_stats from the Build history (backfill for existing DBs)."""
+    PipelineStats.query.delete()
+
+    latest = _latest_builds_by_pipeline()
+    counts = _build_status_counts()
+
+    # replay finished builds in the order they finished through the same
+    # recurrence apply_transition uses, so a rebuild does not move avg_duration
+    durations = {}
+    finished = (
+        db.session.query(Build.pipeline_id, Build.running_at, Build.finished_at)
+        .filter(Build.status.in_(("success", "failed")))
+        .filter(Build.running_at.isnot(None), Build.finished_at.isnot(None))
+        .order_by(Build.finished_at, Build.id)
+        .yield_per(1000)
+    )
+    for pipeline_id, running_at, finished_at in finished:
+        avg, samples = durations.get(pipeline_id, (0.0, 0))
+        samples = min(samples + 1, PipelineStats.DURATION_EWMA_SAMPLES)
+        avg += (_duration_seconds(running_at, finished_at) - avg) / samples
+        durations[pipeline_id] = (avg, samples)
+
+    for (pipeline_id,) in db.session.query(Pipeline.id):
+        row = PipelineStats(pipeline_id=pipeline_id)
+        for status, col in PipelineStats.COUNTERS.items():
+            setattr(row, col, counts.get(pipeline_id, {}).get(status, 0))
+        last = latest.get(pipeline_id)
+        if last:
+            row.last_build_id = last.id
+            row.last_status = last.status
+            row.last_started_at = last.started_at
+            row.last_finished_at = last.finished_at
+        if pipeline_id in durations:
+            row.avg_duration, row.duration_samples = durations[pipeline_id]
+        db.session.add(row)
+
+    db.session.commit()
@@ -1,8 +1,24 @@
 import json
+import os
 import subprocess
 import platform
+import time
 from datetime import datetime, timezone
 
+from utils.step_cache import StepCache
+from utils.state_sync import pipeline_op
+from utils import metrics
+
+
+def flush_log_lines(app, build_id, step_index, lines):
+    with metrics.DB_FLUSH.time():
+        with app.app_context():
+            from models import db, BuildLog
+            for log_line in lines:
+                db.session.add(BuildLog(build_id=build_id, step_index=step_index, text=log_line))
+            db.session.commit()
+
+
 def run_command_and_stream(build_id, step_index, cmd, app, socketio):
     if not cmd:
         return 0
@@ -10,6 +26,12 @@ def run_command_and_stream(build_id, step_index, cmd, app, socketio):
     if platform.system() == "Windows":
         cmd = f"cmd /c {cmd}"
 
+    # scanners run as steps use these to register their reports in the catalog
+    env = dict(os.environ)
+    env["PIPELINEX_BUILD_ID"] = str(build_id)
+    if app.config.get("REPORT_CATALOG_URL"):
+        env.setdefault("REPORT_CATALOG_URL", app.config["REPORT_CATALOG_URL"])
+
     try:
         proc = subprocess.Popen(
             cmd,
@@ -18,6 +40,7 @@ def run_command_and_stream(build_id, step_index, cmd, app, socketio):
             stderr=subprocess.STDOUT,
             text=True,
             bufsize=1,
+            env=env,
         )
     except Exception as e:
         print(f"[Build {build_id} | Step {step_index}] Failed to start: {e}")
@@ -36,15 +59,13 @@ def run_command_and_stream(build_id, step_index, cmd, app, socketio):
 
         text_line = line.rstrip("\n")
         print(f"[Build {build_id} | Step {step_index}]: {text_line}")
+        metrics.LOG_LINES.inc()
+        metrics.LOG_BYTES.inc(len(line.encode("utf-8", "replace")))
 
         # Add to DB periodically
         buffer.append(text_line)
         if len(buffer) >= 15:
-            with app.app_context():
-                from models import db, BuildLog
-                for log_line in buffer:
-                    db.session.add(BuildLog(build_id=build_id, step_index=step_index, text=log_line))
-                db.session.commit()
+            flush_log_lines(app, build_id, step_index, buffer)
             buffer.clear()
 
         # emit log events (for PipelineDetail + Activity)
@@ -63,11 +84,7 @@ def run_command_and_stream(build_id, step_index, cmd, app, socketio):
 
     # flush remaining logs
     if buffer:
-        with app.app_context():
-            from models import db, BuildLog
-            for log_line in buffer:
-                db.session.add(BuildLog(build_id=build_id, step_index=step_index, text=log_line))
-            db.session.commit()
+        flush_log_lines(app, build_id, step_index, buffer)
 
     proc.stdout.close()
     rc = proc.wait()
@@ -75,17 +92,95 @@ def run_command_and_stream(build_id, step_index, cmd, app, socketio):
     return rc
 
 
-def run_build_thread(build_id, pipeline_config_json, app, socketio):
+def record_cached_step(build_id, step_index, cache_key, app, socketio):
+    text_line = f"[cache] Step {step_index + 1} cached ({cache_key[:12]}), outputs restored"
+    print(f"[Build {build_id} | Step {step_index}]: {text_line}")
+
     with app.app_context():
-        from models import db, Build
+        from models import db, BuildLog
+        db.session.add(BuildLog(build_id=build_id, step_index=step_index, text=text_line))
+        db.session.commit()
+
+    socketio.emit("build_step_status", {
+        "build_id": build_id,
+        "step_index": step_index,
+        "status": "cached",
+        "cache_key": cache_key,
+    })
+    socketio.emit("build_log", {
+        "build_id": build_id,
+        "step_index": step_index,
+        "text": text_line,
+    })
+    socketio.emit("activity_log", {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "message": f"♻ Step {step_index + 1} cached, skipped",
+    })
+
+
+def set_build_status(app, build_id, status, finished=False):
+    """
+    Move a build to ``status`` and update pipeline_stats in the same transaction.
+    Returns the build's pipeline id, or None if the build does not exist.
+    """
+    with app.app_context():
+        from models import db, Build, PipelineStats
         build = db.session.get(Build, build_id)
         if not build:
-            print(f"[Build {build_id}] Not found in DB")
-            return
+            return None
 
-        build.status = "running"
+        old_status = build.status
+        build.status = status
+        if status == "running" and old_status != "running":
+            # started_at is the queue time; durations count from here
+            build.running_at = datetime.now(timezone.utc)
+        if finished:
+            build.finished_at = datetime.now(timezone.utc)
+        PipelineStats.apply_transition(build, old_status)
+        pipeline_id = build.pipeline_id
+        record_transition_metrics(build, old_status)
         db.session.commit()
 
+        cache = getattr(app, "dashboard_cache", None)
+        if cache is not None:
+            cache.invalidate()
+        state = getattr(app, "state_sync", None)
+        if state is not None:
+            state.publish(lambda: [
+                {"op": "build", "build": db.session.get(Build, build_id).to_dict()},
+                pipeline_op(pipeline_id),
+            ])
+    return pipeline_id
+
+
+def record_transition_metrics(build, old_status):
+    now = datetime.now(timezone.utc)
+    started_at = build.started_at
+    if started_at is not None and started_at.tzinfo is None:
+        started_at = started_at.replace(tzinfo=timezone.utc)
+
+    if build.status == "running" and old_status != "running":
+        metrics.ACTIVE_BUILDS.inc()
+        # started_at is set when the build is queued
+        if old_status == "queued" and started_at is not None:
+            metrics.BUILD_QUEUE_WAIT.observe(max(0.0, (now - started_at).total_seconds()))
+    elif old_status == "running" and build.status != "running":
+        metrics.ACTIVE_BUILDS.dec()
+
+    if build.status in ("success", "failed") and old_status not in ("success", "failed"):
+        metrics.BUILDS_TOTAL.inc(status=build.status)
+        # same measure as pipeline_stats.avg_duration; builds that never ran
+        # (failed while queued) have no execution time
+        duration = build.run_duration()
+        if duration is not None:
+            metrics.BUILD_DURATION.observe(duration, status=build.status)
+
+
+def run_build_thread(build_id, pipeline_config_json, app, socketio):
+    if not set_build_status(app, build_id, "running"):
+        print(f"[Build {build_id}] Not found in DB")
+        return
+
     socketio.emit("build_status_update", {"build_id": build_id, "status": "running"})
     socketio.emit("activity_log", {
         "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -96,9 +191,30 @@ def run_build_thread(build_id, pipeline_config_json, app, socketio):
         config = json.loads(pipeline_config_json or "{}")
         steps = config.get("steps", [])
         total_steps = len(steps) or 1
+        step_cache = StepCache(app.config.get("STEP_CACHE_DIR") or os.path.join(app.instance_path, "step_cache"))
 
         for index, step in enumerate(steps):
+            step_start = time.perf_counter()
             cmd = step.get("cmd")
+            cache_spec = step.get("cache")
+            cache_key = None
+
+            # Content-addressed cache: skip the step when its inputs are unchanged
+            if cache_spec:
+                try:
+                    cache_key = step_cache.compute_key(cmd, cache_spec)
+                except Exception as e:
+                    print(f"[Build {build_id} | Step {index}] Cache key error: {e}")
+
+            if cache_key and step_cache.restore(cache_key):
+                record_cached_step(build_id, index, cache_key, app, socketio)
+                metrics.STEP_DURATION.observe(time.perf_counter() - step_start, outcome="cached")
+                socketio.emit("build_progress", {
+                    "build_id": build_id,
+                    "progress": int(((index + 1) / total_steps) * 100),
+                })
+                continue
+
             socketio.emit("activity_log", {
                 "timestamp": datetime.now(timezone.utc).isoformat(),
                 "message": f"▶ Step {index + 1} running: {cmd}"
@@ -106,18 +222,19 @@ def run_build_thread(build_id, pipeline_config_json, app, socketio):
 
             rc = run_command_and_stream(build_id, index, cmd, app, socketio)
 
+            if rc == 0 and cache_key:
+                step_cache.save(cache_key, cache_spec)
+            metrics.STEP_DURATION.observe(
+                time.perf_counter() - step_start, outcome="success" if rc == 0 else "failed"
+            )
+
             socketio.emit("build_progress", {
                 "build_id": build_id,
                 "progress": int(((index + 1) / total_steps) * 100),
             })
 
             if rc != 0:
-                with app.app_context():
-                    from models import db, Build
-                    build = db.session.get(Build, build_id)
-                    build.status = "failed"
-                    build.finished_at = datetime.now(timezone.utc)
-                    db.session.commit()
+                set_build_status(app, build_id, "failed", finished=True)
 
                 socketio.emit("build_finished", {"build_id": build_id, "status": "failed"})
                 socketio.emit("activity_log", {
@@ -126,12 +243,7 @@ def run_build_thread(build_id, pipeline_config_json, app, socketio):
                 })
                 return
 
-        with app.app_context():
-            from models import db, Build
-            build = db.session.get(Build, build_id)
-            build.status = "success"
-            build.finished_at = datetime.now(timezone.utc)
-            db.session.commit()
+        set_build_status(app, build_id, "success", finished=True)
 
         socketio.emit("build_finished", {"build_id": build_id, "status": "success"})
         socketio.emit("activity_log", {
@@ -140,13 +252,7 @@ def run_build_thread(build_id, pipeline_config_json, app, socketio):
         })
 
     except Exception as e:
-        with app.app_context():
-            from models import db, Build
-            build = db.session.get(Build, build_id)
-            if build:
-                build.status = "failed"
-                build.finished_at = datetime.now(timezone.utc)
-                db.session.commit()
+        set_build_status(app, build_id, "failed", finished=True)
 
         socketio.emit("build_finished", {"build_id": build_id, "status": "failed"})
         socketio.emit("activity_log", {
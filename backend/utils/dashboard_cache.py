@@ -0,0 +1,72 @@
+import hashlib
+import os
+import threading
+import time
+
+
+class DashboardCache:
+    """
+    In-process cache for the serialized /api/dashboard-data payload.
+
+    An entry is reused until one of these happens:
+      - invalidate() is called (build status transitions, pipeline changes,
+        new catalog reports)
+      - a file the payload was built from changes mtime/size (checked with
+        one stat per file)
+      - ``ttl`` seconds pass (covers runtimes and the recent-log tail)
+    Only one request rebuilds an expired entry; concurrent ones wait for it.
+    """
+
+    def __init__(self, ttl=5.0):
+        self.ttl = ttl
+        self.version = 0
+        self._entry = None  # (body, etag, built_at, version, file_signature)
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self.version += 1
+
+    @staticmethod
+    def _file_signature(files):
+        sig = []
+        for path in files:
+            try:
+                st = os.stat(path)
+                sig.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append((path, None, None))
+        return tuple(sig)
+
+    def _is_fresh(self, entry):
+        if entry is None:
+            return False
+        _, _, built_at, version, file_sig = entry
+        return (
+            version == self.version
+            and time.monotonic() - built_at < self.ttl
+            and self._file_signature(path for path, _, _ in file_sig) == file_sig
+        )
+
+    def get(self, build_body):
+        """
+        Return (body, etag) for the current payload. ``build_body`` is called
+        on a miss and must return ``(bytes, files)``: the serialized payload
+        and the paths it was built from, which are watched from then on.
+        """
+        entry = self._entry
+        if self._is_fresh(entry):
+            return entry[0], entry[1]
+
+        with self._lock:
+            # another request may have rebuilt it while we waited
+            entry = self._entry
+            if self._is_fresh(entry):
+                return entry[0], entry[1]
+
+            version = self.version
+            body, files = build_body()
+            # stat before returning so a write during the build shows up next time
+            signature = self._file_signature(files)
+            etag = hashlib.sha1(body).hexdigest()
+            self._entry = (body, etag, time.monotonic(), version, signature)
+            return body, etag
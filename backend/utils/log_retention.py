@@ -0,0 +1,213 @@
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, text
+
+FINISHED_STATUSES = ("success", "failed")
+
+RETENTION_DEFAULTS = {
+    "LOG_RETENTION_KEEP_BUILDS": 50,
+    "LOG_RETENTION_KEEP_DAYS": 30,
+    "LOG_RETENTION_INTERVAL": 3600,
+    "LOG_RETENTION_BATCH_SIZE": 500,
+    "LOG_RETENTION_VACUUM_PAGES": 2000,
+}
+
+
+def archive_path(archive_dir, pipeline_id, build_id):
+    return os.path.join(archive_dir, str(pipeline_id), f"{build_id}.jsonl.gz")
+
+
+def read_archived_logs(archive_dir, build):
+    """Return the archived log entries of ``build`` in the /logs API format."""
+    path = archive_path(archive_dir, build.pipeline_id, build.id)
+    if not os.path.exists(path):
+        return []
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+class LogRetentionService:
+    """
+    Moves BuildLog rows of old builds into compressed per-build archives.
+
+    A pipeline can override the global policy in its config:
+        {"steps": [...], "retention": {"keep_builds": 10, "keep_days": 7}}
+    A finished build is archived once it is outside the newest ``keep_builds``
+    AND older than ``keep_days`` (a null value disables that limit).
+    Rows are deleted in small batches so the write lock is never held long.
+    """
+
+    def __init__(self, app, archive_dir):
+        self.app = app
+        self.archive_dir = archive_dir
+        cfg = {key: app.config.get(key, default) for key, default in RETENTION_DEFAULTS.items()}
+        self.keep_builds = cfg["LOG_RETENTION_KEEP_BUILDS"]
+        self.keep_days = cfg["LOG_RETENTION_KEEP_DAYS"]
+        self.interval = cfg["LOG_RETENTION_INTERVAL"]
+        self.batch_size = cfg["LOG_RETENTION_BATCH_SIZE"]
+        self.vacuum_pages = cfg["LOG_RETENTION_VACUUM_PAGES"]
+
+    # -----------------------------
+    # Policy
+    # -----------------------------
+    def policy_for(self, pipeline):
+        try:
+            overrides = json.loads(pipeline.config_json or "{}").get("retention") or {}
+        except Exception:
+            overrides = {}
+        return {
+            "keep_builds": overrides.get("keep_builds", self.keep_builds),
+            "keep_days": overrides.get("keep_days", self.keep_days),
+        }
+
+    def expired_build_ids(self, pipeline, policy):
+        from models import db, Build
+
+        keep_builds, keep_days = policy["keep_builds"], policy["keep_days"]
+        if keep_builds is None and keep_days is None:
+            return []
+
+        rows = db.session.execute(
+            select(Build.id, Build.started_at, Build.logs_archived)
+            .where(Build.pipeline_id == pipeline.id)
+            .order_by(Build.id.desc())
+        ).all()
+
+        cutoff = datetime.utcnow() - timedelta(days=keep_days) if keep_days is not None else None
+        expired = []
+        for position, (build_id, started_at, archived) in enumerate(rows):
+            if archived:
+                continue
+            if keep_builds is not None and position < keep_builds:
+                continue
+            if cutoff is not None and (started_at is None or started_at.replace(tzinfo=None) >= cutoff):
+                continue
+            expired.append(build_id)
+        return expired
+
+    # -----------------------------
+    # Archive + delete
+    # -----------------------------
+    def archive_build(self, build):
+        """Write the build's logs to its archive file and mark it archived."""
+        from models import db, BuildLog
+
+        path = archive_path(self.archive_dir, build.pipeline_id, build.id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+
+        logs = db.session.execute(
+            select(BuildLog.step_index, BuildLog.text, BuildLog.timestamp)
+            .where(BuildLog.build_id == build.id)
+            .order_by(BuildLog.id.asc())
+            .execution_options(yield_per=self.batch_size)
+        )
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as fh:
+            for step_index, text_value, timestamp in logs:
+                fh.write(json.dumps({
+                    "step_index": step_index,
+                    "text": text_value,
+                    "timestamp": timestamp.isoformat() if timestamp else None,
+                }) + "\n")
+        os.replace(tmp_path, path)
+
+        build.logs_archived = True
+        db.session.commit()
+
+    def delete_archived_rows(self, build_id):
+        """Delete the rows of an archived build, one short transaction per batch."""
+        from models import db, BuildLog
+
+        deleted = 0
+        while True:
+            ids = select(BuildLog.id).where(BuildLog.build_id == build_id).limit(self.batch_size)
+            result = db.session.execute(delete(BuildLog).where(BuildLog.id.in_(ids)))
+            db.session.commit()
+            deleted += result.rowcount or 0
+            if not result.rowcount or result.rowcount < self.batch_size:
+                return deleted
+            # let request handlers and log writers in between batches
+            time.sleep(0)
+
+    def incremental_vacuum(self):
+        from models import db
+
+        if db.engine.dialect.name != "sqlite":
+            return False
+        with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            if conn.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+                # file was created without auto_vacuum=INCREMENTAL, see enable_incremental_vacuum()
+                return False
+            # pysqlite steps the pragma once, which frees a single page per call
+            free_pages = conn.execute(text("PRAGMA freelist_count")).scalar() or 0
+            for i in range(min(free_pages, int(self.vacuum_pages))):
+                conn.execute(text("PRAGMA incremental_vacuum(1)"))
+                if i % 100 == 99:
+                    time.sleep(0)
+        return True
+
+    def run_once(self):
+        from models import db, Build, BuildLog, Pipeline
+
+        stats = {"builds_archived": 0, "rows_deleted": 0, "vacuumed": False}
+        with self.app.app_context():
+            for pipeline in Pipeline.query.all():
+                policy = self.policy_for(pipeline)
+                for build_id in self.expired_build_ids(pipeline, policy):
+                    build = db.session.get(Build, build_id)
+                    if build is None or build.status not in FINISHED_STATUSES:
+                        continue
+                    self.archive_build(build)
+                    stats["builds_archived"] += 1
+
+            # also picks up builds whose deletion was interrupted last run
+            leftovers = db.session.execute(
+                select(Build.id)
+                .where(Build.logs_archived.is_(True))
+                .where(select(BuildLog.id).where(BuildLog.build_id == Build.id).exists())
+            ).scalars().all()
+            for build_id in leftovers:
+                stats["rows_deleted"] += self.delete_archived_rows(build_id)
+
+            if stats["rows_deleted"]:
+                stats["vacuumed"] = self.incremental_vacuum()
+            db.session.remove()
+        return stats
+
+    def run_forever(self):
+        while True:
+            try:
+                stats = self.run_once()
+                if stats["builds_archived"] or stats["rows_deleted"]:
+                    print(f"[LogRetention] {stats}")
+            except Exception as e:
+                print(f"[LogRetention] Run failed: {e}")
+            time.sleep(self.interval)
+
+
+def enable_incremental_vacuum(db_path):
+    """One-time conversion of an existing SQLite file; runs a full VACUUM."""
+    import sqlite3
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    # Maintenance window helper:
+    #   python -m utils.log_retention --enable-incremental-vacuum [path/to/pipeline.db]
+    if "--enable-incremental-vacuum" in sys.argv:
+        args = [a for a in sys.argv[1:] if not a.startswith("--")]
+        default_db = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instance", "pipeline.db")
+        db_path = args[0] if args else default_db
+        print(f"[LogRetention] auto_vacuum=INCREMENTAL on {db_path}: {enable_incremental_vacuum(db_path)}")
@@ -0,0 +1,210 @@
+import bisect
+import threading
+import time
+
+from flask import Response, g, request
+
+# latency buckets in seconds (Prometheus client defaults plus longer build ranges)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUILD_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # per-bucket (non-cumulative) counts; cumulated when rendered
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def _render_sample(self, key, value):
+        counts, total, count = value[0], value[1], value[2]
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ----------------------------------------------------------------------------
+# Build runner
+# ----------------------------------------------------------------------------
+BUILDS_TOTAL = Counter("pipelinex_builds_total", "Finished builds.", ["status"])
+BUILD_DURATION = Histogram(
+    "pipelinex_build_duration_seconds", "Build wall time from start of execution to finish.",
+    ["status"], buckets=BUILD_BUCKETS,
+)
+BUILD_QUEUE_WAIT = Histogram(
+    "pipelinex_build_queue_wait_seconds", "Time between a build being queued and starting to run.",
+    buckets=DEFAULT_BUCKETS + (30, 60, 300),
+)
+ACTIVE_BUILDS = Gauge("pipelinex_active_builds", "Builds currently running.")
+STEP_DURATION = Histogram(
+    "pipelinex_step_duration_seconds", "Pipeline step wall time.",
+    ["outcome"], buckets=(0.1, 0.5) + BUILD_BUCKETS,
+)
+LOG_LINES = Counter("pipelinex_build_log_lines_total", "Build output lines captured.")
+LOG_BYTES = Counter("pipelinex_build_log_bytes_total", "Build output bytes captured (UTF-8).")
+DB_FLUSH = Histogram("pipelinex_build_log_flush_seconds", "Latency of one BuildLog batch insert and commit.")
+SOCKETIO_EMITS = Counter("pipelinex_socketio_emits_total", "Socket.IO events emitted by the server.", ["event"])
+
+# ----------------------------------------------------------------------------
+# HTTP
+# ----------------------------------------------------------------------------
+HTTP_LATENCY = Histogram(
+    "pipelinex_http_request_duration_seconds", "Flask request handling time.",
+    ["method", "endpoint", "status"],
+)
+
+
+def instrument_socketio(socketio):
+    """Count every emit, including those from background tasks."""
+    if getattr(socketio, "_metrics_instrumented", False):
+        return
+    emit = socketio.emit
+
+    def counted_emit(event, *args, **kwargs):
+        SOCKETIO_EMITS.inc(event=event)
+        return emit(event, *args, **kwargs)
+
+    socketio.emit = counted_emit
+    socketio._metrics_instrumented = True
+
+
+def install_http_metrics(app):
+    """Request latency histogram plus the /metrics endpoint."""
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _observe_latency(response):
+        start = g.pop("_metrics_start", None)
+        if start is not None:
+            # route templates (not raw paths) keep label cardinality bounded
+            endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+            HTTP_LATENCY.observe(
+                time.perf_counter() - start,
+                method=request.method, endpoint=endpoint, status=response.status_code,
+            )
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
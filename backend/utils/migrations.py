@@ -0,0 +1,85 @@
+import os
+import re
+import sys
+from datetime import datetime, timezone
+
+from sqlalchemy import inspect, text
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+MIGRATION_FILE_RE = re.compile(r"^(\d+)_[\w-]+\.sql$")
+
+
+def list_migrations(migrations_dir=MIGRATIONS_DIR):
+    """Return [(version, path)] for every NNN_name.sql file, in version order."""
+    if not os.path.isdir(migrations_dir):
+        return []
+    found = []
+    for name in os.listdir(migrations_dir):
+        m = MIGRATION_FILE_RE.match(name)
+        if m:
+            found.append((m.group(1), os.path.join(migrations_dir, name)))
+    return sorted(found, key=lambda item: int(item[0]))
+
+
+def _split_statements(sql):
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version VARCHAR(32) PRIMARY KEY,"
+        " applied_at VARCHAR(64) NOT NULL)"
+    ))
+
+
+def applied_versions(conn):
+    _ensure_version_table(conn)
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def apply_migrations(engine, stamp_only=False, migrations_dir=MIGRATIONS_DIR):
+    """
+    Apply pending migrations, each in its own transaction, and record them in
+    schema_migrations. With ``stamp_only`` the files are only recorded (used for
+    databases that db.create_all() just built from the current models).
+    Returns the list of versions applied.
+    """
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+
+    applied = []
+    for version, path in list_migrations(migrations_dir):
+        if version in done:
+            continue
+        with open(path, "r", encoding="utf-8") as fh:
+            statements = _split_statements(fh.read())
+
+        with engine.begin() as conn:
+            if not stamp_only:
+                for stmt in statements:
+                    conn.execute(text(stmt))
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, applied_at) VALUES (:v, :t)"),
+                {"v": version, "t": datetime.now(timezone.utc).isoformat()},
+            )
+        applied.append(version)
+        print(f"[migrations] {'Stamped' if stamp_only else 'Applied'} {os.path.basename(path)}")
+    return applied
+
+
+def is_fresh_database(engine):
+    """True when none of the app tables exist yet."""
+    return not inspect(engine).has_table("build")
+
+
+if __name__ == "__main__":
+    # Upgrade an existing database file in place:
+    #   python -m utils.migrations [path/to/pipeline.db]
+    from sqlalchemy import create_engine
+
+    default_db = os.path.join(os.path.dirname(MIGRATIONS_DIR), "instance", "pipeline.db")
+    db_path = sys.argv[1] if len(sys.argv) > 1 else default_db
+    versions = apply_migrations(create_engine(f"sqlite:///{db_path}"))
+    print(f"[migrations] {len(versions)} migration(s) applied to {db_path}")
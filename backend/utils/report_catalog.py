@@ -0,0 +1,94 @@
+import os
+from datetime import datetime
+
+# which scanner writes into each configured report directory
+REPORT_DIR_SCANNERS = {
+    "scan_reports": "integrity_scanner",
+    "reports": "pyguard",
+}
+
+REPORT_FORMATS = {".json": "JSON", ".ndjson": "NDJSON", ".sarif": "SARIF", ".html": "HTML"}
+
+# file names (without extension) of the fixed "latest" copies; only the
+# timestamped history copies next to them are ever pruned
+LATEST_REPORT_STEMS = {"report", "embedding_report"}
+
+# compressed siblings built by utils/report_files.py
+VARIANT_SUFFIXES = (".br", ".gz")
+
+
+def report_dir_for(path, report_dirs):
+    """Return the REPORT_DIRS key containing ``path``, or None."""
+    full = os.path.abspath(path)
+    for name, base in report_dirs.items():
+        base = os.path.abspath(base)
+        try:
+            if os.path.commonpath([full, base]) == base:
+                return name
+        except ValueError:
+            # different drives on Windows
+            continue
+    return None
+
+
+def bootstrap_catalog(report_dirs):
+    """
+    Index report files already on disk. Run once when the catalog is empty so
+    reports written before the catalog existed stay listed.
+    """
+    from models import db, register_report
+
+    count = 0
+    for name, base in report_dirs.items():
+        if not os.path.isdir(base):
+            continue
+        with os.scandir(base) as entries:
+            for entry in entries:
+                fmt = REPORT_FORMATS.get(os.path.splitext(entry.name)[1].lower())
+                if not fmt or not entry.is_file():
+                    continue
+                register_report(
+                    scanner=REPORT_DIR_SCANNERS.get(name, name),
+                    path=entry.path,
+                    fmt=fmt,
+                    created_at=datetime.fromtimestamp(entry.stat().st_mtime),
+                )
+                count += 1
+    db.session.commit()
+    return count
+
+
+def prune_reports(scanner, keep):
+    """
+    Keep the newest ``keep`` history reports of ``scanner`` per format and
+    delete the rest: the file, its compressed siblings and the catalog row.
+    Returns the number of reports removed. ``keep`` of None disables it.
+    """
+    from models import db, Report
+
+    if keep is None:
+        return 0
+
+    removed = 0
+    for (fmt,) in db.session.query(Report.format).filter(Report.scanner == scanner).distinct():
+        rows = (
+            Report.query.filter(Report.scanner == scanner, Report.format == fmt)
+            .order_by(Report.created_at.desc(), Report.id.desc())
+        )
+        history = [r for r in rows if os.path.splitext(os.path.basename(r.path))[0] not in LATEST_REPORT_STEMS]
+        for report in history[keep:]:
+            try:
+                if os.path.exists(report.path):
+                    os.remove(report.path)
+            except OSError as e:
+                # keep the row while the file is still there (locked on Windows); retried next time
+                print(f"[WARN] Could not delete old report {report.path}: {e}")
+                continue
+            for suffix in VARIANT_SUFFIXES:
+                if os.path.exists(report.path + suffix):
+                    os.remove(report.path + suffix)
+            db.session.delete(report)
+            removed += 1
+    if removed:
+        db.session.commit()
+    return removed
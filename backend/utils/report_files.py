@@ -0,0 +1,235 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from flask import request, send_file
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+try:
+    from eventlet import tpool
+except ImportError:  # plain threads outside the eventlet server
+    tpool = None
+
+# not in the stdlib table; without it SARIF logs are served as octet-stream
+mimetypes.add_type("application/sarif+json", ".sarif")
+
+# preferred first; built next to each report by VariantBuilder
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# reports smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+# moderate levels: close to the best ratio on JSON/HTML at a fraction of the CPU
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESS_CHUNK = 1024 * 1024
+
+# content digests whose variants were built recently -> the report they belong to;
+# identical reports (latest + history copy) link those instead of compressing again
+VARIANT_SOURCES_MAX = 256
+
+# report versions whose content digest is remembered (every history copy is one)
+DIGEST_CACHE_MAX = 1024
+
+
+def _compress_file(encoding, src, dst):
+    """Compress ``src`` into ``dst`` a chunk at a time."""
+    with open(src, "rb") as fin:
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            with open(dst, "wb") as fout:
+                for block in iter(lambda: fin.read(COMPRESS_CHUNK), b""):
+                    fout.write(compressor.process(block))
+                fout.write(compressor.finish())
+        else:
+            # mtime=0 keeps the .gz bytes identical for identical reports
+            with gzip.GzipFile(dst, "wb", compresslevel=GZIP_LEVEL, mtime=0) as fout:
+                shutil.copyfileobj(fin, fout, COMPRESS_CHUNK)
+
+
+def _available_encodings():
+    return [(enc, suffix) for enc, suffix in ENCODINGS if enc != "br" or brotli is not None]
+
+
+def _is_fresh(variant, mtime_ns):
+    try:
+        return os.stat(variant).st_mtime_ns >= mtime_ns
+    except OSError:
+        return False
+
+
+def ready_variants(path):
+    """Encodings with an up-to-date .br/.gz sibling of ``path`` (stat only, never compresses)."""
+    st = os.stat(path)
+    if st.st_size < MIN_COMPRESS_SIZE:
+        return []
+    return [enc for enc, suffix in _available_encodings() if _is_fresh(path + suffix, st.st_mtime_ns)]
+
+
+class VariantBuilder:
+    """
+    Builds missing or stale .br/.gz siblings of reports in the background.
+    Compression runs in a real OS thread (eventlet tpool) one report at a
+    time, so a large report never stalls the hub serving HTTP and Socket.IO.
+    Each distinct report content is compressed once; identical copies get
+    hard links to the variants already built.
+    """
+
+    def __init__(self, spawn):
+        self._spawn = spawn
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._busy = threading.Semaphore(1)
+        self._sources = OrderedDict()
+
+    def submit(self, path):
+        """Queue ``path`` unless its variants are current or already being built."""
+        try:
+            if os.path.getsize(path) < MIN_COMPRESS_SIZE:
+                return False
+            if len(ready_variants(path)) == len(_available_encodings()):
+                return False
+        except OSError:
+            return False
+        with self._lock:
+            if path in self._pending:
+                return False
+            self._pending.add(path)
+        self._spawn(self._build, path)
+        return True
+
+    def _build(self, path):
+        try:
+            with self._busy:
+                self.build(path)
+        except Exception as e:
+            print(f"[Reports] Could not build compressed variants of {path}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(path)
+
+    def build(self, path):
+        """Bring the variants of ``path`` up to date; returns the encodings now available."""
+        mtime_ns = os.stat(path).st_mtime_ns
+        digest = content_digest(path)
+        source = self._sources.get(digest)
+
+        ready = []
+        for encoding, suffix in _available_encodings():
+            variant = path + suffix
+            if _is_fresh(variant, mtime_ns):
+                ready.append(encoding)
+                continue
+
+            tmp_path = f"{variant}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                if source and source != path and _is_fresh(source + suffix, mtime_ns) \
+                        and content_digest(source) == digest:
+                    os.link(source + suffix, tmp_path)
+                elif tpool is not None:
+                    tpool.execute(_compress_file, encoding, path, tmp_path)
+                else:
+                    _compress_file(encoding, path, tmp_path)
+                os.replace(tmp_path, variant)
+                ready.append(encoding)
+            except OSError as e:
+                # read-only report dir: keep serving uncompressed
+                print(f"[Reports] Could not write {variant}: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        if ready:
+            with self._lock:
+                self._sources[digest] = path
+                self._sources.move_to_end(digest)
+                while len(self._sources) > VARIANT_SOURCES_MAX:
+                    self._sources.popitem(last=False)
+        return ready
+
+
+def content_digest(path):
+    """sha256 of the file, memoized on (path, mtime, size) so it is hashed once per version."""
+    st = os.stat(path)
+    return _file_digest(path, st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=DIGEST_CACHE_MAX)
+def _file_digest(path, mtime_ns, size):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def negotiate_encoding(accept_encoding, available):
+    """Pick the best of ``available`` the client accepts (q=0 excludes a coding)."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+
+    for encoding, _ in ENCODINGS:
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def serve_report(path, as_attachment=False, variants=None):
+    """
+    Send a report with compression and HTTP caching:
+      - a precompressed .br/.gz variant when the client accepts it; until
+        ``variants`` (a VariantBuilder) has built them the report is sent as is
+      - a strong ETag from the content hash (per encoding) and Last-Modified,
+        so repeat views are answered with 304
+      - Range requests on the selected representation
+    """
+    available = ready_variants(path)
+    if variants is not None and len(available) < len(_available_encodings()):
+        variants.submit(path)
+    encoding = negotiate_encoding(request.headers.get("Accept-Encoding"), available)
+
+    digest = content_digest(path)
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    send_path, etag = path, digest
+    if encoding:
+        send_path = path + dict(ENCODINGS)[encoding]
+        # each encoding is a different representation and needs its own strong tag
+        etag = f"{digest}-{encoding}"
+
+    response = send_file(
+        send_path,
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=os.path.basename(path),
+        conditional=True,
+        etag=etag,
+        last_modified=os.stat(path).st_mtime,
+        max_age=0,
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    # cacheable, but always revalidated so a rewritten report.html shows up
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,87 @@
+import threading
+import uuid
+from collections import deque
+
+
+def pipeline_state(pipeline, stats):
+    """Per-pipeline entry of the snapshot and of ``pipeline`` patches."""
+    has_build = stats is not None and stats.last_build_id is not None
+    return {
+        "id": pipeline.id,
+        "name": pipeline.name,
+        "description": pipeline.description,
+        "status": (stats.last_status or "unknown") if has_build else "unknown",
+        "last_build_id": stats.last_build_id if stats else None,
+        "last_started_at": stats.last_started_at.isoformat() if has_build and stats.last_started_at else None,
+        "last_finished_at": stats.last_finished_at.isoformat() if has_build and stats.last_finished_at else None,
+        "counts": stats.counts() if stats else {"queued": 0, "running": 0, "success": 0, "failed": 0},
+        "avg_duration": stats.avg_duration if stats else None,
+    }
+
+
+def pipeline_op(pipeline_id):
+    """``pipeline`` op with the committed state of one pipeline (needs app context)."""
+    from models import db, Pipeline, PipelineStats
+
+    pipeline = db.session.get(Pipeline, pipeline_id)
+    if pipeline is None:
+        return {"op": "pipeline_removed", "id": pipeline_id}
+    return {"op": "pipeline", "pipeline": pipeline_state(pipeline, db.session.get(PipelineStats, pipeline_id))}
+
+
+class StateSync:
+    """
+    Versioned state-delta channel replacing page polling.
+
+    Clients load GET /api/state/snapshot once ({"version": n, ...}) and then
+    apply ``state_patch`` Socket.IO events ({"version": n + 1, "ops": [...]})
+    in order. On a version gap they fetch /api/state/patches?since=n, and
+    reload the snapshot if those patches have already left the history or
+    the ``epoch`` changed (server restarted, versions start over).
+
+    Ops carry absolute values (full pipeline summary, full build row), so a
+    patch that is already reflected in a snapshot can be applied again safely:
+      {"op": "pipeline", "pipeline": {...}}    pipeline added or changed
+      {"op": "pipeline_removed", "id": 3}
+      {"op": "build", "build": {...}}          build queued or changed status
+      {"op": "report", "report": {...}}        new report registered
+    """
+
+    def __init__(self, socketio, history=500):
+        self.socketio = socketio
+        self.epoch = uuid.uuid4().hex[:12]
+        self.version = 0
+        self._patches = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def publish(self, build_ops):
+        """
+        ``build_ops`` is called under the lock and returns the ops, so
+        concurrent publishers read committed state in version order.
+        """
+        with self._lock:
+            ops = [op for op in build_ops() if op]
+            if not ops:
+                return None
+            self.version += 1
+            patch = {"epoch": self.epoch, "version": self.version, "ops": ops}
+            self._patches.append(patch)
+        self.socketio.emit("state_patch", patch)
+        return patch
+
+    def patches_since(self, version, epoch=None):
+        """Patches newer than ``version``, or None if the client must reload the snapshot."""
+        with self._lock:
+            if (epoch and epoch != self.epoch) or version > self.version:
+                return None
+            if version == self.version:
+                return []
+            if not self._patches or self._patches[0]["version"] > version + 1:
+                return None
+            return [p for p in self._patches if p["version"] > version]
+
+    def snapshot(self, build_state):
+        # version first: patches published while the state is read are
+        # delivered again, which the client can apply idempotently
+        version = self.version
+        return {"epoch": self.epoch, "version": version, **build_state()}
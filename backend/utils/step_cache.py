@@ -0,0 +1,114 @@
+import glob
+import hashlib
+import json
+import os
+import tarfile
+import tempfile
+
+
+class StepCache:
+    """
+    Content-addressed cache for pipeline steps.
+
+    A step opts in by declaring a ``cache`` block next to its ``cmd``:
+
+        {"cmd": "pytest -q", "cache": {
+            "inputs": ["src/**/*.py", "requirements.txt"],
+            "env": ["PYTHON_VERSION"],
+            "outputs": ["reports/junit.xml"]
+        }}
+
+    The key is a sha256 over the command string, the declared env values and
+    the contents of every file matched by the input globs. Outputs of a
+    successful run are stored as ``<store>/<key[:2]>/<key>.tar.gz`` and
+    restored into the working directory on a hit.
+    """
+
+    def __init__(self, store_dir, workdir=None):
+        self.store_dir = store_dir
+        self.workdir = os.path.abspath(workdir or os.getcwd())
+
+    # -----------------------------
+    # Key computation
+    # -----------------------------
+    def _input_files(self, patterns):
+        files = set()
+        for pattern in patterns or []:
+            for path in glob.glob(os.path.join(self.workdir, pattern), recursive=True):
+                if os.path.isfile(path):
+                    files.add(os.path.relpath(path, self.workdir).replace("\\", "/"))
+        return sorted(files)
+
+    def _file_digest(self, relpath):
+        sha = hashlib.sha256()
+        with open(os.path.join(self.workdir, relpath), "rb") as f:
+            while chunk := f.read(65536):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def compute_key(self, cmd, spec):
+        env_names = sorted(spec.get("env") or [])
+        material = {
+            "cmd": cmd or "",
+            "env": {name: os.environ.get(name) for name in env_names},
+            "inputs": [[p, self._file_digest(p)] for p in self._input_files(spec.get("inputs"))],
+            "outputs": sorted(spec.get("outputs") or []),
+        }
+        blob = json.dumps(material, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    # -----------------------------
+    # Artifact store
+    # -----------------------------
+    def _artifact_path(self, key):
+        return os.path.join(self.store_dir, key[:2], f"{key}.tar.gz")
+
+    def has(self, key):
+        return os.path.isfile(self._artifact_path(key))
+
+    def restore(self, key):
+        """Extract the outputs stored under ``key``. Returns False on a miss."""
+        artifact = self._artifact_path(key)
+        if not os.path.isfile(artifact):
+            return False
+
+        try:
+            with tarfile.open(artifact, "r:gz") as tar:
+                members = tar.getmembers()
+                for member in members:
+                    target = os.path.abspath(os.path.join(self.workdir, member.name))
+                    if os.path.commonpath([target, self.workdir]) != self.workdir:
+                        raise ValueError(f"Unsafe path in cache artifact: {member.name}")
+                    if member.issym() or member.islnk():
+                        raise ValueError(f"Links are not allowed in cache artifacts: {member.name}")
+                tar.extractall(self.workdir, members=members)
+        except Exception as e:
+            print(f"[StepCache] Failed to restore {key}: {e}")
+            return False
+        return True
+
+    def save(self, key, spec):
+        """Archive the declared outputs under ``key``. Returns False if an output is missing."""
+        outputs = spec.get("outputs") or []
+        for out in outputs:
+            if not os.path.exists(os.path.join(self.workdir, out)):
+                print(f"[StepCache] Output '{out}' not found, not caching {key}")
+                return False
+
+        artifact = self._artifact_path(key)
+        os.makedirs(os.path.dirname(artifact), exist_ok=True)
+
+        # Write to a temp file first so concurrent builds never see a partial archive
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(artifact), suffix=".tmp")
+        os.close(fd)
+        try:
+            with tarfile.open(tmp_path, "w:gz") as tar:
+                for out in outputs:
+                    tar.add(os.path.join(self.workdir, out), arcname=out.replace("\\", "/"))
+            os.replace(tmp_path, artifact)
+        except Exception as e:
+            print(f"[StepCache] Failed to save {key}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        return True
@@ -0,0 +1,124 @@
+import { useEffect, useRef, useState } from "react";
+import axios from "axios";
+import io from "socket.io-client";
+
+const API = "http://127.0.0.1:5000";
+const MAX_BUILDS = 50;
+
+// one connection shared by every page using the hook
+const socket = io(API);
+
+// Apply one patch's ops. Ops carry absolute values, so re-applying a patch
+// already contained in the snapshot is harmless.
+function applyOps(state, ops) {
+  let { pipelines, builds } = state;
+  for (const op of ops) {
+    if (op.op === "pipeline") {
+      const exists = pipelines.some((p) => p.id === op.pipeline.id);
+      pipelines = exists
+        ? pipelines.map((p) => (p.id === op.pipeline.id ? op.pipeline : p))
+        : [...pipelines, op.pipeline];
+    } else if (op.op === "pipeline_removed") {
+      pipelines = pipelines.filter((p) => p.id !== op.id);
+      builds = builds.filter((b) => b.pipeline_id !== op.id);
+    } else if (op.op === "build") {
+      builds = [op.build, ...builds.filter((b) => b.id !== op.build.id)]
+        .sort((a, b) => (b.started_at || "").localeCompare(a.started_at || ""))
+        .slice(0, MAX_BUILDS);
+    }
+  }
+  return { pipelines, builds };
+}
+
+export function runtimeOf(pipeline) {
+  if (!pipeline.last_started_at) return "N/A";
+  // the API sends naive UTC timestamps
+  const asUtc = (s) => new Date(/[zZ]|[+-]\d\d:\d\d$/.test(s) ? s : `${s}Z`);
+  const end = pipeline.last_finished_at ? asUtc(pipeline.last_finished_at) : new Date();
+  return `${Math.max(0, Math.floor((end - asUtc(pipeline.last_started_at)) / 60000))} min`;
+}
+
+/**
+ * Pipelines and recent builds kept current by `state_patch` events instead
+ * of polling. Loads /api/state/snapshot once, applies patches in version
+ * order, fills gaps from /api/state/patches and reloads the snapshot when
+ * the server answers 410 (history gone or server restarted).
+ */
+export default function useLiveState({ onReport } = {}) {
+  const [state, setState] = useState({ pipelines: [], builds: [] });
+  const [loading, setLoading] = useState(true);
+  const sync = useRef({ epoch: null, version: 0, ready: false, pending: [] });
+  const onReportRef = useRef(onReport);
+  onReportRef.current = onReport;
+
+  useEffect(() => {
+    let active = true;
+
+    const apply = (patch) => {
+      sync.current.version = patch.version;
+      setState((prev) => applyOps(prev, patch.ops));
+      patch.ops
+        .filter((op) => op.op === "report")
+        .forEach((op) => onReportRef.current && onReportRef.current(op.report));
+    };
+
+    const loadSnapshot = async () => {
+      sync.current.ready = false;
+      try {
+        const res = await axios.get(`${API}/api/state/snapshot`);
+        if (!active) return;
+        const { epoch, version, pipelines, builds } = res.data;
+        sync.current = { epoch, version, ready: true, pending: sync.current.pending };
+        setState({ pipelines, builds });
+        // patches that arrived while the snapshot was loading
+        const pending = sync.current.pending.filter((p) => p.epoch === epoch && p.version > version);
+        sync.current.pending = [];
+        pending.sort((a, b) => a.version - b.version).forEach(apply);
+      } catch (err) {
+        console.error("❌ Error loading state snapshot:", err.message);
+      } finally {
+        if (active) setLoading(false);
+      }
+    };
+
+    const catchUp = async () => {
+      const { epoch, version } = sync.current;
+      try {
+        const res = await axios.get(`${API}/api/state/patches`, { params: { since: version, epoch } });
+        if (!active) return;
+        res.data.patches.filter((p) => p.version > sync.current.version).forEach(apply);
+      } catch (err) {
+        if (err.response && err.response.status === 410) loadSnapshot();
+        else console.error("❌ Error fetching state patches:", err.message);
+      }
+    };
+
+    const onPatch = (patch) => {
+      const current = sync.current;
+      if (!current.ready) {
+        current.pending.push(patch);
+      } else if (patch.epoch !== current.epoch) {
+        loadSnapshot();
+      } else if (patch.version === current.version + 1) {
+        apply(patch);
+      } else if (patch.version > current.version) {
+        catchUp();
+      }
+    };
+
+    // patches emitted while disconnected are fetched on reconnect
+    const onReconnect = () => sync.current.ready && catchUp();
+
+    socket.on("state_patch", onPatch);
+    socket.on("connect", onReconnect);
+    loadSnapshot();
+
+    return () => {
+      active = false;
+      socket.off("state_patch", onPatch);
+      socket.off("connect", onReconnect);
+    };
+  }, []);
+
+  return { ...state, loading };
+}
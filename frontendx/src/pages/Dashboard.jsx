@@ -13,21 +13,20 @@ import {
   CartesianGrid,
 } from "recharts";
 import DashboardCard from "../components/DashboardCard";
+import useLiveState, { runtimeOf } from "../hooks/useLiveState";
 import { AlertCircle, CheckCircle, Clock, XCircle, RefreshCcw } from "lucide-react";
 
 export default function Dashboard({ user }) {
-  const [pipelines, setPipelines] = useState([]);
   const [riskScore, setRiskScore] = useState({});
   const [threatCategories, setThreatCategories] = useState({});
   const [loading, setLoading] = useState(false);
 
-  // ✅ Fetch dashboard data
+  // ✅ Fetch report charts (pipelines come from the live state below)
   const fetchDashboardData = useCallback(() => {
     setLoading(true);
     axios
       .get("http://localhost:5000/api/dashboard-data", { cache: "no-store" })
       .then((res) => {
-        setPipelines(res.data.pipelines || []);
         setRiskScore(res.data.risk_score || {});
         setThreatCategories(res.data.threat_categories || {});
       })
@@ -35,11 +34,13 @@ export default function Dashboard({ user }) {
       .finally(() => setLoading(false));
   }, []);
 
-  // ✅ Auto-refresh every 10 seconds
+  // ✅ Pipeline status is pushed over Socket.IO; charts reload when PyGuard registers a new report
+  const { pipelines } = useLiveState({
+    onReport: (report) => report.scanner === "pyguard" && fetchDashboardData(),
+  });
+
   useEffect(() => {
     fetchDashboardData(); // initial fetch
-    const interval = setInterval(fetchDashboardData, 10000);
-    return () => clearInterval(interval);
   }, [fetchDashboardData]);
 
   // Chart data
@@ -203,7 +204,7 @@ export default function Dashboard({ user }) {
                       {pipeline.status.charAt(0).toUpperCase() +
                         pipeline.status.slice(1)}
                     </span>{" "}
-                    – {pipeline.runtime}
+                    – {runtimeOf(pipeline)}
                   </span>
                   {pipeline.status === "running" && (
                     <Clock className="w-5 h-5 text-[#64ffda] animate-pulse" />
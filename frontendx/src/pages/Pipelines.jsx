@@ -1,36 +1,10 @@
-import { useState, useEffect } from "react";
-import axios from "axios";
 import DashboardCard from "../components/DashboardCard";
+import useLiveState, { runtimeOf } from "../hooks/useLiveState";
 import { GitBranch, Clock, CheckCircle, AlertCircle } from "lucide-react";
 
 export default function Pipelines() {
-  const [pipelines, setPipelines] = useState([]);
-  const [loading, setLoading] = useState(true);
-
-  useEffect(() => {
-    const fetchData = async () => {
-      try {
-        const res = await axios.get("http://127.0.0.1:5000/api/pipelines");
-        if (Array.isArray(res.data)) {
-          setPipelines(res.data);
-        } else {
-          console.warn("⚠️ Unexpected API format:", res.data);
-          setPipelines([]);
-        }
-      } catch (err) {
-        console.error("❌ Error fetching pipelines:", err.message);
-        setPipelines([]);
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchData();
-
-    // Optional auto-refresh every 15 seconds
-    const interval = setInterval(fetchData, 15000);
-    return () => clearInterval(interval);
-  }, []);
+  // snapshot + pushed state_patch events, no polling
+  const { pipelines, loading } = useLiveState();
 
   const getStatusIcon = (status) => {
     switch (status) {
@@ -120,7 +94,7 @@ export default function Pipelines() {
                             <span className="text-[#64ffda]">{pipeline.id}</span>{" "}
                             • Runtime:{" "}
                             <span className="text-[#64ffda]">
-                              {pipeline.runtime || "N/A"}
+                              {runtimeOf(pipeline)}
                             </span>
                           </p>
                         </div>